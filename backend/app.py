@@ -1,17 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import json
+import logging
 import threading
 import time
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
-import traceback
 from services.data_generator import WeatherDataGenerator
 from services.ml_service import TimeGPTWeatherPredictor
 from services.supabase_service import SupabaseService
+from services.timeseries_store import to_epoch_ms
+from services.aggregation import SensorAggregator
+from services.rollups import BUCKET_TIERS
+from services.stations import StationRegistry, UnknownStationError
+from services.fanout import SensorFanout
+from services.sse import SSEBroadcaster, encode_event
+from services.ingest import ReadingIngestor, decode_msgpack, decode_ndjson
+from services.export import ChunkedExporter, page_chunks, slice_chunks
+from services.scheduler import SamplingScheduler, parse_interval, parse_sampling_rates
+from services.logging_setup import configure_logging
+from services import metrics
+
+configure_logging(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_FORMAT', 'json'))
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'klimacek-secret-key-2024')
@@ -30,65 +44,487 @@ else:
 
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Initialize services
-data_generator = WeatherDataGenerator()
+# Initialize services (clients connect on first use, probes run in warm-up)
+# SENSOR_SEED makes the synthetic data reproducible; without it a fresh seed is drawn
+data_generator = WeatherDataGenerator(
+    seed=int(os.environ['SENSOR_SEED']) if os.environ.get('SENSOR_SEED') else None
+)
 ml_predictor = TimeGPTWeatherPredictor()
 supabase_service = SupabaseService()
 
+# Persist live readings through a write-behind buffer (bulk inserts off the loop thread).
+# Off unless PERSIST_READINGS=true, so a deployment never writes to the database by accident
+PERSIST_READINGS = os.environ.get('PERSIST_READINGS', 'false').lower() == 'true'
+if PERSIST_READINGS:
+    supabase_service.enable_write_behind(
+        max_batch=int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500)),
+        max_age=float(os.environ.get('WRITE_BEHIND_MAX_AGE', 5)),
+        max_pending=int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 10000)),
+        overflow=os.environ.get('WRITE_BEHIND_OVERFLOW', 'drop_oldest')
+    )
+
+# Stations served by this process: SENSOR_STATIONS="ID_A,ID_B" or SENSOR_STATION_COUNT=N
+STATION_IDS = [s.strip() for s in os.environ.get('SENSOR_STATIONS', '').split(',') if s.strip()] or [
+    f'KLIMACEK_{i:03d}' for i in range(1, int(os.environ.get('SENSOR_STATION_COUNT', 1)) + 1)
+]
+
+# Recorded readings, hourly/daily rollups and running statistics per station
+# (1-minute data for the last 90 days by default)
+stations = StationRegistry(
+    STATION_IDS,
+    data_generator.base_values.keys(),
+    data_generator.ranges,
+    capacity=int(os.environ.get('SENSOR_BUFFER_CAPACITY', 131072))
+)
+BACKFILL_DAYS = int(os.environ.get('SENSOR_BACKFILL_DAYS', 90))
+
 # Global variables for real-time data
-current_data = {}
 is_generating = False
 
+# Sampling schedule: per-sensor rates (e.g. SENSOR_SAMPLING_RATES="wind_speed=10hz,rainfall=5m")
+# plus a 'record' channel that stores a snapshot of every station's current reading
+SAMPLING_INTERVALS = parse_sampling_rates(
+    os.environ.get('SENSOR_SAMPLING_RATES'),
+    stations.sensors,
+    default_interval=parse_interval(os.environ.get('SENSOR_SAMPLING_INTERVAL', '60s'))
+)
+SAMPLING_INTERVALS['record'] = parse_interval(os.environ.get('SENSOR_RECORD_INTERVAL', '60s'))
+scheduler = SamplingScheduler(
+    SAMPLING_INTERVALS,
+    policy=os.environ.get('SCHEDULER_POLICY', 'skip'),
+    max_catch_up=int(os.environ.get('SCHEDULER_MAX_CATCH_UP', 100)),
+    observe_lag=metrics.TICK_LAG.observe
+)
+
+# Per-sensor, delta-encoded live frames for clients that subscribe with 'subscribe_sensors'
+fanout = SensorFanout(keyframe_interval=int(os.environ.get('FANOUT_KEYFRAME_INTERVAL', 10)))
+
+# Server-Sent Events for /api/stream; event ids are reading timestamps in epoch ms
+sse = SSEBroadcaster(
+    max_queue=int(os.environ.get('SSE_MAX_QUEUE', 256)),
+    heartbeat=float(os.environ.get('SSE_HEARTBEAT', 15)),
+    sleep=socketio.sleep
+)
+SSE_MAX_REPLAY = int(os.environ.get('SSE_MAX_REPLAY', 1000))
+
+# Readings pushed by field stations (POST /api/sensors/ingest)
+ingestor = ReadingIngestor(
+    stations,
+    data_generator.ranges,
+    store_rows=supabase_service.store_sensor_data_batch if PERSIST_READINGS else None,
+    ensure_station=lambda station_id: ensure_sensor_history(station_id)
+)
+INGEST_MAX_BYTES = int(os.environ.get('INGEST_MAX_BYTES', 64 * 1024 * 1024))
+
+# Rows per chunk (CSV block, Parquet row group, Arrow record batch) of /api/sensors/export
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', 10000))
+
+def station_room(station_id):
+    """Socket.IO room of clients subscribed to one station"""
+    return f'station:{station_id}'
+
+# Background warm-up of slow dependencies, reported by /api/health
+warmup_state = {'status': 'pending', 'started_at': None, 'finished_at': None, 'services': {}}
+
+def run_warmup():
+    """Backfill history and probe external services without blocking startup"""
+    warmup_state['status'] = 'running'
+    warmup_state['started_at'] = datetime.now().isoformat()
+    
+    tasks = [
+        ('sensor_history', ensure_sensor_history),
+        ('timegpt', ml_predictor.warm_up),
+        ('supabase', supabase_service.health_check)
+    ]
+    for name, task in tasks:
+        started = time.perf_counter()
+        try:
+            status = 'unavailable' if task() is False else 'ready'
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            status = 'error'
+        warmup_state['services'][name] = {
+            'status': status,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+    
+    warmup_state['status'] = 'complete'
+    warmup_state['finished_at'] = datetime.now().isoformat()
+
+def start_warmup():
+    """Start the warm-up task in a daemon thread"""
+    threading.Thread(target=run_warmup, daemon=True).start()
+
+def ensure_sensor_history(station_id=None):
+    """Backfill a station's store with synthetic 1-minute history before first use"""
+    station = stations.get(station_id)
+    if station.seeded:
+        return station
+    with station.lock:
+        if station.seeded:
+            return station
+        if len(station.buffer) == 0 and BACKFILL_DAYS > 0:
+            end = np.datetime64(datetime.now(), 'ms')
+            count = min(BACKFILL_DAYS * 24 * 60, station.buffer.capacity)
+            timestamps = end - np.arange(count, 0, -1) * np.timedelta64(1, 'm')
+            columns = data_generator.generate_columns(timestamps, station_id=station.station_id)
+            station.extend(columns)
+            data_generator.seed_station(station.station_id, columns)
+        station.seeded = True
+    return station
+
+def recorded_history(days, limit, station_id=None):
+    """Recorded readings for the last ``days``, thinned to at most ``limit`` rows"""
+    return ensure_sensor_history(station_id).buffer.window(days=days).decimate(limit)
+
+def chart_history(days, max_points, resolution, sensor, station_id=None):
+    """Downsampled history, read from the coarsest rollup tier that is fine enough"""
+    station = ensure_sensor_history(station_id)
+    end_ms = to_epoch_ms(datetime.now())
+    start_ms = end_ms - days * 86400000
+    
+    tier = station.rollups.choose_tier(end_ms - start_ms, max_points) if resolution == 'minmax' else None
+    if tier:
+        return station.rollups.downsample(tier, start_ms, end_ms, max_points), tier
+    window = station.buffer.slice(start_ms, end_ms).downsample(max_points, resolution, sensor)
+    return window, 'raw'
+
+def store_aggregates(hours, bucket=None, percentiles=None, station_id=None):
+    """Statistics from in-process data: rollups for whole buckets, raw readings for the rest"""
+    station = ensure_sensor_history(station_id)
+    rollup_store = station.rollups
+    end_ms = to_epoch_ms(datetime.now())
+    start_ms = end_ms - hours * 3600000
+    sensors = stations.sensors
+    aggregator = SensorAggregator(sensors, bucket=bucket, percentiles=percentiles)
+    
+    def add_raw(lo, hi):
+        window = station.buffer.slice(lo, hi)
+        aggregator.update(window.timestamps(), {s: window.column(s) for s in sensors})
+    
+    if percentiles:
+        # Percentiles need the raw values
+        add_raw(start_ms, end_ms)
+    elif bucket:
+        # Whole hourly/daily buckets straight from the matching tier
+        buckets = rollup_store.query(BUCKET_TIERS[bucket], start_ms, end_ms)
+        for i, timestamp in enumerate(buckets['timestamp'].tolist()):
+            aggregator.merge(timestamp, buckets['count'][i], buckets['sum'][i],
+                             buckets['min'][i], buckets['max'][i], buckets['sum_sq'][i])
+    else:
+        # Full hours from the hourly tier, partial hours at either end from raw data
+        hour_ms = 3600000
+        inner_start = -(-start_ms // hour_ms) * hour_ms
+        inner_end = end_ms // hour_ms * hour_ms
+        if inner_end > inner_start:
+            aggregator.merge(0, *rollup_store.summarize('1h', inner_start, inner_end - 1))
+            add_raw(start_ms, inner_start - 1)
+            add_raw(inner_end, end_ms)
+        else:
+            add_raw(start_ms, end_ms)
+    
+    return aggregator.result()
+
+def unknown_station(error):
+    """404 response for a station_id this backend does not serve"""
+    return jsonify({
+        'success': False,
+        'error': str(error.args[0] if error.args else error)
+    }), 404
+
+@app.before_request
+def start_request_timer():
+    request.started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    started = getattr(request, 'started', None)
+    if started is not None:
+        # Label by route pattern rather than path so station ids don't multiply series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics in the text exposition format"""
+    metrics.SSE_SUBSCRIBERS.set(sse.stats()['subscribers'])
+    metrics.FANOUT_GROUPS.set(fanout.stats()['groups'])
+    metrics.TICKS_SKIPPED.set(scheduler.skipped)
+    if supabase_service.write_behind:
+        metrics.WRITE_BEHIND_PENDING.set(supabase_service.write_behind.stats()['pending'])
+    body, content_type = metrics.exposition()
+    return Response(body, content_type=content_type)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'service': 'Klimacek Weather Station API'
+        'service': 'Klimacek Weather Station API',
+        'warmup': warmup_state,
+        'stations': stations.stats(),
+        'fanout': fanout.stats(),
+        'sse': sse.stats(),
+        'scheduler': scheduler.stats(),
+        'ingest': ingestor.stats(),
+        'write_behind': supabase_service.write_behind.stats() if supabase_service.write_behind else None
     })
 
 @app.route('/api/sensors/current', methods=['GET'])
 def get_current_sensors():
     """Get current sensor readings"""
     try:
-        if not current_data:
+        station = stations.get(request.args.get('station_id'))
+        if not station.current:
             # Generate initial data if none exists
-            current_data.update(data_generator.generate_current_reading())
+            station.current = data_generator.generate_current_reading(station_id=station.station_id)
         
         return jsonify({
             'success': True,
-            'data': current_data,
+            'data': station.current,
+            'station_id': station.station_id,
             'timestamp': datetime.now().isoformat()
         })
+    except UnknownStationError as e:
+        return unknown_station(e)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/stream', methods=['GET'])
+def stream_sensor_updates():
+    """Live sensor updates as Server-Sent Events, resumable with Last-Event-ID"""
+    try:
+        station = stations.get(request.args.get('station_id'))
+    except UnknownStationError as e:
+        return unknown_station(e)
+    
+    # Subscribe before reading the replay so no reading falls in between
+    subscriber = sse.subscribe(station.station_id)
+    replay = []
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if last_event_id and last_event_id.isdigit():
+        missed = station.buffer.slice(int(last_event_id) + 1, to_epoch_ms(datetime.now()))
+        records = missed.to_records()[-SSE_MAX_REPLAY:]
+        event_ids = missed.timestamps()[-SSE_MAX_REPLAY:].tolist()
+        replay = [
+            (event_id, encode_event(event_id, {
+                'data': record,
+                'station_id': station.station_id,
+                'timestamp': record['timestamp'],
+                'replayed': True
+            }))
+            for event_id, record in zip(event_ids, records)
+        ]
+    elif station.current:
+        # New clients start from the current reading
+        event_id = to_epoch_ms(station.current['timestamp'])
+        replay = [(event_id, encode_event(event_id, {
+            'data': station.current,
+            'station_id': station.station_id,
+            'timestamp': station.current['timestamp']
+        }))]
+    
+    return Response(sse.stream(subscriber, replay), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/sensors/history', methods=['GET'])
 def get_sensor_history():
     """Get historical sensor data"""
     try:
         days = request.args.get('days', 7, type=int)
         limit = request.args.get('limit', 1000, type=int)
+        max_points = request.args.get('max_points', type=int)
+        resolution = request.args.get('resolution', 'minmax')
+        sensor = request.args.get('sensor', 'temperature')
+        station_id = stations.resolve(request.args.get('station_id'))
         
-        print(f"Generating historical data for {days} days, limit {limit}")
-        
-        # Generate historical data
-        historical_data = data_generator.generate_historical_data(days=days, limit=limit)
+        # Read recorded data, downsampled on the server when max_points is given
+        tier = 'raw'
+        if max_points and resolution != 'raw':
+            window, tier = chart_history(days, max_points, resolution, sensor, station_id)
+        else:
+            window = recorded_history(days, limit, station_id)
+        historical_data = window.to_records()
         
-        print(f"Generated {len(historical_data)} historical records")
+        logger.debug(f"Read {len(historical_data)} historical records",
+                     extra={'station_id': station_id, 'days': days, 'tier': tier})
         
         return jsonify({
             'success': True,
             'data': historical_data,
-            'count': len(historical_data)
+            'count': len(historical_data),
+            'station_id': station_id,
+            'resolution': resolution if max_points else 'raw',
+            'tier': tier
         })
+    except UnknownStationError as e:
+        return unknown_station(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception(f"Error in get_sensor_history: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sensors/export', methods=['GET'])
+def export_sensor_data():
+    """Stream readings for a time range as CSV, gzip CSV, Parquet or Arrow IPC"""
+    try:
+        exporter = ChunkedExporter(request.args.get('format', 'csv'), stations.sensors)
+        station_id = stations.resolve(request.args.get('station_id'))
+        source = request.args.get('source', 'store')
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.now()
+        if request.args.get('start'):
+            start = datetime.fromisoformat(request.args['start'])
+        else:
+            start = end - timedelta(days=request.args.get('days', 7, type=int))
+        
+        if source == 'store':
+            window = ensure_sensor_history(station_id).buffer.slice(to_epoch_ms(start), to_epoch_ms(end))
+            chunks = slice_chunks(window, station_id, EXPORT_CHUNK_ROWS)
+        elif source == 'database':
+            if not supabase_service.supabase:
+                return jsonify({'success': False, 'error': 'Database unavailable'}), 503
+            pages = supabase_service.iter_sensor_data(start, end, chunks=True, station_id=station_id)
+            chunks = page_chunks(pages, station_id)
+        else:
+            raise ValueError(f"Unknown export source: {source}")
+        
+        filename = exporter.filename(f"{station_id}_{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}")
+        return Response(exporter.stream(chunks), mimetype=exporter.mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        })
+    except UnknownStationError as e:
+        return unknown_station(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sensors/ingest', methods=['POST'])
+def ingest_sensor_readings():
+    """Accept a batch of readings from a station as NDJSON or msgpack"""
+    try:
+        if (request.content_length or 0) > INGEST_MAX_BYTES:
+            return jsonify({'success': False, 'error': 'Payload too large'}), 413
+        
+        content_type = (request.mimetype or '').lower()
+        body = request.get_data(cache=False)
+        if 'msgpack' in content_type:
+            readings = decode_msgpack(body)
+        elif content_type == 'application/json':
+            readings = json.loads(body or b'[]')
+            readings = readings if isinstance(readings, list) else [readings]
+        elif content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl',
+                              'text/plain', ''):
+            readings = decode_ndjson(body)
+        else:
+            return jsonify({'success': False, 'error': f'Unsupported content type: {content_type}'}), 415
+        
+        started = time.perf_counter()
+        summary = ingestor.ingest(
+            readings,
+            invalid=request.args.get('invalid', 'null'),
+            default_station=request.args.get('station_id')
+        )
+        summary['seconds'] = round(time.perf_counter() - started, 4)
+        return jsonify({'success': True, **summary})
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sensors/stats', methods=['GET'])
+def get_sensor_stats():
+    """Running statistics of every recorded reading of a station, kept as they arrive"""
+    try:
+        station = stations.get(request.args.get('station_id'))
+        sensors = [s for s in request.args.get('sensors', '').split(',') if s] or None
+        unknown = sorted(set(sensors or ()) - set(stations.sensors))
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown sensors: {', '.join(unknown)}"
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'stats': station.stats.summary(sensors),
+            'station_id': station.station_id,
+            'ewma_alpha': station.stats.ewma_alpha,
+            'timestamp': datetime.now().isoformat()
+        })
+    except UnknownStationError as e:
+        return unknown_station(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sensors/aggregates', methods=['GET'])
+def get_sensor_aggregates():
+    """Per-sensor statistics over a window, optionally per hour/day bucket"""
+    try:
+        hours = request.args.get('hours', 24, type=int)
+        bucket = request.args.get('bucket')
+        percentiles = [float(p) for p in request.args.get('percentiles', '').split(',') if p]
+        station_id = stations.resolve(request.args.get('station_id'))
+        
+        # Aggregated in the database; recorded in-process data when it is unavailable
+        source = 'database'
+        if bucket:
+            aggregates = supabase_service.get_bucketed_aggregates(hours, bucket, percentiles, station_id)
+        else:
+            aggregates = supabase_service.get_sensor_averages(hours, percentiles, station_id)
+        
+        if not aggregates:
+            source = 'store'
+            aggregates = store_aggregates(hours, bucket, percentiles, station_id)
+        
+        return jsonify({
+            'success': True,
+            'aggregates': aggregates,
+            'source': source,
+            'station_id': station_id,
+            'hours': hours,
+            'bucket': bucket
+        })
+    except UnknownStationError as e:
+        return unknown_station(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
-        print(f"Error in get_sensor_history: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -99,32 +535,29 @@ def get_predictions():
     """Get TimeGPT predictions for the next month"""
     try:
         prediction_days = request.args.get('days', 30, type=int)
+        station_id = stations.resolve(request.args.get('station_id'))
         
-        print(f"🔮 Generating TimeGPT predictions for {prediction_days} days")
-        
-        # Generate training data
-        print("Generating historical data...")
-        historical_data = data_generator.generate_historical_data(days=60, limit=2000)
-        print(f"Generated {len(historical_data)} historical samples")
+        # Read recorded data
+        historical_data = recorded_history(60, 2000, station_id).to_prepared()
+        logger.debug(f"Generating predictions for {prediction_days} days from {len(historical_data)} samples",
+                     extra={'station_id': station_id})
         
         # TimeGPT doesn't need training - it's a foundation model
         if not ml_predictor.is_trained:
-            print("Initializing TimeGPT model...")
             try:
                 ml_predictor.train_model(historical_data)  # This just validates data
-                print("TimeGPT model ready")
             except Exception as training_error:
-                print(f"TimeGPT initialization issue: {str(training_error)}")
+                logger.warning(f"TimeGPT initialization issue: {training_error}")
                 # Return simple predictions instead of failing completely
                 return jsonify({
                     'success': True,
-                    'predictions': generate_simple_predictions(prediction_days),
-                    'model_accuracy': {'note': 'Using simplified predictions - TimeGPT unavailable'},
-                    'forecast_days': prediction_days
+                    'predictions': generate_simple_predictions(prediction_days, historical_data),
+                    'model_accuracy': {'note': 'Using local statistical predictions - TimeGPT unavailable'},
+                    'forecast_days': prediction_days,
+                    'station_id': station_id
                 })
         
         # Generate TimeGPT predictions
-        print("Generating TimeGPT predictions...")
         predictions = ml_predictor.predict_future(historical_data, prediction_days)
         
         return jsonify({
@@ -132,48 +565,52 @@ def get_predictions():
             'predictions': predictions,
             'model_accuracy': ml_predictor.get_model_metrics(),
             'forecast_days': prediction_days,
+            'station_id': station_id,
             'model_type': 'TimeGPT Foundation Model'
         })
+    except UnknownStationError as e:
+        return unknown_station(e)
     except Exception as e:
-        print(f"Error in get_predictions: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception(f"Error in get_predictions: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def generate_simple_predictions(days):
-    """Generate simple predictions as fallback"""
-    sensors = ['humidity', 'temperature', 'light_intensity', 'rainfall', 'wind_speed', 'solar_voltage', 'solar_wattage', 'solar_current']
-    predictions = {}
-    
-    for sensor in sensors:
-        sensor_predictions = []
-        base_value = data_generator.base_values[sensor]
-        
-        for day in range(days):
-            # Simple trend with some variation
-            trend_factor = 1 + (day * 0.01)  # Small upward trend
-            noise = np.random.normal(0, base_value * 0.1)  # 10% noise
-            predicted_value = base_value * trend_factor + noise
-            
-            sensor_predictions.append({
-                'day': day + 1,
-                'date': (datetime.now() + timedelta(days=day + 1)).isoformat(),
-                'predicted_value': float(max(0, predicted_value)),  # Ensure non-negative
-                'confidence': max(95 - (day * 1.5), 60)  # Decreasing confidence
-            })
-        
-        predictions[sensor] = sensor_predictions
-    
-    return predictions
+@app.route('/api/predictions/cache', methods=['GET'])
+def get_prediction_cache_stats():
+    """Forecast cache hit/miss counters"""
+    return jsonify({
+        'success': True,
+        'cache': ml_predictor.forecast_cache.stats()
+    })
+
+@app.route('/api/database/stats', methods=['GET'])
+def get_database_stats():
+    """Stored record count and time range, cached briefly"""
+    days = request.args.get('days', 7, type=int)
+    estimated = request.args.get('estimated', 'false').lower() in ('1', 'true', 'yes')
+    station_id = request.args.get('station_id')
+    if station_id and station_id not in stations:
+        return unknown_station(UnknownStationError(f"Unknown station: {station_id}"))
+    stats = supabase_service.get_data_statistics(days, estimated=estimated, station_id=station_id)
+    return jsonify({
+        'success': bool(stats),
+        'stats': stats,
+        'cache': supabase_service.stats_cache.stats()
+    }), 200 if stats else 503
+
+def generate_simple_predictions(days, historical_data):
+    """Generate local statistical predictions as fallback"""
+    return ml_predictor.predict_future(historical_data, days, engine=ml_predictor.fallback_engine)
 
 @app.route('/api/train-model', methods=['POST'])
 def train_model():
     """Initialize TimeGPT model (no training needed)"""
     try:
-        # Generate comprehensive historical data for validation
-        historical_data = data_generator.generate_historical_data(days=90, limit=5000)
+        # Use comprehensive recorded data for validation
+        station_id = (request.get_json(silent=True) or {}).get('station_id') or request.args.get('station_id')
+        historical_data = recorded_history(90, 5000, station_id).to_prepared()
         
         # Initialize/validate the TimeGPT model
         metrics = ml_predictor.train_model(historical_data)
@@ -184,6 +621,8 @@ def train_model():
             'metrics': metrics,
             'model_type': 'TimeGPT Foundation Model'
         })
+    except UnknownStationError as e:
+        return unknown_station(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -219,56 +658,149 @@ def stop_realtime_data():
 
 def realtime_data_loop():
     """Background thread for generating real-time data"""
-    global current_data, is_generating
+    # Backfill before the first live reading so the stores stay in time order
+    for station_id in stations.station_ids:
+        ensure_sensor_history(station_id)
     
-    while is_generating:
-        try:
-            # Generate new reading
-            new_reading = data_generator.generate_current_reading()
-            current_data.update(new_reading)
-            
-            # Emit to WebSocket clients
-            socketio.emit('sensor_update', {
-                'data': current_data,
-                'timestamp': datetime.now().isoformat()
+    scheduler.run(sampling_tick, running=lambda: is_generating)
+
+def sampling_tick(scheduled_at, channels):
+    """Sample the due sensors of every station; record and broadcast full readings on 'record' ticks"""
+    sensors = [channel for channel in channels if channel != 'record']
+    record = 'record' in channels
+    
+    # One sample per station, generated in a single vectorized step
+    columns = data_generator.generate_station_readings(stations.station_ids, scheduled_at, sensors=sensors)
+    new_readings = stations.update_columns(columns, record=record)
+    
+    # One delta frame per subscription group, encoded once for all its members
+    for room, frame in fanout.frames(new_readings):
+        socketio.emit('sensor_frame', frame, to=room)
+    
+    if not record:
+        return
+    
+    # Emit each reading to the clients subscribed to its station
+    timestamp = datetime.now().isoformat()
+    for reading in new_readings:
+        socketio.emit('sensor_update', {
+            'data': reading,
+            'station_id': reading['station_id'],
+            'timestamp': timestamp
+        }, to=station_room(reading['station_id']))
+    
+    # Server-Sent Events, encoded once per station
+    for reading in new_readings:
+        if sse.has_subscribers(reading['station_id']):
+            sse.publish(reading['station_id'], to_epoch_ms(reading['timestamp']), {
+                'data': reading,
+                'station_id': reading['station_id'],
+                'timestamp': timestamp
             })
-            
-            # Store in database (optional)
-            # supabase_service.store_sensor_data(current_data)
-            
-            # Wait for next minute
-            time.sleep(60)  # Generate data every minute
-            
-        except Exception as e:
-            print(f"Error in real-time data loop: {e}")
-            # Don't break the loop, just wait and try again
-            time.sleep(5)
+    
+    # Queue for the database (non-blocking with write-behind)
+    if PERSIST_READINGS:
+        supabase_service.store_sensor_data_batch(new_readings)
 
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection"""
-    print('Client connected')
-    # Send current data to newly connected client
-    if current_data:
+    logger.debug('Client connected', extra={'sid': request.sid})
+    metrics.SOCKET_CLIENTS.inc()
+    # Clients follow the default station until they subscribe to others
+    subscribe_station(stations.default_station)
+
+def subscribe_station(station_id):
+    """Join a station's room and send its current reading"""
+    join_room(station_room(station_id))
+    current = stations.current(station_id)
+    if current:
         emit('sensor_update', {
-            'data': current_data,
+            'data': current,
+            'station_id': station_id,
             'timestamp': datetime.now().isoformat()
         })
 
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Receive sensor updates for the given stations"""
+    data = data or {}
+    try:
+        station_ids = [stations.resolve(station_id) for station_id in data.get('station_ids') or [data.get('station_id')]]
+        for station_id in station_ids:
+            subscribe_station(station_id)
+        emit('subscribed', {'station_ids': station_ids})
+    except UnknownStationError as e:
+        emit('subscription_error', {'error': str(e)})
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data=None):
+    """Stop sensor updates for the given stations (the default station when none is given)"""
+    data = data or {}
+    try:
+        station_ids = [stations.resolve(station_id) for station_id in data.get('station_ids') or [data.get('station_id')]]
+        for station_id in station_ids:
+            leave_room(station_room(station_id))
+        emit('unsubscribed', {'station_ids': station_ids})
+    except UnknownStationError as e:
+        emit('subscription_error', {'error': str(e)})
+
+@socketio.on('subscribe_sensors')
+def handle_subscribe_sensors(data=None):
+    """Receive delta frames for selected sensors of a station instead of full updates"""
+    data = data or {}
+    try:
+        station_id = stations.resolve(data.get('station_id'))
+        sensors = data.get('sensors') or stations.sensors
+        unknown = [sensor for sensor in sensors if sensor not in stations.sensors]
+        if unknown:
+            raise ValueError(f"Unknown sensors: {', '.join(unknown)}")
+        
+        room, keyframe, left = fanout.subscribe(request.sid, station_id, sensors)
+        for old_room in left:
+            leave_room(old_room)
+        leave_room(station_room(station_id))
+        join_room(room)
+        emit('subscribed', {'station_id': station_id, 'sensors': sorted(set(sensors))})
+        if keyframe:
+            emit('sensor_frame', keyframe)
+    except (UnknownStationError, ValueError) as e:
+        emit('subscription_error', {'error': str(e)})
+
+@socketio.on('unsubscribe_sensors')
+def handle_unsubscribe_sensors(data=None):
+    """Stop delta frames for a station (all stations when none is given)"""
+    data = data or {}
+    for room in fanout.unsubscribe(request.sid, data.get('station_id')):
+        leave_room(room)
+    emit('unsubscribed', {'station_id': data.get('station_id')})
+
+@socketio.on('request_keyframe')
+def handle_request_keyframe(data=None):
+    """Resend the full state of a subscription, e.g. after a gap in frame numbers"""
+    data = data or {}
+    keyframe = fanout.keyframe(request.sid, data.get('station_id'))
+    if keyframe:
+        emit('sensor_frame', keyframe)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
-    print('Client disconnected')
+    fanout.unsubscribe(request.sid)
+    logger.debug('Client disconnected', extra={'sid': request.sid})
+    metrics.SOCKET_CLIENTS.dec()
 
 @socketio.on('request_prediction')
-def handle_prediction_request(data):
+def handle_prediction_request(data=None):
     """Handle real-time prediction requests"""
+    data = data or {}
     try:
         sensor_type = data.get('sensor', 'temperature')
         days = data.get('days', 7)
+        station_id = stations.resolve(data.get('station_id'))
         
-        # Generate training data
-        training_data = data_generator.generate_historical_data(days=30, limit=1000)
+        # Read recorded training data
+        training_data = recorded_history(30, 1000, station_id).to_prepared()
         
         # Get prediction for specific sensor
         if not ml_predictor.is_trained:
@@ -278,6 +810,7 @@ def handle_prediction_request(data):
         
         emit('prediction_update', {
             'sensor': sensor_type,
+            'station_id': station_id,
             'predictions': predictions,
             'timestamp': datetime.now().isoformat()
         })
@@ -285,17 +818,15 @@ def handle_prediction_request(data):
         emit('prediction_error', {'error': str(e)})
 
 if __name__ == '__main__':
+    # Connect to external services in the background; the port binds immediately
+    start_warmup()
+    
     # Start real-time data generation on startup
     threading.Thread(target=lambda: (time.sleep(2), start_realtime_data()), daemon=True).start()
     
-    print("🌤️  Klimacek Weather Station API Starting...")
-    print("🔧 Backend running on http://localhost:5000")
-    print("📊 Real-time data will start automatically")
-    print("🤖 TimeGPT foundation model ready for predictions")
-    print("🔮 Advanced AI forecasting powered by Nixtla TimeGPT")
-    
     # Use PORT from environment (Railway sets this) or default to 5000
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
+    logger.info("Klimacek Weather Station API starting", extra={'port': port, 'debug': debug})
     
     socketio.run(app, debug=debug, host='0.0.0.0', port=port)
\ No newline at end of file
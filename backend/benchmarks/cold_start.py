@@ -0,0 +1,101 @@
+"""Cold-start budget check for the API process
+
+Measures the import time of ``app`` and the time from process launch to the
+first 200 response from /api/health. Exits with status 1 when either median
+exceeds its budget. With ``--offline`` the app talks to the in-memory fakes
+instead of TimeGPT and Supabase; tests/test_cold_start.py runs it that way.
+
+    python benchmarks/cold_start.py --budget 5 --import-budget 3 --runs 3
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs app.py as __main__ with the Nixtla and Supabase clients replaced by fakes
+OFFLINE_APP = (
+    "import runpy, sys; sys.path.insert(0, '.'); "
+    "from benchmarks.fakes import install_offline_clients; install_offline_clients(); "
+    "runpy.run_path('app.py', run_name='__main__')"
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import():
+    """Seconds to import the app module in a fresh interpreter"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=BACKEND_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def measure_first_health(timeout=60, offline=False):
+    """Seconds from launching app.py to the first 200 from /api/health"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_ENV='production')
+    url = f'http://127.0.0.1:{port}/api/health'
+
+    started = time.perf_counter()
+    command = [sys.executable, '-c', OFFLINE_APP] if offline else [sys.executable, 'app.py']
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"/api/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=5.0, help='maximum median cold start in seconds')
+    parser.add_argument('--import-budget', type=float, default=3.0,
+                        help='maximum median import time of app in seconds')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--offline', action='store_true',
+                        help='use the in-memory fakes instead of TimeGPT and Supabase')
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    starts = [measure_first_health(offline=args.offline) for _ in range(args.runs)]
+    result = {
+        'import_seconds': round(statistics.median(imports), 3),
+        'first_health_seconds': round(statistics.median(starts), 3),
+        'budget_seconds': args.budget,
+        'import_budget_seconds': args.import_budget
+    }
+    print(json.dumps(result, indent=2))
+
+    over = []
+    if result['import_seconds'] > args.import_budget:
+        over.append(f"import {result['import_seconds']}s > {args.import_budget}s")
+    if result['first_health_seconds'] > args.budget:
+        over.append(f"first /api/health {result['first_health_seconds']}s > {args.budget}s")
+    if over:
+        print(f"Cold start over budget: {'; '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""In-memory stand-ins for the external services used by the benchmarks
+
+FakeSupabase answers the PostgREST query-builder calls SupabaseService makes
+against in-memory ``sensor_data`` and ``sensor_rollups`` tables and counts the round trips
+(``execute`` and ``rpc`` calls). StubNixtlaClient returns
+seasonal-naive forecasts in the shape of NixtlaClient.forecast. Neither
+touches the network, so benchmark timings measure this code only.
+``install_offline_clients`` makes a whole app process use them.
+"""
+import bisect
+import re
+import sys
+import time
+import types
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+SENSORS = [
+    'humidity', 'temperature', 'light_intensity', 'rainfall',
+    'wind_speed', 'solar_voltage', 'solar_wattage', 'solar_current'
+]
+
+_FILTER = re.compile(r'(\w+)\.(gt|lt|eq)\.(?:"([^"]*)"|([^,()]+))')
+
+
+class _Top:
+    """Sorts after every other value, so ``(value, _TOP)`` follows all keys starting with value"""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return other is not self
+
+
+_TOP = _Top()
+
+
+def sensor_rows(count, station_id='KLIMACEK_001', end=None, interval=timedelta(minutes=1), seed=0):
+    """``count`` sensor_data rows ending at ``end``, one per interval"""
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now()
+    values = {sensor: np.round(rng.uniform(0, 100, count), 2).tolist() for sensor in SENSORS}
+    rows = []
+    for i in range(count):
+        row = {
+            'id': i + 1,
+            'timestamp': (end - (count - i) * interval).isoformat(timespec='microseconds'),
+            'station_id': station_id,
+            'location': 'Surakarta, Central Java, ID'
+        }
+        row.update({sensor: values[sensor][i] for sensor in SENSORS})
+        rows.append(row)
+    return rows
+
+
+class FakeTable:
+    """Rows of one table kept sorted by its key columns, (timestamp, id) by default"""
+
+    def __init__(self, rows=(), key_columns=('timestamp', 'id')):
+        self.key_columns = key_columns
+        self.rows = sorted(rows, key=self.key)
+        self.keys = [self.key(row) for row in self.rows]
+        self.next_id = max((row.get('id', 0) for row in self.rows), default=0) + 1
+
+    def key(self, row):
+        return tuple(row.get(column, 0) for column in self.key_columns)
+
+    def add(self, rows, on_conflict=None):
+        unique = set()
+        if on_conflict:
+            fields = on_conflict.split(',')
+            unique = {tuple(row.get(f) for f in fields) for row in self.rows}
+        added = []
+        for row in rows:
+            if on_conflict:
+                key = tuple(row.get(f) for f in fields)
+                if key in unique:
+                    continue
+                unique.add(key)
+            row = dict(row, id=self.next_id)
+            self.next_id += 1
+            key = self.key(row)
+            index = bisect.bisect_right(self.keys, key)
+            self.keys.insert(index, key)
+            self.rows.insert(index, row)
+            added.append(row)
+        return added
+
+
+class FakeQuery:
+    """The subset of the PostgREST builder used by SupabaseService"""
+
+    def __init__(self, table, client=None):
+        self.table = table
+        self.client = client
+        self.action = 'select'
+        self.payload = None
+        self.on_conflict = None
+        self.low = self.high = None      # (key, inclusive)
+        self.equals = {}
+        self.descending = False
+        self.row_limit = None
+        self.offset = 0
+        self.count_mode = None
+
+    def select(self, fields='*', count=None):
+        self.count_mode = count
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.action, self.payload, self.on_conflict = 'insert', rows, on_conflict
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.equals[column] = value
+        return self
+
+    def gte(self, column, value):
+        return self._bound('low', (value,), True)
+
+    def gt(self, column, value):
+        return self._bound('low', (value, _TOP), False)
+
+    def lt(self, column, value):
+        return self._bound('high', (value,), False)
+
+    def lte(self, column, value):
+        return self._bound('high', (value, _TOP), True)
+
+    def or_(self, expression):
+        # Keyset condition: rows after (or before) one key, e.g. (timestamp, id)
+        filters = _FILTER.findall(expression)
+        values = {}
+        for column, _, quoted, bare in filters:
+            values[column] = quoted if not bare else int(bare) if bare.isdigit() else bare
+        key = tuple(values[column] for column in self.table.key_columns)
+        return self._bound('low' if filters[0][1] == 'gt' else 'high', key, False)
+
+    def _bound(self, side, key, inclusive):
+        current = getattr(self, side)
+        if current is None or (key > current[0] if side == 'low' else key < current[0]):
+            setattr(self, side, (key, inclusive))
+        return self
+
+    def order(self, column, desc=False):
+        if column == self.table.key_columns[0]:
+            self.descending = desc
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.offset, self.row_limit = start, end - start + 1
+        return self
+
+    def _matching(self):
+        keys = self.table.keys
+        start, stop = 0, len(keys)
+        if self.low:
+            key, inclusive = self.low
+            start = (bisect.bisect_left if inclusive else bisect.bisect_right)(keys, key)
+        if self.high:
+            key, inclusive = self.high
+            stop = (bisect.bisect_right if inclusive else bisect.bisect_left)(keys, key)
+        indices = range(start, stop)
+        if self.descending:
+            indices = reversed(indices)
+        for i in indices:
+            row = self.table.rows[i]
+            if all(row.get(column) == value for column, value in self.equals.items()):
+                yield row
+
+    def execute(self):
+        if self.client is not None:
+            self.client.round_trips += 1
+        if self.action == 'insert':
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            return types.SimpleNamespace(data=self.table.add(rows, self.on_conflict), count=None)
+        if self.action == 'delete':
+            doomed = set(map(id, self._matching()))
+            kept = [(key, row) for key, row in zip(self.table.keys, self.table.rows) if id(row) not in doomed]
+            self.table.keys = [key for key, _ in kept]
+            self.table.rows = [row for _, row in kept]
+            return types.SimpleNamespace(data=[], count=len(doomed))
+
+        matching = self._matching()
+        total = None
+        if self.count_mode:
+            matching = list(matching)
+            total = len(matching)
+        page = []
+        for i, row in enumerate(matching):
+            if i < self.offset:
+                continue
+            if self.row_limit is not None and len(page) >= self.row_limit:
+                break
+            page.append(row)
+        return types.SimpleNamespace(data=page, count=total)
+
+
+class FakeSupabase:
+    """Client with in-memory tables; SQL functions are reported as not installed"""
+
+    def __init__(self, sensor_data=(), sensor_rollups=()):
+        self.tables = {
+            'sensor_data': FakeTable(sensor_data),
+            'sensor_rollups': FakeTable(sensor_rollups, key_columns=('bucket_start', 'station_id', 'sensor'))
+        }
+        self.round_trips = 0
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = FakeTable()
+        return FakeQuery(self.tables[name], self)
+
+    def rpc(self, name, params=None):
+        self.round_trips += 1
+        raise RuntimeError(f"function {name} does not exist")
+
+
+class StubNixtlaClient:
+    """Seasonal-naive forecasts shaped like NixtlaClient.forecast output
+
+    ``latency`` seconds are slept per call to stand in for the API round
+    trip (zero by default, so only local work is timed).
+    """
+
+    def __init__(self, api_key=None, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def forecast(self, df, h, time_col='ds', target_col='y', id_col=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        groups = df.groupby(id_col, sort=False) if id_col else [(None, df)]
+        frames = []
+        for key, group in groups:
+            timestamps = pd.to_datetime(group[time_col]).to_numpy()
+            values = group[target_col].to_numpy(dtype=np.float64)
+            step = np.median(np.diff(timestamps)) if len(timestamps) > 1 else np.timedelta64(1, 'D')
+            season = values[-min(len(values), h):]
+            frame = pd.DataFrame({
+                time_col: timestamps[-1] + step * np.arange(1, h + 1),
+                'TimeGPT': np.resize(season, h)
+            })
+            if id_col:
+                frame.insert(0, id_col, key)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+
+def install_offline_clients():
+    """Route the lazy ``nixtla`` and ``supabase`` imports to the fakes
+
+    Call before app.py runs so its warm-up and database calls stay in-process.
+    """
+    nixtla = types.ModuleType('nixtla')
+    nixtla.NixtlaClient = StubNixtlaClient
+    supabase = types.ModuleType('supabase')
+    supabase.create_client = lambda url, key: FakeSupabase()
+    sys.modules['nixtla'], sys.modules['supabase'] = nixtla, supabase
@@ -0,0 +1,105 @@
+"""Socket.IO fan-out cost per tick with simulated clients
+
+Compares sending every client the full reading of its station, encoded per
+client, with SensorFanout: one delta frame per subscription group, encoded
+once. Reports bytes on the wire and encoding CPU per tick; nothing is sent
+over a network.
+
+    python benchmarks/fanout.py --clients 1000 --stations 10 --ticks 60
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socketio import packet  # noqa: E402
+from services.data_generator import WeatherDataGenerator  # noqa: E402
+from services.fanout import SensorFanout  # noqa: E402
+
+# Sensor sets displayed by typical clients
+VIEWS = [
+    ('temperature',),
+    ('humidity',),
+    ('rainfall',),
+    ('wind_speed',),
+    ('temperature', 'humidity'),
+    ('solar_voltage', 'solar_wattage', 'solar_current'),
+    ('humidity', 'light_intensity', 'rainfall', 'solar_current', 'solar_voltage',
+     'solar_wattage', 'temperature', 'wind_speed')
+]
+
+
+def encode(event, payload):
+    """Bytes of the Socket.IO packet the server would send for one emit"""
+    return packet.Packet(packet.EVENT, namespace='/', data=[event, payload]).encode().encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--stations', type=int, default=10)
+    parser.add_argument('--ticks', type=int, default=60)
+    parser.add_argument('--keyframe-interval', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    generator = WeatherDataGenerator()
+    station_ids = [f'KLIMACEK_{i:03d}' for i in range(1, args.stations + 1)]
+    fanout = SensorFanout(keyframe_interval=args.keyframe_interval)
+    clients = []
+    for sid in range(args.clients):
+        station_id = random.choice(station_ids)
+        fanout.subscribe(sid, station_id, random.choice(VIEWS))
+        clients.append(station_id)
+
+    full = {'bytes': 0, 'seconds': 0.0}
+    delta = {'bytes': 0, 'seconds': 0.0}
+    for _ in range(args.ticks):
+        columns = generator.generate_station_readings(station_ids)
+        readings = generator.columns_to_records(columns)
+        by_station = {reading['station_id']: reading for reading in readings}
+
+        # Full reading per client, serialized for each client
+        started = time.perf_counter()
+        for station_id in clients:
+            full['bytes'] += len(encode('sensor_update', {
+                'data': by_station[station_id],
+                'timestamp': by_station[station_id]['timestamp']
+            }))
+        full['seconds'] += time.perf_counter() - started
+
+        # Delta frames, serialized once per group
+        started = time.perf_counter()
+        for room, frame in fanout.frames(readings):
+            delta['bytes'] += len(encode('sensor_frame', frame)) * fanout.group_size(room)
+        delta['seconds'] += time.perf_counter() - started
+
+    stats = fanout.stats()
+    result = {
+        'clients': args.clients,
+        'stations': args.stations,
+        'groups': stats['groups'],
+        'ticks': args.ticks,
+        'full_update': {
+            'bytes_per_tick': round(full['bytes'] / args.ticks),
+            'encode_ms_per_tick': round(full['seconds'] / args.ticks * 1000, 3)
+        },
+        'delta_fanout': {
+            'bytes_per_tick': round(delta['bytes'] / args.ticks),
+            'encode_ms_per_tick': round(delta['seconds'] / args.ticks * 1000, 3),
+            'frames_per_tick': round(stats['frames_sent'] / args.ticks, 1)
+        }
+    }
+    result['bytes_ratio'] = round(
+        result['delta_fanout']['bytes_per_tick'] / max(1, result['full_update']['bytes_per_tick']), 3
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Benchmark suite for the backend hot paths, with JSON baselines
+
+Every case is timed ``--repeat`` times after one warm-up call and reported
+as median and minimum seconds. External services are replaced by the
+in-memory fakes in ``benchmarks/fakes.py``.
+
+    python benchmarks/suite.py                                   # run and print
+    python benchmarks/suite.py --save benchmarks/baselines/local.json
+    python benchmarks/suite.py --compare benchmarks/baselines/local.json --threshold 0.25
+    python benchmarks/suite.py --only history --repeat 10
+
+With ``--compare`` the run exits with status 1 when any case's median is
+more than ``threshold`` (a fraction) slower than in the baseline. Baselines
+are only comparable on the machine that recorded them.
+"""
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The app is imported for the end-to-end cases: keep it offline and quick to backfill
+os.environ.setdefault('PERSIST_READINGS', 'false')
+os.environ.setdefault('SENSOR_BACKFILL_DAYS', '60')
+os.environ.setdefault('SENSOR_SEED', '0')
+
+from benchmarks.fakes import FakeSupabase, StubNixtlaClient, sensor_rows  # noqa: E402
+
+CASES = {}
+
+
+def case(name, repeat=None):
+    """Register ``setup()``, which prepares inputs and returns the callable to time"""
+    def register(setup):
+        CASES[name] = (setup, repeat)
+        return setup
+    return register
+
+
+# Synthetic data generation
+
+def _historical(rows):
+    def setup():
+        from services.data_generator import WeatherDataGenerator
+        generator = WeatherDataGenerator(seed=0)
+        days = rows // 1440 + 1
+        return lambda: generator.generate_historical_data(days=days, limit=rows)
+    return setup
+
+
+case('generate_historical_data/1k')(_historical(1000))
+case('generate_historical_data/100k')(_historical(100000))
+case('generate_historical_data/1m', repeat=3)(_historical(1000000))
+
+
+# Forecast data preparation and prediction
+
+def _history_frame(days=60, limit=2000):
+    from services.data_generator import WeatherDataGenerator
+    generator = WeatherDataGenerator(seed=0)
+    return generator.generate_historical_columns(days=days, limit=limit)
+
+
+@case('prepare_data_for_timegpt/8_sensors')
+def prepare_all_sensors():
+    import pandas as pd
+    from services.ml_service import TimeGPTWeatherPredictor
+    predictor = TimeGPTWeatherPredictor()
+    frame = pd.DataFrame(_history_frame(days=30, limit=43200))
+    return lambda: [predictor.prepare_data_for_timegpt(frame, sensor) for sensor in predictor.sensors]
+
+
+@case('predict_future/stub_timegpt')
+def predict_future():
+    import pandas as pd
+    from services.ml_service import TimeGPTWeatherPredictor
+    predictor = TimeGPTWeatherPredictor()
+    predictor.nixtla_client = StubNixtlaClient()
+    frame = pd.DataFrame(_history_frame())
+
+    def run():
+        # Every round forecasts from scratch instead of hitting the forecast cache
+        predictor.forecast_cache.clear()
+        return predictor.predict_future(frame, 30, engine='timegpt')
+    return run
+
+
+# SupabaseService against an in-memory client
+
+def _supabase(rows=20000):
+    from services.supabase_service import SupabaseService
+    service = SupabaseService()
+    service.supabase = FakeSupabase(sensor_rows(rows))
+    return service
+
+
+@case('supabase/get_historical_data')
+def supabase_history():
+    service = _supabase()
+    return lambda: service.get_historical_data(hours=24, limit=1000)
+
+
+@case('supabase/iter_sensor_data_chunks')
+def supabase_iter_chunks():
+    service = _supabase()
+    start = datetime.now() - timedelta(days=30)
+    return lambda: sum(len(timestamps) for timestamps, _ in service.iter_sensor_data(start, chunks=True))
+
+
+@case('supabase/get_sensor_averages')
+def supabase_averages():
+    service = _supabase()
+    return lambda: service.get_sensor_averages(hours=24 * 14)
+
+
+@case('supabase/get_data_statistics')
+def supabase_statistics():
+    service = _supabase()
+
+    def run():
+        service.stats_cache.clear()
+        return service.get_data_statistics(days=7)
+    return run
+
+
+@case('supabase/store_sensor_data_batch')
+def supabase_store_batch():
+    service = _supabase(rows=0)
+    batches = iter(range(10 ** 9))
+
+    def run():
+        # A fresh hour of readings each round, so nothing is skipped as a duplicate
+        end = datetime(2020, 1, 1) + timedelta(hours=next(batches))
+        return service.store_sensor_data_batch(sensor_rows(1000, end=end, interval=timedelta(seconds=3.6)))
+    return run
+
+
+# End to end through the Flask test client
+
+def _client():
+    import app as backend
+    backend.ml_predictor.nixtla_client = StubNixtlaClient()
+    backend.supabase_service.supabase = FakeSupabase()
+    backend.ensure_sensor_history()
+    return backend, backend.app.test_client()
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return response
+
+
+@case('api/sensors/history')
+def api_history():
+    _, client = _client()
+    return lambda: _get(client, '/api/sensors/history?days=7&limit=1000')
+
+
+@case('api/sensors/history/chart')
+def api_history_chart():
+    _, client = _client()
+    return lambda: _get(client, '/api/sensors/history?days=60&max_points=500&resolution=minmax')
+
+
+@case('api/predictions')
+def api_predictions():
+    backend, client = _client()
+
+    def run():
+        backend.ml_predictor.forecast_cache.clear()
+        return _get(client, '/api/predictions?days=30')
+    return run
+
+
+def run_case(setup, repeat):
+    """Median/min/mean seconds of the callable returned by setup"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        fn = setup()
+        fn()
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+    return {
+        'median_s': round(statistics.median(times), 6),
+        'min_s': round(min(times), 6),
+        'mean_s': round(statistics.fmean(times), 6),
+        'repeat': repeat
+    }
+
+
+def compare(results, baseline, threshold):
+    """Lines describing each case against the baseline and the names of regressions"""
+    lines, regressions = [], []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            lines.append(f"  {name:<40} {result['median_s']:>10.4f}s   (not in baseline)")
+            continue
+        ratio = result['median_s'] / max(before['median_s'], 1e-9)
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        lines.append(f"  {name:<40} {before['median_s']:>10.4f}s -> {result['median_s']:.4f}s  x{ratio:.2f}{flag}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', action='append', default=[],
+                        help='glob or substring of case names to run (repeatable)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown of the median as a fraction (default 0.25)')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(CASES))
+        return
+
+    selected = [
+        name for name in CASES
+        if not args.only or any(fnmatch.fnmatch(name, pattern) or pattern in name for pattern in args.only)
+    ]
+    results = {}
+    for name in selected:
+        setup, max_repeat = CASES[name]
+        results[name] = run_case(setup, min(args.repeat, max_repeat or args.repeat))
+        print(f"{name:<40} median {results[name]['median_s']:.4f}s  min {results[name]['min_s']:.4f}s",
+              file=sys.stderr)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline, args.threshold)
+        print(f"Compared with {args.compare} (threshold +{args.threshold:.0%}):")
+        print('\n'.join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    elif not args.save:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+-- Unique (station_id, timestamp) index on sensor_data
+--
+-- SupabaseService._insert_sensor_rows upserts with
+-- ON CONFLICT (station_id, timestamp) DO NOTHING, which Postgres rejects
+-- (error 42P10) unless this index exists. Databases created before the index
+-- was added to the schema may already hold duplicate readings, so those are
+-- removed first, keeping the earliest row of each reading.
+--
+-- Run once in the Supabase SQL editor (or psql). Safe to re-run.
+
+BEGIN;
+
+DELETE FROM sensor_data d
+USING sensor_data kept
+WHERE d.station_id = kept.station_id
+  AND d.timestamp = kept.timestamp
+  AND d.id > kept.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sensor_data_reading ON sensor_data(station_id, timestamp);
+
+-- The deleted duplicates were counted by the rollup trigger; rebuild the rollups
+DO $$
+BEGIN
+    IF to_regclass('sensor_rollups') IS NOT NULL THEN
+        TRUNCATE sensor_rollups;
+        INSERT INTO sensor_rollups (tier, bucket_start, station_id, sensor, n, sum, min, max, sum_sq)
+        SELECT t.tier, date_trunc(t.unit, d.timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', d.station_id, v.sensor,
+               COUNT(v.value), SUM(v.value), MIN(v.value), MAX(v.value), SUM(v.value * v.value)
+        FROM sensor_data d
+        CROSS JOIN (VALUES ('1h', 'hour'), ('1d', 'day')) AS t(tier, unit)
+        CROSS JOIN LATERAL (VALUES
+            ('humidity', d.humidity::FLOAT8),
+            ('temperature', d.temperature::FLOAT8),
+            ('light_intensity', d.light_intensity::FLOAT8),
+            ('rainfall', d.rainfall::FLOAT8),
+            ('wind_speed', d.wind_speed::FLOAT8),
+            ('solar_voltage', d.solar_voltage::FLOAT8),
+            ('solar_wattage', d.solar_wattage::FLOAT8),
+            ('solar_current', d.solar_current::FLOAT8)
+        ) AS v(sensor, value)
+        WHERE v.value IS NOT NULL
+        GROUP BY 1, 2, 3, 4;
+    END IF;
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+SENSORS = [
+    'humidity', 'temperature', 'light_intensity', 'rainfall',
+    'wind_speed', 'solar_voltage', 'solar_wattage', 'solar_current'
+]
+
+BUCKET_SECONDS = {'hour': 3600, 'day': 86400}
+
+
+def rows_to_columns(rows, sensors=SENSORS):
+    """Convert a page of row dicts to epoch-millisecond timestamps and float64 columns"""
+    timestamps = pd.to_datetime([row['timestamp'] for row in rows], utc=True, format='ISO8601')
+    timestamps = timestamps.as_unit('ms').asi8
+    columns = {
+        sensor: np.array([row.get(sensor) for row in rows], dtype=np.float64)
+        for sensor in sensors
+    }
+    return timestamps, columns
+
+
+class SensorAggregator:
+    """Streaming count/sum/min/max/std (and optional percentiles) per sensor
+
+    Feed it pages of columnar data with ``update``; memory stays constant
+    unless percentiles are requested, in which case the values are kept as
+    float32 to compute exact percentiles at the end. With ``bucket`` set to
+    ``'hour'`` or ``'day'`` the statistics are kept per UTC bucket.
+    """
+
+    def __init__(self, sensors=SENSORS, bucket=None, percentiles=None):
+        if bucket is not None and bucket not in BUCKET_SECONDS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        self.sensors = list(sensors)
+        self.bucket_ms = BUCKET_SECONDS[bucket] * 1000 if bucket else None
+        self.percentiles = list(percentiles or [])
+        self._buckets = {}  # bucket start (ms) -> {sensor: [count, sum, min, max, sum_sq]}
+        self._values = {}   # (bucket start, sensor) -> list of float32 arrays
+
+    def update(self, timestamps, columns):
+        """Add one page of readings (epoch-ms timestamps and per-sensor arrays)"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(timestamps) == 0:
+            return
+
+        if self.bucket_ms:
+            keys = timestamps - timestamps % self.bucket_ms
+        else:
+            keys = np.zeros(len(timestamps), dtype=np.int64)
+        bucket_keys, inverse = np.unique(keys, return_inverse=True)
+        n_buckets = len(bucket_keys)
+
+        for sensor in self.sensors:
+            values = np.asarray(columns[sensor], dtype=np.float64)
+            valid = ~np.isnan(values)
+            groups, observed = inverse[valid], values[valid]
+
+            counts = np.bincount(groups, minlength=n_buckets)
+            sums = np.bincount(groups, weights=observed, minlength=n_buckets)
+            squares = np.bincount(groups, weights=observed * observed, minlength=n_buckets)
+            lows = np.full(n_buckets, np.inf)
+            highs = np.full(n_buckets, -np.inf)
+            np.minimum.at(lows, groups, observed)
+            np.maximum.at(highs, groups, observed)
+
+            for i, key in enumerate(bucket_keys.tolist()):
+                if counts[i] == 0:
+                    continue
+                self._add(key, sensor, counts[i], sums[i], lows[i], highs[i], squares[i])
+                if self.percentiles:
+                    self._values.setdefault((key, sensor), []).append(
+                        observed[groups == i].astype(np.float32)
+                    )
+
+    def merge(self, timestamp, counts, sums, lows, highs, sums_sq):
+        """Add pre-aggregated totals (one value per sensor) for the bucket containing timestamp"""
+        if self.percentiles:
+            raise ValueError("Pre-aggregated totals cannot provide percentiles")
+        key = timestamp - timestamp % self.bucket_ms if self.bucket_ms else 0
+        for i, sensor in enumerate(self.sensors):
+            if counts[i] > 0:
+                self._add(key, sensor, counts[i], sums[i], lows[i], highs[i], sums_sq[i])
+
+    def _add(self, key, sensor, count, total, low, high, total_sq):
+        stats = self._buckets.setdefault(key, {}).setdefault(sensor, [0, 0.0, np.inf, -np.inf, 0.0])
+        stats[0] += int(count)
+        stats[1] += float(total)
+        stats[2] = min(stats[2], float(low))
+        stats[3] = max(stats[3], float(high))
+        stats[4] += float(total_sq)
+
+    def _summary(self, key, sensor, stats):
+        count, total, low, high, total_sq = stats
+        mean = total / count
+        summary = {
+            'average': round(mean, 2),
+            'min': round(low, 2),
+            'max': round(high, 2),
+            'std': round(float(np.sqrt(max(0.0, total_sq / count - mean * mean))), 2),
+            'count': count
+        }
+        if self.percentiles:
+            values = np.concatenate(self._values[(key, sensor)])
+            points = np.percentile(values, self.percentiles)
+            summary['percentiles'] = {
+                f'p{p:g}': round(float(v), 2) for p, v in zip(self.percentiles, points)
+            }
+        return summary
+
+    def result(self):
+        """{sensor: summary} without buckets, {sensor: [summary with 'bucket']} with"""
+        if not self.bucket_ms:
+            stats = self._buckets.get(0, {})
+            return {
+                sensor: self._summary(0, sensor, stats[sensor])
+                for sensor in self.sensors if sensor in stats
+            }
+
+        result = {}
+        for key in sorted(self._buckets):
+            bucket = pd.Timestamp(key, unit='ms', tz='UTC').isoformat()
+            for sensor, stats in self._buckets[key].items():
+                summary = self._summary(key, sensor, stats)
+                summary['bucket'] = bucket
+                result.setdefault(sensor, []).append(summary)
+        return result
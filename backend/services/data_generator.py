@@ -1,11 +1,203 @@
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import random
+import hashlib
 import math
+import threading
+import time
+from services.export import ChunkedExporter, records_chunks
+from services.metrics import record_generation
+from services.running_stats import RunningStats
+
+DEFAULT_STATION_ID = 'KLIMACEK_001'
+DEFAULT_LOCATION = 'Surakarta, Central Java, ID'
+WEATHER_EVENTS = ('storm', 'heat_wave', 'cold_snap', 'clear_sky')
+
+# Readings per random stream of a generated series (one week of 1-minute data)
+CHUNK_ROWS = 10080
+
+# spawn_key of the stream used for live readings and weather events
+_LIVE_STREAM = 0
+
+
+def station_key(station_id):
+    """Stable integer for a station id, the same in every process (unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(str(station_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def chunk_rng(entropy, station_id, chunk):
+    """Random stream for one chunk of one station's series
+    
+    Built as the SeedSequence child with ``spawn_key=(station, chunk)``, so
+    the stream depends only on the root entropy, the station and the
+    chunk's position, not on which process draws it or in what order.
+    """
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(station_key(station_id), chunk)))
+
+
+def _compose(outer, inner):
+    """Composition outer(inner(x)) of two maps x -> clip(slope * x + offset, low, high)
+    
+    Works on scalars or arrays of (slope, offset, low, high); slopes must be
+    positive, which keeps the composition a map of the same form.
+    """
+    a2, b2, l2, h2 = outer
+    a1, b1, l1, h1 = inner
+    # np.minimum(np.maximum(...)) rather than np.clip: same result, less overhead on short rows
+    return (
+        a2 * a1,
+        a2 * b1 + b2,
+        np.minimum(np.maximum(a2 * l1 + b2, l2), h2),
+        np.minimum(np.maximum(a2 * h1 + b2, l2), h2)
+    )
+
+
+def _clamped_recurrence(slope, offset, low, high, block=8):
+    """Prefix maps of x[t] = clip(slope[t] * x[t-1] + offset[t], low[t], high[t])
+    
+    Returns arrays ``(A, B, L, H)`` with x[t] = clip(A[t] * x0 + B[t], L[t],
+    H[t]) for any start value x0, which is what the per-reading loop
+    computes, clamp included. Time runs along the last axis; leading axes
+    are independent series evaluated together. The series is cut into
+    fixed-size blocks and maps are composed column by column inside all
+    blocks at once. The maps of whole blocks form a shorter series of the
+    same kind, which is resolved the same way to give each block its start.
+    """
+    shape = np.shape(offset)
+    n = shape[-1]
+    padded = -n % block
+    
+    def blocks(values, fill):
+        column = np.empty(shape[:-1] + (n + padded,))
+        column[..., :n] = values
+        column[..., n:] = fill
+        return np.moveaxis(column.reshape(shape[:-1] + (-1, block)), -1, 0).copy()
+    
+    # Row j holds the j-th reading of every block; padding readings are identity maps
+    a, b, lo, hi = blocks(slope, 1.0), blocks(offset, 0.0), blocks(low, -np.inf), blocks(high, np.inf)
+    for j in range(1, block):
+        a[j], b[j], lo[j], hi[j] = _compose((a[j], b[j], lo[j], hi[j]), (a[j - 1], b[j - 1], lo[j - 1], hi[j - 1]))
+    
+    if a.shape[-1] > 1:
+        # Every block after the first starts where the previous blocks leave off
+        starts = _clamped_recurrence(a[-1, ..., :-1], b[-1, ..., :-1], lo[-1, ..., :-1], hi[-1, ..., :-1], block)
+        a[..., 1:], b[..., 1:], lo[..., 1:], hi[..., 1:] = _compose(
+            (a[..., 1:], b[..., 1:], lo[..., 1:], hi[..., 1:]), starts
+        )
+    return tuple(np.moveaxis(m, 0, -1).reshape(shape[:-1] + (-1,))[..., :n] for m in (a, b, lo, hi))
+
+
+def _time_factor_arrays(hour, day_of_year):
+    """Array version of get_time_factor"""
+    daylight = np.sin((hour - 6) * math.pi / 12)
+    summer = np.sin((day_of_year - 80) * 2 * math.pi / 365)
+    
+    daily_pattern = {
+        'temperature': 0.5 + 0.4 * daylight,
+        'light_intensity': np.maximum(0, daylight),
+        'humidity': 0.7 + 0.3 * np.sin((hour - 14) * math.pi / 12),
+    }
+    seasonal_pattern = {
+        'temperature': 0.5 + 0.3 * summer,
+        'humidity': 0.6 + 0.2 * np.sin((day_of_year - 200) * 2 * math.pi / 365),
+        'light_intensity': 0.7 + 0.3 * summer,
+    }
+    return daily_pattern, seasonal_pattern
+
+
+def generate_chunk(base_values, ranges, entropy, station_id, chunk, timestamps):
+    """Draw one chunk of a station's series from its own random stream
+    
+    Module-level so it can run in a worker process. Sensors without
+    momentum come back as final values; momentum sensors come back as
+    ``(values, slope, offset, low, high)``: the prefix maps of the clamped
+    recurrence for the readings that still depend on the start value, and
+    final values after that. The start value is the end of the previous
+    chunk and is only known once the chunks are joined (see
+    ``join_chunks``).
+    """
+    rng = chunk_rng(entropy, station_id, chunk)
+    n = len(timestamps)
+    days = timestamps.astype('datetime64[D]')
+    hour = ((timestamps - days) // np.timedelta64(1, 'h')).astype(np.int64)
+    day_of_year = (days - timestamps.astype('datetime64[Y]')).astype(np.int64) + 1
+    daily_pattern, seasonal_pattern = _time_factor_arrays(hour, day_of_year)
+    
+    result = {}
+    momentum = {}  # sensor -> (slope, offset, low, high), evaluated together below
+    for sensor in base_values:
+        min_val, max_val, noise = ranges[sensor]
+        
+        if sensor == 'rainfall':
+            # Rainfall is often 0, with occasional bursts
+            burst = rng.random(n) > 0.85
+            result[sensor] = np.where(burst, rng.exponential(2.0, n), 0.0)
+        
+        elif sensor.startswith('solar_'):
+            # Solar output correlates with light, minimum at night
+            light_factor = np.maximum(0, np.sin((hour - 6) * math.pi / 12))
+            value = min_val + (max_val - min_val) * light_factor
+            value = value + rng.normal(0, noise / 4, n)
+            result[sensor] = np.where((hour < 6) | (hour > 18), min_val, value)
+        
+        else:
+            target = np.full(n, base_values[sensor])
+            if sensor in daily_pattern:
+                target *= (0.5 + 0.5 * daily_pattern[sensor])
+            if sensor in seasonal_pattern:
+                target *= (0.7 + 0.6 * seasonal_pattern[sensor])
+            
+            # Momentum smoothing, clamped every reading:
+            # x[t] = clip(0.8 * x[t-1] + 0.2 * target[t] + noise, min, max)
+            innovation = 0.2 * target + rng.normal(0, noise / 3, n)
+            
+            if sensor == 'wind_speed':
+                # Wind speed often has gusts, applied after the clamp and carried into
+                # the next reading: x[t] = gust[t] * clip(...) = clip(gust[t] * (...), ...)
+                gust = np.where(rng.random(n) > 0.9, rng.uniform(1.5, 2.5, n), 1.0)
+                momentum[sensor] = (0.8 * gust, innovation * gust, min_val * gust, max_val * gust)
+            else:
+                momentum[sensor] = (0.8, innovation, min_val, max_val)
+            result[sensor] = None
+    
+    if momentum:
+        maps = _clamped_recurrence(*(
+            np.array([np.broadcast_to(terms[i], n) for terms in momentum.values()]) for i in range(4)
+        ))
+        for row, sensor in enumerate(momentum):
+            # Once a prefix map no longer depends on the start value (its slope
+            # underflowed or it clamped to a single value) every later one doesn't
+            # either, so only the prefix before that point is kept
+            slope, offset, low, high = (m[row] for m in maps)
+            values = np.clip(offset, low, high)
+            constant = np.flatnonzero((slope == 0) | (low == high))
+            k = constant[0] if len(constant) else n
+            result[sensor] = (values, slope[:k].copy(), offset[:k].copy(), low[:k].copy(), high[:k].copy())
+    
+    return result
+
+
+def join_chunks(chunks, initial):
+    """Columns for consecutive chunks of one series, resolving momentum across chunk boundaries"""
+    columns = {}
+    for sensor in chunks[0]:
+        carry = initial[sensor]
+        parts = []
+        for chunk in chunks:
+            part = chunk[sensor]
+            if isinstance(part, tuple):
+                values, slope, offset, low, high = part
+                part = values.copy()
+                part[:len(slope)] = np.clip(slope * carry + offset, low, high)
+                carry = part[-1]
+            parts.append(part)
+        columns[sensor] = np.round(np.concatenate(parts), 2)
+    return columns
+
 
 class WeatherDataGenerator:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.base_values = {
             'humidity': 60.0,
             'temperature': 25.0,
@@ -39,8 +231,14 @@ class WeatherDataGenerator:
             'solar_current': 'A'
         }
         
-        # For realistic daily/seasonal patterns
-        self.previous_values = self.base_values.copy()
+        # Root of every random stream; a fresh seed is recorded so a run can be reproduced
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(_LIVE_STREAM,)))
+        
+        # Per-station previous values for generate_station_readings: one row per station
+        self.station_index = {}
+        self.station_values = np.empty((0, len(self.base_values)))
+        self._lock = threading.Lock()
     
     def get_time_factor(self, timestamp=None):
         """Calculate time-based factors for realistic weather patterns"""
@@ -69,8 +267,8 @@ class WeatherDataGenerator:
         
         return daily_pattern, seasonal_pattern
     
-    def generate_realistic_value(self, sensor, timestamp=None):
-        """Generate realistic sensor value based on time patterns"""
+    def generate_realistic_value(self, sensor, timestamp=None, previous=None):
+        """Generate realistic sensor value based on time patterns, smoothed towards ``previous``"""
         min_val, max_val, noise = self.ranges[sensor]
         daily_pattern, seasonal_pattern = self.get_time_factor(timestamp)
         
@@ -86,12 +284,12 @@ class WeatherDataGenerator:
             base *= (0.7 + 0.6 * seasonal_pattern[sensor])
         
         # Add smooth transition from previous value (temporal correlation)
-        if sensor in self.previous_values:
+        if previous is not None:
             momentum = 0.8
-            base = momentum * self.previous_values[sensor] + (1 - momentum) * base
+            base = momentum * previous + (1 - momentum) * base
         
         # Add realistic noise
-        noise_factor = np.random.normal(0, noise / 3)
+        noise_factor = self.rng.normal(0, noise / 3)
         value = base + noise_factor
         
         # Ensure within realistic bounds
@@ -100,15 +298,15 @@ class WeatherDataGenerator:
         # Special cases for certain sensors
         if sensor == 'rainfall':
             # Rainfall is often 0, with occasional bursts
-            if random.random() > 0.85:  # 15% chance of rain
-                value = random.expovariate(0.5)  # Use expovariate instead of exponential
+            if self.rng.random() > 0.85:  # 15% chance of rain
+                value = self.rng.exponential(2.0)
             else:
                 value = 0.0
         
         elif sensor == 'wind_speed':
             # Wind speed is always positive and often has gusts
-            if random.random() > 0.9:  # 10% chance of gusts
-                value *= random.uniform(1.5, 2.5)
+            if self.rng.random() > 0.9:  # 10% chance of gusts
+                value *= self.rng.uniform(1.5, 2.5)
             value = max(0, value)
         
         elif sensor.startswith('solar_'):
@@ -120,38 +318,111 @@ class WeatherDataGenerator:
                 # Solar output correlates with light
                 light_factor = max(0, math.sin((hour - 6) * math.pi / 12))
                 value = min_val + (max_val - min_val) * light_factor
-                value += np.random.normal(0, noise / 4)  # Less noise for solar
-        
-        # Store for next iteration
-        self.previous_values[sensor] = value
+                value += self.rng.normal(0, noise / 4)  # Less noise for solar
         
         return round(value, 2)
     
-    def generate_current_reading(self, timestamp=None):
-        """Generate current sensor reading"""
+    def generate_current_reading(self, timestamp=None, station_id=DEFAULT_STATION_ID):
+        """Generate current sensor reading, continuing the station's momentum state"""
         if timestamp is None:
             timestamp = datetime.now()
         
-        reading = {
-            'timestamp': timestamp.isoformat(),
-            'humidity': self.generate_realistic_value('humidity', timestamp),
-            'temperature': self.generate_realistic_value('temperature', timestamp),
-            'light_intensity': self.generate_realistic_value('light_intensity', timestamp),
-            'rainfall': self.generate_realistic_value('rainfall', timestamp),
-            'wind_speed': self.generate_realistic_value('wind_speed', timestamp),
-            'solar_voltage': self.generate_realistic_value('solar_voltage', timestamp),
-            'solar_wattage': self.generate_realistic_value('solar_wattage', timestamp),
-            'solar_current': self.generate_realistic_value('solar_current', timestamp)
+        columns = self.generate_station_readings([station_id], timestamp)
+        reading = self.columns_to_records(columns)[0]
+        reading['timestamp'] = timestamp.isoformat()
+        return reading
+    
+    def generate_station_readings(self, station_ids, timestamp=None, sensors=None):
+        """Generate one reading for each station in a single vectorized step
+        
+        Each station keeps its own momentum state, so stations evolve
+        independently. Returns columns like ``generate_columns`` plus a
+        ``station_id`` array, one row per station; with ``sensors`` only
+        those sensors are sampled.
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+        started = time.perf_counter()
+        station_ids = list(station_ids)
+        daily_pattern, seasonal_pattern = self.get_time_factor(timestamp)
+        hour = timestamp.hour
+        with self._lock:
+            rows = self._station_rows(station_ids)
+            columns = self._station_tick(station_ids, rows, timestamp, hour, daily_pattern, seasonal_pattern, sensors)
+        record_generation('live', len(station_ids), time.perf_counter() - started)
+        return columns
+    
+    def _station_tick(self, station_ids, rows, timestamp, hour, daily_pattern, seasonal_pattern, sensors):
+        n = len(rows)
+        rng = self.rng
+        previous = self.station_values[rows]
+        columns = {
+            'station_id': np.array(station_ids, dtype=object),
+            'timestamp': np.full(n, np.datetime64(timestamp, 'us'))
         }
         
-        # Add metadata
-        reading['location'] = 'Surakarta, Central Java, ID'
-        reading['station_id'] = 'KLIMACEK_001'
+        for j, sensor in enumerate(self.base_values):
+            if sensors is not None and sensor not in sensors:
+                continue
+            min_val, max_val, noise = self.ranges[sensor]
+            
+            if sensor == 'rainfall':
+                burst = rng.random(n) > 0.85
+                value = np.where(burst, rng.exponential(2.0, n), 0.0)
+            
+            elif sensor.startswith('solar_'):
+                if hour < 6 or hour > 18:
+                    value = np.full(n, float(min_val))
+                else:
+                    light_factor = max(0, math.sin((hour - 6) * math.pi / 12))
+                    value = min_val + (max_val - min_val) * light_factor + rng.normal(0, noise / 4, n)
+            
+            else:
+                base = self.base_values[sensor]
+                if sensor in daily_pattern:
+                    base *= (0.5 + 0.5 * daily_pattern[sensor])
+                if sensor in seasonal_pattern:
+                    base *= (0.7 + 0.6 * seasonal_pattern[sensor])
+                value = 0.8 * previous[:, j] + 0.2 * base + rng.normal(0, noise / 3, n)
+                value = np.clip(value, min_val, max_val)
+                if sensor == 'wind_speed':
+                    gust = rng.random(n) > 0.9
+                    value = np.where(gust, value * rng.uniform(1.5, 2.5, n), value)
+            
+            self.station_values[rows, j] = value
+            columns[sensor] = np.round(value, 2)
+        
+        return columns
+    
+    def seed_station(self, station_id, values):
+        """Set the momentum state of a station, e.g. from the last backfilled reading"""
+        with self._lock:
+            row = self._station_rows([station_id])[0]
+            for j, sensor in enumerate(self.base_values):
+                if sensor in values:
+                    self.station_values[row, j] = float(np.asarray(values[sensor]).reshape(-1)[-1])
+    
+    def _station_rows(self, station_ids):
+        """Rows of station_values for the given stations, adding new ones at base values"""
+        new = [sid for sid in dict.fromkeys(station_ids) if sid not in self.station_index]
+        if new:
+            start = len(self.station_values)
+            self.station_index.update({sid: start + i for i, sid in enumerate(new)})
+            base = np.array(list(self.base_values.values()))
+            self.station_values = np.vstack([self.station_values, np.tile(base, (len(new), 1))])
+        return np.array([self.station_index[sid] for sid in station_ids], dtype=np.int64)
+    
+    def generate_historical_data(self, days=7, limit=1000, station_id=DEFAULT_STATION_ID):
+        """Generate historical weather data
         
-        return reading
+        Building the reading dicts costs far more than generating the values;
+        use ``generate_historical_columns`` where arrays will do.
+        """
+        columns = self.generate_historical_columns(days=days, limit=limit, station_id=station_id)
+        return self.columns_to_records(columns, station_id=station_id)
     
-    def generate_historical_data(self, days=7, limit=1000):
-        """Generate historical weather data"""
+    def generate_historical_columns(self, days=7, limit=1000, station_id=DEFAULT_STATION_ID):
+        """Generate historical weather data as columnar NumPy arrays"""
         end_time = datetime.now()
         start_time = end_time - timedelta(days=days)
         
@@ -159,66 +430,190 @@ class WeatherDataGenerator:
         total_minutes = days * 24 * 60
         interval_minutes = max(1, total_minutes // limit)
         
-        historical_data = []
-        current_time = start_time
-        
-        while current_time <= end_time and len(historical_data) < limit:
-            reading = self.generate_current_reading(current_time)
-            historical_data.append(reading)
-            current_time += timedelta(minutes=interval_minutes)
+        count = min(limit, int(total_minutes // interval_minutes) + 1)
+        timestamps = np.datetime64(start_time, 'us') + \
+            np.arange(count) * np.timedelta64(interval_minutes, 'm')
         
-        return historical_data
+        return self.generate_columns(timestamps, station_id=station_id)
     
-    def generate_batch_data(self, start_time, end_time, interval_minutes=1):
+    def generate_batch_data(self, start_time, end_time, interval_minutes=1, station_id=DEFAULT_STATION_ID):
         """Generate data for a specific time range"""
-        data = []
-        current_time = start_time
+        timestamps = np.arange(
+            np.datetime64(start_time, 'us'),
+            np.datetime64(end_time, 'us') + np.timedelta64(1, 'us'),
+            np.timedelta64(interval_minutes, 'm')
+        )
+        return self.columns_to_records(self.generate_columns(timestamps, station_id=station_id), station_id=station_id)
+    
+    def generate_columns(self, timestamps, station_id=DEFAULT_STATION_ID, initial=None,
+                         workers=1, chunk_rows=CHUNK_ROWS):
+        """Generate readings for an array of timestamps as whole-array operations
+        
+        Returns a dict with a ``timestamp`` datetime64 array and one float64
+        array per sensor. The output follows the same distribution as
+        repeated ``generate_current_reading`` calls: the momentum smoothing,
+        clamped to the sensor range at every reading (with wind gusts applied
+        after the clamp and carried into the next reading), is evaluated as a
+        composition of clamped affine maps over the whole series instead of
+        one reading at a time, starting from ``initial`` ({sensor: value},
+        base values by default).
         
-        while current_time <= end_time:
-            reading = self.generate_current_reading(current_time)
-            data.append(reading)
-            current_time += timedelta(minutes=interval_minutes)
+        Every ``chunk_rows`` readings draw from their own random stream keyed
+        by the generator seed, the station and the chunk's position, so the
+        result depends only on those and not on ``workers``. No generator
+        state is changed.
+        """
+        return self.generate_dataset([station_id], timestamps, initial=initial, workers=workers,
+                                     chunk_rows=chunk_rows)[station_id]
+    
+    def generate_dataset(self, station_ids, timestamps, initial=None, workers=None, chunk_rows=CHUNK_ROWS):
+        """Generate the same timestamps for many stations, optionally in a process pool
+        
+        Chunks of every station are spread over ``workers`` processes (the
+        CPU count when None, in-process when 1); see ``generate_columns``.
+        Returns ``{station_id: columns}``; the output is bit-identical for
+        any number of workers.
+        """
+        started = time.perf_counter()
+        timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+        initial = {**self.base_values, **(initial or {})}
+        starts = range(0, len(timestamps), chunk_rows)
+        tasks = [
+            (self.base_values, self.ranges, self.seed, station_id, chunk, timestamps[start:start + chunk_rows])
+            for station_id in station_ids
+            for chunk, start in enumerate(starts)
+        ]
+        
+        if workers == 1 or len(tasks) <= 1:
+            results = [generate_chunk(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(generate_chunk, *zip(*tasks)))
+        
+        dataset = {}
+        for i, station_id in enumerate(station_ids):
+            columns = {'timestamp': timestamps}
+            chunks = results[i * len(starts):(i + 1) * len(starts)]
+            if chunks:
+                columns.update(join_chunks(chunks, initial))
+            else:
+                columns.update({sensor: np.empty(0) for sensor in self.base_values})
+            dataset[station_id] = columns
+        record_generation('history', len(timestamps) * len(station_ids), time.perf_counter() - started)
+        return dataset
+    
+    @staticmethod
+    def columns_to_records(columns, station_id=DEFAULT_STATION_ID):
+        """Convert columnar data to the list-of-dicts reading format
+        
+        A ``station_id`` column, if present, takes precedence over the
+        ``station_id`` argument.
+        """
+        timestamps = np.datetime_as_string(columns['timestamp'], unit='us').tolist()
+        sensors = [key for key in columns if key not in ('timestamp', 'station_id')]
+        values = [columns[sensor].tolist() for sensor in sensors]
+        stations = columns['station_id'].tolist() if 'station_id' in columns else [station_id] * len(timestamps)
+        
+        records = []
+        for i, timestamp in enumerate(timestamps):
+            reading = {'timestamp': timestamp}
+            for sensor, column in zip(sensors, values):
+                reading[sensor] = column[i]
+            reading['location'] = DEFAULT_LOCATION
+            reading['station_id'] = stations[i]
+            records.append(reading)
         
-        return data
+        return records
     
-    def add_weather_events(self, data):
+    def add_weather_events(self, data, rng=None):
         """Add realistic weather events to the data"""
         # Add storms, heat waves, cold snaps, etc.
+        # 5% chance of a weather event; only the chosen readings become columns
+        rng = rng or self.rng
+        rows = np.flatnonzero(rng.random(len(data)) < 0.05).tolist()
+        chosen = [data[row] for row in rows]
+        sensors = [sensor for sensor in self.base_values if chosen and sensor in chosen[0]]
+        columns = {sensor: np.array([reading[sensor] for reading in chosen], dtype=np.float64) for sensor in sensors}
+        columns, table = self.add_weather_event_columns(columns, probability=1.0, rng=rng)
+        
         events = []
+        for i, code in enumerate(table['type'].tolist()):
+            reading = chosen[i]
+            for sensor in sensors:
+                reading[sensor] = float(columns[sensor][i])
+            event_type = WEATHER_EVENTS[code]
+            events.append({
+                'timestamp': datetime.fromisoformat(reading['timestamp']).isoformat(),
+                'type': event_type,
+                'description': f"Weather event: {event_type.replace('_', ' ').title()}"
+            })
+        
+        return data, events
+    
+    def add_weather_event_columns(self, columns, probability=0.05, rng=None):
+        """Add weather events to columnar data as whole-array operations
+        
+        Event rows and event types are drawn for the whole series at once and
+        each event type adjusts its rows with one clipped array operation per
+        sensor present. Sensor columns are updated in place (converted to float64
+        first if needed). Draws come from ``rng`` (the generator's own stream
+        by default). Returns ``(columns, events)`` where ``events`` is a
+        table of ``row`` indices, ``type`` codes into ``WEATHER_EVENTS`` and,
+        when the columns have them, ``timestamp`` and ``station_id``.
+        """
+        for sensor in self.base_values:
+            if sensor in columns:
+                columns[sensor] = np.asarray(columns[sensor], dtype=np.float64)
+        n = len(next(iter(columns.values()))) if columns else 0
+        
+        # 5% chance of a weather event per reading
+        rng = rng or self.rng
+        rows = np.flatnonzero(rng.random(n) < probability)
+        types = rng.integers(0, len(WEATHER_EVENTS), len(rows)).astype(np.int8)
+        
+        def shift(sensor, rows, low, high, limit):
+            """Add (or subtract, with a negative range) a uniform amount, stopping at limit"""
+            if sensor not in columns:
+                return
+            change = rng.uniform(low, high, len(rows))
+            bound = np.minimum if high > 0 else np.maximum
+            columns[sensor][rows] = bound(limit, columns[sensor][rows] + change)
         
-        for i, reading in enumerate(data):
-            timestamp = datetime.fromisoformat(reading['timestamp'])
+        def scale(sensor, rows, factor, limit):
+            if sensor not in columns:
+                return
+            bound = np.minimum if factor > 1 else np.maximum
+            columns[sensor][rows] = bound(limit, columns[sensor][rows] * factor)
+        
+        for code, event_type in enumerate(WEATHER_EVENTS):
+            event_rows = rows[types == code]
+            if len(event_rows) == 0:
+                continue
+            
+            if event_type == 'storm':
+                shift('rainfall', event_rows, 5, 12, 15)
+                shift('wind_speed', event_rows, 8, 15, 25)
+                shift('humidity', event_rows, 10, 20, 95)
+                scale('light_intensity', event_rows, 0.3, 0)
+            
+            elif event_type == 'heat_wave':
+                shift('temperature', event_rows, 5, 10, 40)
+                shift('humidity', event_rows, -20, -10, 20)
+                scale('light_intensity', event_rows, 1.2, 1200)
             
-            # Simulate weather events
-            if random.random() < 0.05:  # 5% chance of weather event
-                event_type = random.choice(['storm', 'heat_wave', 'cold_snap', 'clear_sky'])
-                
-                if event_type == 'storm':
-                    reading['rainfall'] = min(15, reading['rainfall'] + random.uniform(5, 12))
-                    reading['wind_speed'] = min(25, reading['wind_speed'] + random.uniform(8, 15))
-                    reading['humidity'] = min(95, reading['humidity'] + random.uniform(10, 20))
-                    reading['light_intensity'] = max(0, reading['light_intensity'] * 0.3)
-                    
-                elif event_type == 'heat_wave':
-                    reading['temperature'] = min(40, reading['temperature'] + random.uniform(5, 10))
-                    reading['humidity'] = max(20, reading['humidity'] - random.uniform(10, 20))
-                    reading['light_intensity'] = min(1200, reading['light_intensity'] * 1.2)
-                    
-                elif event_type == 'cold_snap':
-                    reading['temperature'] = max(15, reading['temperature'] - random.uniform(5, 8))
-                    reading['wind_speed'] = min(25, reading['wind_speed'] + random.uniform(3, 8))
-                    
-                elif event_type == 'clear_sky':
-                    reading['light_intensity'] = min(1200, reading['light_intensity'] * 1.3)
-                    reading['solar_wattage'] = min(100, reading['solar_wattage'] * 1.2)
-                
-                events.append({
-                    'timestamp': timestamp.isoformat(),
-                    'type': event_type,
-                    'description': f"Weather event: {event_type.replace('_', ' ').title()}"
-                })
+            elif event_type == 'cold_snap':
+                shift('temperature', event_rows, -8, -5, 15)
+                shift('wind_speed', event_rows, 3, 8, 25)
+            
+            elif event_type == 'clear_sky':
+                scale('light_intensity', event_rows, 1.3, 1200)
+                scale('solar_wattage', event_rows, 1.2, 100)
         
-        return data, events
+        events = {'row': rows, 'type': types}
+        for key in ('timestamp', 'station_id'):
+            if key in columns:
+                events[key] = np.asarray(columns[key])[rows]
+        return columns, events
     
     def get_sensor_info(self):
         """Get information about all sensors"""
@@ -247,24 +642,31 @@ class WeatherDataGenerator:
         return descriptions.get(sensor, 'Weather sensor measurement')
     
     def export_to_csv(self, data, filename):
-        """Export data to CSV file"""
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
+        """Export data to CSV file, written in chunks"""
+        exporter = ChunkedExporter('csv', self.base_values)
+        with open(filename, 'wb') as f:
+            for piece in exporter.stream(records_chunks(data, DEFAULT_STATION_ID)):
+                f.write(piece)
         return filename
     
     def get_statistics(self, data):
         """Calculate statistics for the generated data"""
-        df = pd.DataFrame(data)
+        sensors = [sensor for sensor in self.base_values if data and sensor in data[0]]
+        running = RunningStats(sensors, self.ranges)
+        running.update_columns({
+            sensor: np.array([reading.get(sensor) for reading in data], dtype=np.float64)
+            for sensor in sensors
+        })
         
         stats = {}
-        for sensor in self.base_values.keys():
-            if sensor in df.columns:
+        for sensor, summary in running.summary(quantiles=()).items():
+            if summary['count']:
                 stats[sensor] = {
-                    'mean': round(df[sensor].mean(), 2),
-                    'min': round(df[sensor].min(), 2),
-                    'max': round(df[sensor].max(), 2),
-                    'std': round(df[sensor].std(), 2),
+                    'mean': round(summary['mean'], 2),
+                    'min': round(summary['min'], 2),
+                    'max': round(summary['max'], 2),
+                    'std': round(summary['std'], 2),
                     'unit': self.units[sensor]
                 }
         
-        return stats
\ No newline at end of file
+        return stats
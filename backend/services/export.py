@@ -0,0 +1,173 @@
+import io
+import zlib
+import numpy as np
+import pandas as pd
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow')
+}
+
+
+def slice_chunks(window, station_id, chunk_rows=10000):
+    """Export chunks over a TimeSeriesSlice, as views into the ring where possible"""
+    for timestamps, values in window.segments:
+        for start in range(0, len(timestamps), chunk_rows):
+            stop = start + chunk_rows
+            chunk = {
+                'timestamp': timestamps[start:stop].astype('datetime64[ms]'),
+                'station_id': np.full(len(timestamps[start:stop]), station_id, dtype=object)
+            }
+            chunk.update({sensor: values[sensor][start:stop] for sensor in window.sensors})
+            yield chunk
+
+
+def page_chunks(pages, station_id):
+    """Export chunks over ``iter_sensor_data(..., chunks=True)`` pages"""
+    for timestamps, columns in pages:
+        chunk = {
+            'timestamp': np.asarray(timestamps, dtype=np.int64).astype('datetime64[ms]'),
+            'station_id': np.full(len(timestamps), station_id, dtype=object)
+        }
+        chunk.update(columns)
+        yield chunk
+
+
+def records_chunks(records, station_id=None, chunk_rows=10000):
+    """Export chunks over a list of reading dicts (``station_id`` fills in a missing one)"""
+    for start in range(0, len(records), chunk_rows):
+        frame = pd.DataFrame.from_records(records[start:start + chunk_rows])
+        if 'station_id' not in frame:
+            frame['station_id'] = station_id
+        chunk = {'timestamp': pd.to_datetime(frame.pop('timestamp'), format='ISO8601').values.astype('datetime64[ms]')}
+        chunk.update({column: frame[column].values for column in frame.columns if column != 'location'})
+        yield chunk
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet and Arrow exports need the pyarrow package")
+    return pyarrow
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file object whose contents are taken out as they are written"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+class ChunkedExporter:
+    """Encode a stream of columnar chunks as CSV, gzip CSV, Parquet or Arrow IPC
+
+    Each chunk is ``{'timestamp': datetime64 array, 'station_id': array,
+    sensor: array, ...}``. Chunks are encoded one at a time and their bytes
+    handed on straight away, so memory stays bounded by the chunk size: a
+    Parquet chunk becomes one row group and an Arrow chunk one record
+    batch. Availability of the format is checked on construction, before
+    anything is streamed.
+    """
+
+    def __init__(self, fmt, sensors, precision=2):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.format = fmt
+        self.sensors = list(sensors)
+        self.precision = precision
+        self.columns = ['timestamp', 'station_id'] + self.sensors
+        self.pa = _pyarrow() if fmt in ('parquet', 'arrow') else None
+
+    @property
+    def mimetype(self):
+        return EXPORT_FORMATS[self.format][0]
+
+    def filename(self, stem):
+        return f"{stem}.{EXPORT_FORMATS[self.format][1]}"
+
+    def stream(self, chunks):
+        """Generator of encoded bytes for an iterable of chunks"""
+        if self.format == 'csv':
+            return self._csv(chunks)
+        if self.format == 'csv.gz':
+            return self._gzip(self._csv(chunks))
+        return self._arrow(chunks)
+
+    def _frame(self, chunk):
+        frame = pd.DataFrame({
+            'timestamp': np.datetime_as_string(np.asarray(chunk['timestamp'], dtype='datetime64[ms]'))
+        })
+        frame['station_id'] = chunk['station_id']
+        for sensor in self.sensors:
+            frame[sensor] = self._values(chunk, sensor)
+        return frame
+
+    def _values(self, chunk, sensor):
+        return np.round(np.asarray(chunk[sensor], dtype=np.float64), self.precision)
+
+    def _csv(self, chunks):
+        yield (','.join(self.columns) + '\n').encode('utf-8')
+        for chunk in chunks:
+            if len(chunk['timestamp']):
+                yield self._frame(chunk).to_csv(header=False, index=False).encode('utf-8')
+
+    @staticmethod
+    def _gzip(pieces):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for piece in pieces:
+            data = compressor.compress(piece)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def _arrow(self, chunks):
+        pa = self.pa
+        schema = pa.schema(
+            [('timestamp', pa.timestamp('ms')), ('station_id', pa.string())] +
+            [(sensor, pa.float64()) for sensor in self.sensors]
+        )
+        sink = _Drain()
+        if self.format == 'parquet':
+            writer = pa.parquet.ParquetWriter(sink, schema, compression='snappy')
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        for chunk in chunks:
+            if not len(chunk['timestamp']):
+                continue
+            arrays = [
+                pa.array(np.asarray(chunk['timestamp'], dtype='datetime64[ms]')),
+                pa.array(chunk['station_id'], type=pa.string())
+            ] + [pa.array(self._values(chunk, sensor)) for sensor in self.sensors]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            writer.write_batch(batch)
+            data = sink.take()
+            if data:
+                yield data
+
+        writer.close()
+        yield sink.take()
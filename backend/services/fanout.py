@@ -0,0 +1,144 @@
+import threading
+
+
+class SensorFanout:
+    """Delta-encoded sensor frames for clients grouped by identical subscriptions
+
+    Clients that follow the same sensors of the same station share a
+    Socket.IO room, so each tick produces one payload per group (encoded
+    once by the Socket.IO manager and reused for every member). A frame
+    carries only the values that changed since the group's previous frame;
+    every ``keyframe_interval`` ticks a full keyframe is sent instead. Frames
+    are numbered per group so clients can spot a gap and ask for a keyframe.
+    """
+
+    def __init__(self, keyframe_interval=10):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._groups = {}   # room -> group state
+        self._members = {}  # client sid -> set of rooms
+        self._lock = threading.Lock()
+        self.frames_sent = 0
+        self.keyframes_sent = 0
+        self.deliveries = 0
+
+    @staticmethod
+    def room(station_id, sensors):
+        return f"station:{station_id}:sensors:{','.join(sorted(sensors))}"
+
+    def subscribe(self, sid, station_id, sensors):
+        """Add a client to the group for these sensors
+
+        Any earlier subscription of the client to the same station is
+        replaced. Returns ``(room, keyframe or None, rooms left)``; the
+        keyframe brings the new member up to the group's state.
+        """
+        sensors = tuple(sorted(set(sensors)))
+        room = self.room(station_id, sensors)
+        with self._lock:
+            left = [
+                r for r in self._members.get(sid, ())
+                if self._groups[r]['station_id'] == station_id and r != room
+            ]
+            for old in left:
+                self._leave(sid, old)
+            group = self._groups.setdefault(room, {
+                'station_id': station_id,
+                'sensors': sensors,
+                'values': {},
+                'timestamp': None,
+                'seq': 0,
+                'ticks': 0,
+                'members': set()
+            })
+            group['members'].add(sid)
+            self._members.setdefault(sid, set()).add(room)
+            return room, self._keyframe(group), left
+
+    def unsubscribe(self, sid, station_id=None):
+        """Remove a client from its groups (of one station, or all); returns the rooms left"""
+        with self._lock:
+            rooms = [
+                room for room in self._members.get(sid, ())
+                if station_id is None or self._groups[room]['station_id'] == station_id
+            ]
+            for room in rooms:
+                self._leave(sid, room)
+            return rooms
+
+    def keyframe(self, sid, station_id):
+        """Current full state of the client's group for a station, or None"""
+        with self._lock:
+            for room in self._members.get(sid, ()):
+                if self._groups[room]['station_id'] == station_id:
+                    return self._keyframe(self._groups[room])
+        return None
+
+    def frames(self, readings):
+        """(room, payload) pairs for one tick of readings (one dict per station)"""
+        by_station = {reading['station_id']: reading for reading in readings}
+        frames = []
+        with self._lock:
+            for room, group in self._groups.items():
+                reading = by_station.get(group['station_id'])
+                if reading is None:
+                    continue
+
+                current = {sensor: reading.get(sensor) for sensor in group['sensors']}
+                keyframe = group['ticks'] % self.keyframe_interval == 0
+                group['ticks'] += 1
+                changed = current if keyframe else {
+                    sensor: value for sensor, value in current.items()
+                    if group['values'].get(sensor) != value
+                }
+                group['values'] = current
+                group['timestamp'] = reading['timestamp']
+                if not changed:
+                    continue
+
+                group['seq'] += 1
+                frames.append((room, self._frame(group, changed, keyframe)))
+                self.frames_sent += 1
+                self.keyframes_sent += keyframe
+                self.deliveries += len(group['members'])
+        return frames
+
+    def group_size(self, room):
+        """Number of clients in a subscription group"""
+        with self._lock:
+            group = self._groups.get(room)
+            return len(group['members']) if group else 0
+
+    def _frame(self, group, values, keyframe):
+        return {
+            'station_id': group['station_id'],
+            'seq': group['seq'],
+            'keyframe': keyframe,
+            'timestamp': group['timestamp'],
+            'values': values
+        }
+
+    def _keyframe(self, group):
+        if group['timestamp'] is None:
+            return None
+        return self._frame(group, dict(group['values']), True)
+
+    def _leave(self, sid, room):
+        self._members.get(sid, set()).discard(room)
+        if not self._members.get(sid):
+            self._members.pop(sid, None)
+        group = self._groups.get(room)
+        if group is not None:
+            group['members'].discard(sid)
+            if not group['members']:
+                del self._groups[room]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'groups': len(self._groups),
+                'clients': len(self._members),
+                'keyframe_interval': self.keyframe_interval,
+                'frames_sent': self.frames_sent,
+                'keyframes_sent': self.keyframes_sent,
+                'deliveries': self.deliveries
+            }
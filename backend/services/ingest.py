@@ -0,0 +1,216 @@
+import json
+import re
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+INVALID_POLICIES = ('null', 'reject')
+
+# A time of day followed by 'Z' or a UTC offset, e.g. '12:00:00+07:00'
+_UTC_OFFSET = re.compile(r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$', re.IGNORECASE)
+
+
+def decode_ndjson(body):
+    """List of reading dicts from newline-delimited JSON, parsed in one call"""
+    lines = [line for line in body.split(b'\n') if line.strip()]
+    if not lines:
+        return []
+    try:
+        return json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        # Report the first bad line instead of a position in the joined document
+        for number, line in enumerate(lines, 1):
+            try:
+                json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {number}: {e}")
+        raise
+
+
+def decode_msgpack(body):
+    """List of reading dicts from a msgpack array of maps or a stream of maps"""
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError("msgpack payloads need the msgpack package")
+
+    readings = []
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(body)
+    for item in unpacker:
+        if isinstance(item, list):
+            readings.extend(item)
+        else:
+            readings.append(item)
+    return readings
+
+
+def utc_to_local_ms(ms):
+    """Server-local wall-clock milliseconds for UTC epoch milliseconds"""
+    utc = pd.DatetimeIndex(np.asarray(ms, dtype='datetime64[ms]'), tz='UTC')
+    return utc.tz_convert(tzlocal()).tz_localize(None).as_unit('ms').asi8
+
+
+def parse_timestamps(values):
+    """Milliseconds on the stores' clock from ISO strings or epoch seconds/milliseconds; -1 where invalid
+
+    The stores hold naive server-local time, as written by ``datetime.now()``.
+    Naive ISO strings are taken to be in it; strings with 'Z' or an offset,
+    and epoch numbers (always UTC), are converted to it.
+    """
+    try:
+        numeric = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        numeric = None
+
+    if numeric is not None:
+        valid = np.isfinite(numeric)
+        # Values this large are already milliseconds
+        ms = np.where(numeric > 1e11, numeric, numeric * 1000)
+        ms = np.where(valid, ms, 0).astype(np.int64)
+        return np.where(valid, utc_to_local_ms(ms), -1)
+
+    strings = pd.Series(values, dtype=object)
+    parsed = pd.to_datetime(strings, utc=True, format='ISO8601', errors='coerce')
+    valid = parsed.notna().values
+    ms = np.where(valid, parsed.dt.tz_convert(None).values.astype('datetime64[ms]').astype(np.int64), 0)
+    aware = strings.str.strip().str.contains(_UTC_OFFSET, na=False).values
+    return np.where(valid, np.where(aware, utc_to_local_ms(ms), ms), -1)
+
+
+class ReadingIngestor:
+    """Validate, deduplicate and store batches of readings pushed by stations
+
+    Every step works on whole columns: readings become one array per field,
+    out-of-range values are found with array comparisons against
+    ``ranges`` ({sensor: (min, max, ...)}), and duplicates of
+    ``(station_id, timestamp)`` are removed after a single lexsort.
+    ``ensure_station(station_id)`` returns a station ready for live
+    readings (the app backfills it first); its ``lock`` is held while
+    readings are appended, as for the sampled readings.
+    """
+
+    def __init__(self, stations, ranges, store_rows=None, ensure_station=None):
+        self.stations = stations
+        self.sensors = stations.sensors
+        self.ranges = ranges
+        self.store_rows = store_rows
+        self.ensure_station = ensure_station or stations.get
+        self.batches = 0
+        self.received = 0
+        self.accepted = 0
+
+    def ingest(self, readings, invalid='null', default_station=None):
+        """Store a batch of reading dicts and return a summary of what was kept
+
+        With ``invalid='null'`` out-of-range values are stored as missing;
+        with ``'reject'`` the whole reading is dropped. Readings newer than a
+        station's store are appended to it; every accepted reading is passed
+        to ``store_rows`` for the database.
+        """
+        if invalid not in INVALID_POLICIES:
+            raise ValueError(f"Unknown invalid-value policy: {invalid}")
+        readings = [reading for reading in readings if isinstance(reading, dict)]
+        for reading in readings:
+            station_id = reading.get('station_id')
+            if station_id is not None and not isinstance(station_id, str):
+                raise ValueError(f"station_id must be a string, got {type(station_id).__name__}")
+        n = len(readings)
+        summary = {
+            'received': n,
+            'accepted': 0,
+            'duplicates': 0,
+            'invalid_readings': 0,
+            'invalid_values': {},
+            'unknown_stations': [],
+            'recorded_live': 0
+        }
+        self.batches += 1
+        self.received += n
+        if n == 0:
+            return summary
+
+        default_station = default_station or self.stations.default_station
+        station_ids = np.array([r.get('station_id') or default_station for r in readings], dtype=object)
+        timestamps = parse_timestamps([r.get('timestamp') for r in readings])
+        values = {
+            sensor: np.array([r.get(sensor) for r in readings], dtype=np.float64)
+            for sensor in self.sensors
+        }
+
+        # Range checks
+        keep = timestamps >= 0
+        unknown = sorted(set(station_ids.tolist()) - set(self.stations.station_ids))
+        if unknown:
+            keep &= ~np.isin(station_ids, unknown)
+            summary['unknown_stations'] = unknown
+        for sensor, column in values.items():
+            low, high = self.ranges[sensor][:2]
+            bad = (column < low) | (column > high)
+            if bad.any():
+                summary['invalid_values'][sensor] = int(bad.sum())
+                if invalid == 'reject':
+                    keep &= ~bad
+                else:
+                    column[bad] = np.nan
+        summary['invalid_readings'] = int(n - keep.sum())
+
+        # Sort by (station, timestamp) and keep the first of each duplicate key
+        rows = np.flatnonzero(keep)
+        _, station_index = np.unique(station_ids[rows], return_inverse=True)
+        order = np.lexsort((timestamps[rows], station_index))
+        rows, station_index = rows[order], station_index[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (station_index[1:] != station_index[:-1]) | \
+            (timestamps[rows][1:] != timestamps[rows][:-1])
+        summary['duplicates'] = int((~first).sum())
+        rows, station_index = rows[first], station_index[first]
+        summary['accepted'] = len(rows)
+        self.accepted += len(rows)
+
+        # One pass per station: append what is newer than its store, collect everything for the database
+        records = []
+        bounds = np.flatnonzero(np.diff(station_index)) + 1
+        for group in (np.split(rows, bounds) if len(rows) else []):
+            station = self.ensure_station(station_ids[group[0]])
+            columns = {'timestamp': timestamps[group].astype('datetime64[ms]')}
+            columns.update({sensor: values[sensor][group] for sensor in self.sensors})
+            if self.store_rows is not None:
+                records.extend(self._records(station.station_id, columns))
+
+            with station.lock:
+                latest = station.buffer.latest_timestamp
+                start = 0 if latest is None else int(np.searchsorted(timestamps[group], latest, side='right'))
+                if start < len(group):
+                    live = {key: column[start:] for key, column in columns.items()}
+                    station.extend(live)
+                    station.current = self._records(station.station_id, {k: v[-1:] for k, v in live.items()})[0]
+                    summary['recorded_live'] += len(group) - start
+
+        if records:
+            summary['stored'] = bool(self.store_rows(records))
+
+        return summary
+
+    def _records(self, station_id, columns):
+        """Reading dicts for a station's columns (NaN becomes None)"""
+        timestamps = np.datetime_as_string(columns['timestamp'], unit='ms').tolist()
+        lists = {
+            sensor: np.where(np.isnan(columns[sensor]), None, np.round(columns[sensor], 2)).tolist()
+            for sensor in self.sensors
+        }
+        records = []
+        for i, timestamp in enumerate(timestamps):
+            record = {'timestamp': timestamp}
+            record.update({sensor: lists[sensor][i] for sensor in self.sensors})
+            record['location'] = self.stations.location
+            record['station_id'] = station_id
+            records.append(record)
+        return records
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'received': self.received,
+            'accepted': self.accepted
+        }
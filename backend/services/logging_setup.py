@@ -0,0 +1,39 @@
+import logging
+import sys
+
+try:
+    from pythonjsonlogger.json import JsonFormatter
+except ImportError:
+    try:
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+    except ImportError:
+        JsonFormatter = None
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def configure_logging(level='INFO', fmt='json'):
+    """Send every log record to stdout, one JSON object per line by default
+
+    JSON lines carry ``time``, ``level``, ``logger`` and ``message`` plus any
+    ``extra`` fields passed to the log call. ``fmt='text'`` (or a missing
+    python-json-logger) gives plain single-line records instead.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == 'json' and JsonFormatter is not None:
+        handler.setFormatter(JsonFormatter(
+            '%(asctime)s %(levelname)s %(name)s %(message)s',
+            rename_fields={'asctime': 'time', 'levelname': 'level', 'name': 'logger'}
+        ))
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    # Per-request access lines from the development server are debug output
+    if root.level > logging.DEBUG:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    if JsonFormatter is None and fmt == 'json':
+        logging.getLogger(__name__).warning("python-json-logger is not installed, logging as text")
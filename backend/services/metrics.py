@@ -0,0 +1,80 @@
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Latency buckets from 1 ms to 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'klimacek_http_request_duration_seconds', 'HTTP request latency by route',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS
+)
+
+FORECAST_DURATION = Histogram(
+    'klimacek_forecast_duration_seconds', 'Duration of one forecast engine call (all missing sensors)',
+    ['engine'], buckets=LATENCY_BUCKETS + (20.0, 30.0)
+)
+FORECAST_CALLS = Counter(
+    'klimacek_forecast_calls', 'Forecast engine calls by outcome (success, partial, error)',
+    ['engine', 'outcome']
+)
+FORECAST_CACHE_HITS = Counter(
+    'klimacek_forecast_cache_hits', 'Sensor forecasts served from the forecast cache', ['engine']
+)
+
+GENERATED_ROWS = Counter(
+    'klimacek_generator_rows', 'Synthetic readings generated', ['kind']
+)
+GENERATOR_SECONDS = Counter(
+    'klimacek_generator_seconds', 'Time spent generating synthetic readings', ['kind']
+)
+GENERATOR_ROWS_PER_SECOND = Gauge(
+    'klimacek_generator_rows_per_second', 'Throughput of the latest generation call', ['kind']
+)
+
+SOCKET_CLIENTS = Gauge('klimacek_socket_clients', 'Connected Socket.IO clients')
+SSE_SUBSCRIBERS = Gauge('klimacek_sse_subscribers', 'Open Server-Sent Events streams')
+FANOUT_GROUPS = Gauge('klimacek_fanout_groups', 'Socket.IO sensor subscription groups')
+
+TICK_LAG = Histogram(
+    'klimacek_realtime_tick_lag_seconds', 'Delay between a sampling tick being due and running',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+TICKS_SKIPPED = Gauge('klimacek_realtime_ticks_skipped', 'Sampling ticks skipped since start')
+WRITE_BEHIND_PENDING = Gauge('klimacek_write_behind_pending', 'Readings waiting to be written to the database')
+
+
+def record_generation(kind, rows, seconds):
+    """Count a block of generated readings and the time it took"""
+    GENERATED_ROWS.labels(kind).inc(rows)
+    GENERATOR_SECONDS.labels(kind).inc(seconds)
+    if seconds > 0:
+        GENERATOR_ROWS_PER_SECOND.labels(kind).set(rows / seconds)
+
+
+class ForecastTimer:
+    """Times one forecast engine call and counts its outcome
+
+        with ForecastTimer(engine) as call:
+            forecasts = run()
+            call.outcome = 'success' if complete else 'partial'
+
+    An exception leaving the block is counted as ``error``.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.outcome = 'success'
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        FORECAST_DURATION.labels(self.engine).observe(time.perf_counter() - self.started)
+        FORECAST_CALLS.labels(self.engine, 'error' if exc_type else self.outcome).inc()
+        return False
+
+
+def exposition():
+    """(body, content type) of the Prometheus text format for every registered metric"""
+    return generate_latest(), CONTENT_TYPE_LATEST
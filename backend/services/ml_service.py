@@ -1,14 +1,26 @@
+import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from nixtla import NixtlaClient
 import os
+import threading
+from functools import partial
+from services.ttl_cache import TTLCache
+from services.metrics import FORECAST_CACHE_HITS, ForecastTimer
+from services.prepared_dataset import PreparedDataset
+from services.statistical_forecaster import StatisticalForecaster
+from services.resilience import CircuitBreaker, ForecastDispatcher
+
+logger = logging.getLogger(__name__)
 
 class TimeGPTWeatherPredictor:
     def __init__(self):
         # Initialize TimeGPT client with provided API key
         self.api_key = "nixak-DnBBzjJJYxNcAtzCnknxCSO8aT5G1eIQpyV4HQh251itd1MLNtohrjp5ZlVLB5mJ4xmo7tBrkRTfRRh1"
-        self.nixtla_client = None
+        self._nixtla_client = None
+        self._client_initialized = False
+        self._client_lock = threading.Lock()
+        self.api_status = 'not_checked'
         self.is_trained = True  # TimeGPT doesn't need training
         self.last_trained = datetime.now()
         self.sensors = [
@@ -16,20 +28,65 @@ class TimeGPTWeatherPredictor:
             'wind_speed', 'solar_voltage', 'solar_wattage', 'solar_current'
         ]
         self.model_metrics = {}
-        self._initialize_client()
+        self.forecast_cache = TTLCache(
+            max_entries=int(os.environ.get('FORECAST_CACHE_SIZE', 256)),
+            ttl_seconds=int(os.environ.get('FORECAST_CACHE_TTL', 300))
+        )
+        
+        # Forecasting engines: each maps (data, sensors, horizon) to per-sensor frames
+        self.statistical_forecaster = StatisticalForecaster()
+        self.engines = {'timegpt': self._forecast_timegpt}
+        for method in StatisticalForecaster.methods:
+            self.register_engine(method, partial(self._forecast_local, method))
+        self.engine = os.environ.get('FORECAST_ENGINE', 'timegpt')
+        self.fallback_engine = os.environ.get('FORECAST_FALLBACK_ENGINE', 'holt_winters')
         
+        # Remote calls run on a bounded pool with deadlines behind a circuit breaker
+        self.forecast_batch_size = int(os.environ.get('FORECAST_BATCH_SIZE', len(self.sensors)))
+        self.dispatcher = ForecastDispatcher(
+            max_workers=int(os.environ.get('FORECAST_MAX_WORKERS', 4)),
+            call_timeout=float(os.environ.get('FORECAST_CALL_TIMEOUT', 10)),
+            request_deadline=float(os.environ.get('FORECAST_REQUEST_DEADLINE', 20)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get('FORECAST_BREAKER_THRESHOLD', 3)),
+                reset_timeout=float(os.environ.get('FORECAST_BREAKER_RESET', 60))
+            )
+        )
+    
+    @property
+    def nixtla_client(self):
+        """TimeGPT client, created on first use"""
+        if not self._client_initialized:
+            self._initialize_client()
+        return self._nixtla_client
+    
+    @nixtla_client.setter
+    def nixtla_client(self, client):
+        self._nixtla_client = client
+        self._client_initialized = True
+    
     def _initialize_client(self):
-        """Initialize the Nixtla TimeGPT client"""
-        try:
-            self.nixtla_client = NixtlaClient(api_key=self.api_key)
-            print("✅ TimeGPT client initialized successfully")
-            
-            # Test the connection
-            self._test_connection()
-            
-        except Exception as e:
-            print(f"⚠️ Error initializing TimeGPT client: {e}")
-            self.nixtla_client = None
+        """Initialize the Nixtla TimeGPT client (no network access)"""
+        with self._client_lock:
+            if self._client_initialized:
+                return
+            try:
+                from nixtla import NixtlaClient
+                self._nixtla_client = NixtlaClient(api_key=self.api_key)
+                logger.info("TimeGPT client initialized successfully")
+            except Exception as e:
+                logger.warning(f"Error initializing TimeGPT client: {e}")
+                self._nixtla_client = None
+            self._client_initialized = True
+    
+    def warm_up(self):
+        """Create the client and probe the API; meant to run off the request path"""
+        if not self.nixtla_client:
+            self.api_status = 'unavailable'
+            return False
+        connected = self._test_connection()
+        self.api_status = 'connected' if connected else 'unreachable'
+        return connected
     
     def _test_connection(self):
         """Test TimeGPT API connection"""
@@ -48,77 +105,215 @@ class TimeGPTWeatherPredictor:
                 target_col='value'
             )
             
-            print("✅ TimeGPT API connection successful")
+            logger.info("TimeGPT API connection successful")
             return True
             
         except Exception as e:
-            print(f"⚠️ TimeGPT API test failed: {e}")
+            logger.warning(f"TimeGPT API test failed: {e}")
             return False
     
+    def prepare(self, data, sensors=None, station_id=None):
+        """PreparedDataset for data, which is returned unchanged if already prepared
+        
+        Build it once per request and pass it to ``train_model``,
+        ``predict_future``, ``predict_sensor`` and
+        ``generate_forecast_plot_data`` so timestamps are parsed only once.
+        ``station_id`` names the station of readings that don't carry one, so
+        their forecasts are cached under the same key as the station's.
+        """
+        if isinstance(data, PreparedDataset):
+            return data
+        return PreparedDataset.from_data(data, sensors or self.sensors, station_id)
+    
     def prepare_data_for_timegpt(self, data, sensor):
         """Prepare data in TimeGPT format"""
         try:
-            # Convert to DataFrame if needed
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-            else:
-                df = data.copy()
-            
-            # Ensure timestamp is datetime
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            else:
-                # Create timestamp column if missing
-                df['timestamp'] = pd.date_range(
-                    start=datetime.now() - timedelta(hours=len(df)),
-                    periods=len(df),
-                    freq='H'
-                )
-            
-            # Prepare data for specific sensor
-            if sensor not in df.columns:
-                print(f"⚠️ Sensor {sensor} not found in data")
+            prepared = self.prepare(data, [sensor])
+            if sensor not in prepared:
+                logger.warning(f"Sensor {sensor} not found in data")
                 return None
             
-            # Create TimeGPT format: [timestamp, value]
-            timegpt_df = df[['timestamp', sensor]].copy()
-            timegpt_df.columns = ['timestamp', 'value']
-            
-            # Remove missing values
-            timegpt_df = timegpt_df.dropna()
-            
-            # Sort by timestamp
-            timegpt_df = timegpt_df.sort_values('timestamp').reset_index(drop=True)
-            
-            print(f"✅ Prepared {len(timegpt_df)} records for {sensor}")
+            # TimeGPT format: [timestamp, value] without missing values, in time order
+            timegpt_df = prepared.frame(sensor)
+            logger.debug(f"Prepared {len(timegpt_df)} records for {sensor}")
             return timegpt_df
             
         except Exception as e:
-            print(f"❌ Error preparing data for {sensor}: {e}")
+            logger.error(f"Error preparing data for {sensor}: {e}")
             return None
     
+    def prepare_multiseries_for_timegpt(self, data, sensors=None):
+        """Prepare several sensors as one long-format frame keyed by ``unique_id``
+        
+        Sensors with fewer than 10 valid readings are left out.
+        """
+        sensors = sensors or self.sensors
+        long_df = self.prepare(data, sensors).long_frame(sensors, min_points=10)
+        logger.debug(f"Prepared {len(long_df)} records for {long_df['unique_id'].nunique()} sensors")
+        return long_df
+    
+    def register_engine(self, name, engine):
+        """Register a forecasting engine
+        
+        ``engine(prepared, sensors, horizon)`` receives a PreparedDataset and
+        returns a dict of per-sensor frames with ``timestamp`` and
+        ``forecast`` columns.
+        """
+        self.engines[name] = engine
+    
+    def _resolve_engine(self, engine=None):
+        """Engine to use for a request, falling back when TimeGPT is unavailable"""
+        name = engine or self.engine
+        if name not in self.engines:
+            raise ValueError(f"Unknown forecasting engine: {name}")
+        if name == 'timegpt' and not self.nixtla_client:
+            return self.fallback_engine
+        return name
+    
+    def _forecast_timegpt(self, data, sensors, horizon):
+        """Forecast sensors with multi-series TimeGPT calls
+        
+        Sensors are sent in batches of ``forecast_batch_size`` (one call for
+        all of them by default) through the dispatcher, so a slow or failing
+        API costs at most the request deadline. Sensors whose call failed are
+        left out of the result for the caller to fall back on.
+        """
+        long_df = self.prepare_multiseries_for_timegpt(data, sensors)
+        if long_df.empty:
+            return {}
+        
+        series = list(long_df['unique_id'].unique())
+        size = max(1, self.forecast_batch_size)
+        batches = [
+            long_df[long_df['unique_id'].isin(series[i:i + size])]
+            for i in range(0, len(series), size)
+        ]
+        
+        def forecast_batch(batch_df):
+            return self.nixtla_client.forecast(
+                df=batch_df,
+                h=horizon,
+                id_col='unique_id',
+                time_col='timestamp',
+                target_col='value'
+            )
+        
+        forecasts = {}
+        errors = []
+        for result in self.dispatcher.run_all(forecast_batch, batches):
+            if isinstance(result, Exception):
+                errors.append(result)
+                continue
+            for sensor, sensor_forecast in result.groupby('unique_id', sort=False):
+                forecasts[sensor] = pd.DataFrame({
+                    'timestamp': sensor_forecast['timestamp'].to_numpy(),
+                    'forecast': sensor_forecast['TimeGPT'].to_numpy(dtype=np.float64)
+                })
+        
+        if errors and not forecasts:
+            raise errors[0]
+        for error in errors:
+            logger.warning(f"TimeGPT batch failed: {error}")
+        return forecasts
+    
+    def _forecast_local(self, method, data, sensors, horizon):
+        """Forecast all sensors at once with the local statistical engine
+        
+        Like TimeGPT's ``h``, ``horizon`` counts steps of the data's own grid,
+        not days: ``days=30`` on 1-minute readings forecasts 30 minutes ahead.
+        The season is one day of steps (1440 for 1-minute readings).
+        """
+        prepared = self.prepare(data, sensors)
+        sensors = [sensor for sensor in sensors if sensor in prepared]
+        if not sensors or len(prepared) < 2:
+            return {}
+        
+        timestamps = prepared.timestamps
+        values = np.vstack([prepared.column(sensor) for sensor in sensors])
+        
+        # Regular grid step and the number of steps in one day
+        step = np.median(np.diff(timestamps))
+        season_length = int(round(np.timedelta64(1, 'D') / step)) if step > np.timedelta64(0) else 1
+        
+        forecast = self.statistical_forecaster.forecast(values, horizon, season_length, method)
+        future = timestamps[-1] + step * np.arange(1, horizon + 1)
+        
+        return {
+            sensor: pd.DataFrame({'timestamp': future, 'forecast': forecast[i]})
+            for i, sensor in enumerate(sensors)
+        }
+    
+    def _run_engine(self, data, sensors, horizon, engine=None):
+        """Per-sensor forecast frames and the engine that produced each one
+        
+        Cached frames are reused; sensors the engine cannot forecast are
+        retried once with the fallback engine.
+        """
+        name = self._resolve_engine(engine)
+        data = self.prepare(data, sensors)
+        watermark = data.watermark
+        forecasts, sources = {}, {}
+        
+        attempts = [name] if name == self.fallback_engine else [name, self.fallback_engine]
+        for attempt in attempts:
+            missing = [sensor for sensor in sensors if sensor not in forecasts]
+            if not missing:
+                break
+            
+            # Reuse cached forecasts, then fetch every remaining sensor at once
+            for sensor in missing:
+                forecast_df = self._cached_forecast(attempt, sensor, horizon, watermark)
+                if forecast_df is not None:
+                    forecasts[sensor], sources[sensor] = forecast_df, attempt
+                    FORECAST_CACHE_HITS.labels(attempt).inc()
+            missing = [sensor for sensor in missing if sensor not in forecasts]
+            if not missing:
+                break
+            
+            try:
+                logger.debug(f"Forecasting {len(missing)} sensors with {attempt}...")
+                with ForecastTimer(attempt) as call:
+                    produced = self.engines[attempt](data, missing, horizon)
+                    call.outcome = 'success' if all(sensor in produced for sensor in missing) else 'partial'
+                for sensor, forecast_df in produced.items():
+                    forecasts[sensor], sources[sensor] = forecast_df, attempt
+                    if watermark is not None:
+                        self.forecast_cache.put((attempt, sensor, horizon, watermark), forecast_df)
+            except Exception as e:
+                logger.error(f"Error forecasting {', '.join(missing)} with {attempt}: {e}")
+        
+        return forecasts, sources
+    
+    def _cached_forecast(self, engine, sensor, horizon, watermark):
+        """Forecast frame cached for this engine, sensor, horizon and data watermark"""
+        if watermark is None:
+            return None
+        return self.forecast_cache.get((engine, sensor, horizon, watermark))
+    
     def train_model(self, data):
         """TimeGPT doesn't need training - it's a foundation model"""
-        print("🤖 TimeGPT is a pre-trained foundation model - no training needed!")
+        logger.debug("TimeGPT is a pre-trained foundation model - no training needed!")
         
         # Test with each sensor to verify data quality
         metrics = {}
+        prepared = self.prepare(data)
         
         for sensor in self.sensors:
             try:
-                prepared_data = self.prepare_data_for_timegpt(data, sensor)
-                if prepared_data is not None and len(prepared_data) > 10:
+                points = prepared.count(sensor)
+                if points > 10:
+                    timestamps, values = prepared.series(sensor)
                     metrics[sensor] = {
-                        'data_points': len(prepared_data),
-                        'date_range': f"{prepared_data['timestamp'].min()} to {prepared_data['timestamp'].max()}",
-                        'mean_value': float(prepared_data['value'].mean()),
-                        'std_value': float(prepared_data['value'].std()),
+                        'data_points': points,
+                        'date_range': f"{pd.Timestamp(timestamps[0])} to {pd.Timestamp(timestamps[-1])}",
+                        'mean_value': float(values.mean()),
+                        'std_value': float(values.std(ddof=1)),
                         'status': 'ready_for_forecasting'
                     }
                 else:
                     metrics[sensor] = {
                         'status': 'insufficient_data',
-                        'data_points': 0 if prepared_data is None else len(prepared_data)
+                        'data_points': points
                     }
                     
             except Exception as e:
@@ -131,107 +326,74 @@ class TimeGPTWeatherPredictor:
         self.is_trained = True
         self.last_trained = datetime.now()
         
-        print(f"✅ TimeGPT ready for forecasting {len([s for s in metrics if metrics[s]['status'] == 'ready_for_forecasting'])} sensors")
+        logger.debug(f"TimeGPT ready for forecasting {len([s for s in metrics if metrics[s]['status'] == 'ready_for_forecasting'])} sensors")
         return metrics
     
-    def predict_future(self, historical_data, prediction_days=30):
-        """Generate TimeGPT predictions for all sensors"""
-        print(f"🔮 Generating TimeGPT predictions for {prediction_days} days...")
+    def predict_future(self, historical_data, prediction_days=30, engine=None):
+        """Generate predictions for all sensors
         
-        if not self.nixtla_client:
-            print("⚠️ TimeGPT client not available, using fallback predictions")
-            return self._predict_simple_fallback(historical_data, prediction_days)
+        ``prediction_days`` is passed to the engine as a number of steps, so it
+        means days only for daily data; see ``_forecast_local``.
+        """
+        logger.debug(f"Generating predictions for {prediction_days} days...")
         
+        forecasts, sources = self._run_engine(historical_data, self.sensors, prediction_days, engine)
         predictions = {}
         
         for sensor in self.sensors:
-            try:
-                print(f"Forecasting {sensor}...")
-                
-                # Prepare data for this sensor
-                sensor_data = self.prepare_data_for_timegpt(historical_data, sensor)
-                
-                if sensor_data is None or len(sensor_data) < 10:
-                    print(f"⚠️ Insufficient data for {sensor}, using fallback")
-                    predictions[sensor] = self._predict_sensor_fallback(sensor, prediction_days)
-                    continue
-                
-                # Generate forecast with TimeGPT
-                forecast_df = self.nixtla_client.forecast(
-                    df=sensor_data,
-                    h=prediction_days,
-                    time_col='timestamp',
-                    target_col='value'
-                )
-                
-                # Convert to our format
-                sensor_predictions = []
-                for idx, row in forecast_df.iterrows():
-                    sensor_predictions.append({
-                        'day': idx + 1,
-                        'date': row['timestamp'].isoformat(),
-                        'predicted_value': float(row['TimeGPT']),
-                        'confidence': max(95 - (idx * 1.0), 70)  # High confidence with slight decrease
-                    })
-                
-                predictions[sensor] = sensor_predictions
-                print(f"✅ {sensor} forecast completed - {len(sensor_predictions)} predictions")
-                
-            except Exception as e:
-                print(f"❌ Error forecasting {sensor}: {e}")
-                # Use fallback prediction
+            forecast_df = forecasts.get(sensor)
+            if forecast_df is None:
+                logger.warning(f"No forecast for {sensor}, using fallback")
                 predictions[sensor] = self._predict_sensor_fallback(sensor, prediction_days)
+                continue
+            
+            # Convert to our format
+            if sources[sensor] == 'timegpt':
+                confidence = np.maximum(95 - np.arange(len(forecast_df)) * 1.0, 70)  # High confidence with slight decrease
+            else:
+                confidence = np.maximum(90 - np.arange(len(forecast_df)) * 2.0, 60)
+            
+            sensor_predictions = []
+            for idx, (timestamp, value) in enumerate(zip(forecast_df['timestamp'], forecast_df['forecast'])):
+                sensor_predictions.append({
+                    'day': idx + 1,
+                    'date': pd.Timestamp(timestamp).isoformat(),
+                    'predicted_value': float(value),
+                    'confidence': float(confidence[idx])
+                })
+            
+            predictions[sensor] = sensor_predictions
         
-        print(f"🎉 TimeGPT forecasting completed for {len(predictions)} sensors")
+        logger.debug(f"Forecasting completed for {len(predictions)} sensors")
         return predictions
     
-    def predict_sensor(self, historical_data, sensor_type, days=7):
-        """Predict specific sensor using TimeGPT"""
+    def predict_sensor(self, historical_data, sensor_type, days=7, engine=None):
+        """Predict specific sensor"""
         try:
-            if not self.nixtla_client:
-                return self._predict_sensor_fallback(sensor_type, days)
+            forecasts, sources = self._run_engine(historical_data, [sensor_type], days, engine)
+            forecast_df = forecasts.get(sensor_type)
             
-            # Prepare data
-            sensor_data = self.prepare_data_for_timegpt(historical_data, sensor_type)
-            
-            if sensor_data is None or len(sensor_data) < 10:
+            if forecast_df is None:
                 return self._predict_sensor_fallback(sensor_type, days)
             
-            # Generate forecast
-            forecast_df = self.nixtla_client.forecast(
-                df=sensor_data,
-                h=days,
-                time_col='timestamp',
-                target_col='value'
-            )
-            
             # Convert to our format
+            floor = 70 if sources[sensor_type] == 'timegpt' else 60
             predictions = []
-            for idx, row in forecast_df.iterrows():
+            for idx, (timestamp, value) in enumerate(zip(forecast_df['timestamp'], forecast_df['forecast'])):
                 predictions.append({
-                    'timestamp': row['timestamp'].isoformat(),
-                    'value': float(row['TimeGPT']),
-                    'confidence': max(95 - (idx * 5), 70)
+                    'timestamp': pd.Timestamp(timestamp).isoformat(),
+                    'value': float(value),
+                    'confidence': max(95 - (idx * 5), floor)
                 })
             
             return predictions
             
         except Exception as e:
-            print(f"❌ Error predicting {sensor_type}: {e}")
+            logger.error(f"Error predicting {sensor_type}: {e}")
             return self._predict_sensor_fallback(sensor_type, days)
     
-    def _predict_simple_fallback(self, historical_data, prediction_days):
-        """Fallback predictions when TimeGPT is unavailable"""
-        print("Using statistical fallback predictions...")
-        
-        predictions = {}
-        for sensor in self.sensors:
-            predictions[sensor] = self._predict_sensor_fallback(sensor, prediction_days)
-        
-        return predictions
-    
     def _predict_sensor_fallback(self, sensor, prediction_days):
-        """Generate fallback predictions for a single sensor"""
+        """Generate placeholder predictions for a sensor without usable history"""
         base_values = {
             'humidity': 65.0,
             'temperature': 25.0,
@@ -273,41 +435,45 @@ class TimeGPTWeatherPredictor:
             return {
                 'model_type': 'TimeGPT Foundation Model',
                 'status': 'ready',
-                'api_connected': self.nixtla_client is not None
+                'api_connected': self._nixtla_client is not None,
+                'api_status': self.api_status,
+                'engine': self._resolve_engine(),
+                'available_engines': list(self.engines),
+                'dispatcher': self.dispatcher.stats()
             }
         
         return {
             'model_type': 'TimeGPT Foundation Model',
             'sensors': self.model_metrics,
-            'api_connected': self.nixtla_client is not None,
+            'api_connected': self._nixtla_client is not None,
+            'api_status': self.api_status,
+            'engine': self._resolve_engine(),
+            'available_engines': list(self.engines),
+            'dispatcher': self.dispatcher.stats(),
             'last_updated': self.last_trained.isoformat() if self.last_trained else None
         }
     
-    def generate_forecast_plot_data(self, historical_data, sensor, forecast_days=30):
+    def generate_forecast_plot_data(self, historical_data, sensor, forecast_days=30, engine=None,
+                                    station_id=None):
         """Generate data for plotting forecasts (for future visualization)"""
         try:
-            if not self.nixtla_client:
+            prepared = self.prepare(historical_data, [sensor], station_id)
+            if sensor not in prepared:
                 return None
+            sensor_data = prepared.frame(sensor)
             
-            sensor_data = self.prepare_data_for_timegpt(historical_data, sensor)
-            if sensor_data is None:
+            # Generate forecast (or reuse the one the dashboard already requested)
+            forecasts, _ = self._run_engine(prepared, [sensor], forecast_days, engine)
+            if sensor not in forecasts:
                 return None
             
-            # Generate forecast
-            forecast_df = self.nixtla_client.forecast(
-                df=sensor_data,
-                h=forecast_days,
-                time_col='timestamp',
-                target_col='value'
-            )
-            
             return {
                 'historical': sensor_data.to_dict('records'),
-                'forecast': forecast_df.to_dict('records')
+                'forecast': forecasts[sensor].to_dict('records')
             }
             
         except Exception as e:
-            print(f"Error generating plot data for {sensor}: {e}")
+            logger.error(f"Error generating plot data for {sensor}: {e}")
             return None
 
 # Backward compatibility alias
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Columns that describe a reading rather than measure something
+NON_SENSOR_COLUMNS = ('id', 'timestamp', 'station_id', 'location', 'created_at')
+
+
+class PreparedDataset:
+    """Sensor history parsed once and shared by every forecasting step
+
+    Timestamps are parsed and sorted once; sensor values are one float64
+    block with a row per sensor, so ``column`` hands out views instead of
+    copies. ``valid`` marks the non-NaN readings of each row. Build one
+    with ``from_data`` (reading dicts or a DataFrame) or ``from_columns``
+    and pass it to any TimeGPTWeatherPredictor entry point in place of
+    the raw data.
+    """
+
+    def __init__(self, timestamps, values, sensors, metadata=None):
+        self.timestamps = timestamps
+        self.values = values
+        self.sensors = list(sensors)
+        self.metadata = metadata or {}
+        self.valid = ~np.isnan(values)
+        self._rows = {sensor: i for i, sensor in enumerate(self.sensors)}
+        self._watermark = None
+
+    @classmethod
+    def from_columns(cls, columns, sensors=None, metadata=None):
+        """Dataset from ``{'timestamp': datetime64 array, sensor: array, ...}``
+
+        Readings without a timestamp are dropped and the rest are put in
+        time order (already ordered input is not copied for sorting).
+        """
+        timestamps = np.asarray(columns['timestamp'])
+        if sensors is None:
+            sensors = [name for name in columns if name not in NON_SENSOR_COLUMNS]
+        sensors = [sensor for sensor in sensors if sensor in columns]
+        values = np.empty((len(sensors), len(timestamps)), dtype=np.float64)
+        for i, sensor in enumerate(sensors):
+            values[i] = columns[sensor]
+
+        present = ~np.isnat(timestamps)
+        if not present.all():
+            timestamps, values = timestamps[present], values[:, present]
+        if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[:, order]
+        return cls(timestamps, values, sensors, metadata)
+
+    @classmethod
+    def from_data(cls, data, sensors=None, station_id=None):
+        """Dataset from a list of reading dicts or a DataFrame
+
+        A missing ``timestamp`` column is replaced by hourly timestamps
+        ending now. Timezone-aware timestamps are converted to naive UTC.
+        ``station_id`` is used when the data does not name its station.
+        """
+        df = pd.DataFrame(data) if isinstance(data, list) else data
+        metadata = dict(getattr(df, 'attrs', {}))
+        if 'station_id' not in metadata and 'station_id' in df.columns and len(df):
+            metadata['station_id'] = df['station_id'].iloc[0]
+        if metadata.get('station_id') is None and station_id is not None:
+            metadata['station_id'] = station_id
+
+        if 'timestamp' in df.columns:
+            timestamps = pd.to_datetime(df['timestamp'], format='ISO8601')
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_convert(None)
+            timestamps = timestamps.to_numpy()
+        else:
+            timestamps = pd.date_range(end=datetime.now(), periods=len(df), freq='h').to_numpy()
+
+        columns = {'timestamp': timestamps}
+        if sensors is None:
+            sensors = [name for name in df.columns if name not in NON_SENSOR_COLUMNS]
+        for sensor in sensors:
+            if sensor in df.columns:
+                columns[sensor] = pd.to_numeric(df[sensor], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        return cls.from_columns(columns, sensors, metadata)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __contains__(self, sensor):
+        return sensor in self._rows
+
+    def column(self, sensor):
+        """All values of one sensor, NaN where missing (a view, not a copy)"""
+        return self.values[self._rows[sensor]]
+
+    def count(self, sensor):
+        """Number of valid readings of one sensor"""
+        return int(self.valid[self._rows[sensor]].sum()) if sensor in self else 0
+
+    def series(self, sensor):
+        """(timestamps, values) of the valid readings of one sensor"""
+        mask = self.valid[self._rows[sensor]]
+        values = self.column(sensor)
+        if mask.all():
+            return self.timestamps, values
+        return self.timestamps[mask], values[mask]
+
+    def frame(self, sensor):
+        """Single-series frame with ``timestamp`` and ``value`` columns"""
+        timestamps, values = self.series(sensor)
+        return pd.DataFrame({'timestamp': timestamps, 'value': values})
+
+    def long_frame(self, sensors=None, min_points=10):
+        """Multi-series frame keyed by ``unique_id``, ordered by sensor then time
+
+        Sensors with fewer than ``min_points`` valid readings are left out.
+        """
+        sensors = sorted(
+            sensor for sensor in (sensors or self.sensors)
+            if sensor in self and self.count(sensor) >= min_points
+        )
+        parts = [self.series(sensor) for sensor in sensors]
+        return pd.DataFrame({
+            'unique_id': np.repeat(sensors, [len(timestamps) for timestamps, _ in parts]),
+            'timestamp': np.concatenate([timestamps for timestamps, _ in parts]) if parts
+                else np.empty(0, dtype='datetime64[ns]'),
+            'value': np.concatenate([values for _, values in parts]) if parts else np.empty(0)
+        })
+
+    @property
+    def watermark(self):
+        """Key identifying the data a forecast is built from, used to key cached forecasts
+
+        Station, first and newest timestamp, reading count and median step,
+        so requests over different spans or resolutions of the same station
+        don't share forecasts, while every request over one station's
+        unchanged history does, however the data was passed in.
+        """
+        if not len(self):
+            return None
+        if self._watermark is None:
+            step = np.median(np.diff(self.timestamps)) if len(self) > 1 else np.timedelta64(0)
+            self._watermark = (
+                self.metadata.get('station_id'),
+                pd.Timestamp(self.timestamps[0]).isoformat(),
+                pd.Timestamp(self.timestamps[-1]).isoformat(),
+                len(self),
+                pd.Timedelta(step).isoformat()
+            )
+        return self._watermark
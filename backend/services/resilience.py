@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency until a probe succeeds
+
+    closed: calls go through; ``failure_threshold`` consecutive failures open
+    the circuit. open: calls are rejected for ``reset_timeout`` seconds.
+    half_open: a single probe call is let through; success closes the
+    circuit, failure opens it again. ``clock`` is the monotonic time source.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            return self._state
+
+    def allow_request(self):
+        """True if a call may go through now"""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._probe_in_flight = False
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout': self.reset_timeout,
+            'rejected_calls': self.rejected
+        }
+
+
+class ForecastDispatcher:
+    """Run blocking forecast calls on a bounded thread pool with deadlines
+
+    Each call gets at most ``call_timeout`` seconds from its submission and
+    a whole request at most ``request_deadline`` seconds. Late calls are abandoned (the worker
+    thread finishes in the background) and counted as breaker failures.
+    """
+
+    def __init__(self, max_workers=4, call_timeout=10, request_deadline=20, breaker=None):
+        self.call_timeout = call_timeout
+        self.request_deadline = request_deadline
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast')
+
+    def run_all(self, fn, batches):
+        """Call fn(batch) for every batch concurrently
+
+        Returns a list with each call's result, or the exception it raised
+        (TimeoutError on deadline, CircuitOpenError when rejected).
+        """
+        deadline = time.monotonic() + self.request_deadline
+        futures = []
+        for batch in batches:
+            if self.breaker.allow_request():
+                # Each call's limit runs from its own submission, capped by the request deadline
+                cutoff = min(time.monotonic() + self.call_timeout, deadline)
+                futures.append((self._executor.submit(fn, batch), cutoff))
+            else:
+                futures.append((None, None))
+
+        results = []
+        for future, cutoff in futures:
+            if future is None:
+                results.append(CircuitOpenError("Forecast circuit breaker is open"))
+                continue
+
+            try:
+                results.append(future.result(timeout=max(0.0, cutoff - time.monotonic())))
+                self.breaker.record_success()
+            except FutureTimeoutError:
+                future.cancel()
+                self.breaker.record_failure()
+                limit = 'request deadline' if cutoff == deadline else f'{self.call_timeout}s call timeout'
+                results.append(TimeoutError(f"Forecast call exceeded the {limit}"))
+            except Exception as e:
+                self.breaker.record_failure()
+                results.append(e)
+        return results
+
+    def stats(self):
+        return {
+            'call_timeout': self.call_timeout,
+            'request_deadline': self.request_deadline,
+            'breaker': self.breaker.stats()
+        }
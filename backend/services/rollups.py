@@ -0,0 +1,198 @@
+import numpy as np
+import threading
+from services.timeseries_store import TimeSeriesSlice, to_epoch_ms
+
+# Rollup tiers above the raw 1-minute store: name -> (bucket width in seconds, buckets kept)
+DEFAULT_TIERS = {
+    '1h': (3600, 24 * 400),
+    '1d': (86400, 3650)
+}
+
+# SensorAggregator bucket name -> rollup tier with that bucket width
+BUCKET_TIERS = {'hour': '1h', 'day': '1d'}
+
+
+class RollupTier:
+    """Fixed-width count/sum/min/max/sum-of-squares buckets per sensor
+
+    Buckets live in a ring indexed by ``bucket_id % capacity``; a slot is
+    reset when a newer bucket claims it, so each update is O(1).
+    """
+
+    def __init__(self, name, width_seconds, capacity, sensors):
+        self.name = name
+        self.width_ms = width_seconds * 1000
+        self.capacity = capacity
+        self.sensors = list(sensors)
+        shape = (capacity, len(self.sensors))
+        self.bucket_ids = np.full(capacity, -1, dtype=np.int64)
+        self.newest_id = -1
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.sum = np.zeros(shape)
+        self.sum_sq = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def _claim(self, bucket_ids):
+        """Reset slots that still hold an older bucket"""
+        slots = bucket_ids % self.capacity
+        stale = self.bucket_ids[slots] != bucket_ids
+        if stale.any():
+            reset = slots[stale]
+            self.bucket_ids[reset] = bucket_ids[stale]
+            self.count[reset] = 0
+            self.sum[reset] = 0.0
+            self.sum_sq[reset] = 0.0
+            self.min[reset] = np.inf
+            self.max[reset] = -np.inf
+        return slots
+
+    def ingest(self, timestamps, values):
+        """Add readings: epoch-ms timestamps (n,) and values (n, n_sensors)"""
+        bucket_ids = np.asarray(timestamps, dtype=np.int64) // self.width_ms
+        unique_ids, inverse = np.unique(bucket_ids, return_inverse=True)
+        # Buckets older than the ring can hold are ignored
+        self.newest_id = max(self.newest_id, int(unique_ids.max()))
+        keep = unique_ids > self.newest_id - self.capacity
+        if not keep.any():
+            return
+        if not keep.all():
+            rows = keep[inverse]
+            unique_ids, inverse = np.unique(bucket_ids[rows], return_inverse=True)
+            values = values[rows]
+        slots = self._claim(unique_ids)[inverse]
+
+        valid = ~np.isnan(values)
+        observed = np.where(valid, values, 0.0)
+        np.add.at(self.count, slots, valid.astype(np.int64))
+        np.add.at(self.sum, slots, observed)
+        np.add.at(self.sum_sq, slots, observed * observed)
+        np.minimum.at(self.min, slots, np.where(valid, values, np.inf))
+        np.maximum.at(self.max, slots, np.where(valid, values, -np.inf))
+
+    def ingest_extremes(self, timestamp, values):
+        """Widen the min/max of one bucket without counting a reading (NaN values are skipped)"""
+        bucket_id = timestamp // self.width_ms
+        if bucket_id <= self.newest_id - self.capacity:
+            return
+        self.newest_id = max(self.newest_id, bucket_id)
+        slot = bucket_id % self.capacity
+        if self.bucket_ids[slot] != bucket_id:
+            self._claim(np.array([bucket_id]))
+        np.fmin(self.min[slot], values, out=self.min[slot])
+        np.fmax(self.max[slot], values, out=self.max[slot])
+
+    def query(self, start_ms=None, end_ms=None):
+        """Buckets overlapping [start_ms, end_ms] in time order, as a dict of arrays"""
+        present = self.bucket_ids >= 0
+        if start_ms is not None:
+            present &= self.bucket_ids >= start_ms // self.width_ms
+        if end_ms is not None:
+            present &= self.bucket_ids <= end_ms // self.width_ms
+        slots = np.flatnonzero(present)
+        slots = slots[np.argsort(self.bucket_ids[slots])]
+        return {
+            'timestamp': self.bucket_ids[slots] * self.width_ms,
+            'count': self.count[slots],
+            'sum': self.sum[slots],
+            'sum_sq': self.sum_sq[slots],
+            'min': self.min[slots],
+            'max': self.max[slots]
+        }
+
+
+class RollupStore:
+    """Incrementally maintained hourly and daily rollups of every ingested reading"""
+
+    def __init__(self, sensors, tiers=None, metadata=None):
+        self.sensors = list(sensors)
+        self.metadata = metadata or {}
+        self.tiers = {
+            name: RollupTier(name, width, capacity, self.sensors)
+            for name, (width, capacity) in (tiers or DEFAULT_TIERS).items()
+        }
+        self._lock = threading.Lock()
+
+    def ingest(self, reading):
+        """Add one reading dict to every tier"""
+        timestamp = to_epoch_ms(reading['timestamp'])
+        values = np.array([[
+            np.nan if reading.get(sensor) is None else reading[sensor]
+            for sensor in self.sensors
+        ]], dtype=np.float64)
+        self.ingest_columns(np.array([timestamp]), values)
+
+    def ingest_columns(self, timestamps, values):
+        """Add many readings; values is (n, n_sensors) or a dict of sensor columns"""
+        timestamps = np.asarray(timestamps)
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        if isinstance(values, dict):
+            values = np.column_stack([np.asarray(values[s], dtype=np.float64) for s in self.sensors])
+        if len(timestamps) == 0:
+            return
+        with self._lock:
+            for tier in self.tiers.values():
+                tier.ingest(timestamps, values)
+
+    def ingest_extremes(self, timestamp, values):
+        """Add the peaks of a sample that is not recorded (e.g. a high-rate tick)
+
+        ``values`` has one entry per sensor, NaN for sensors not sampled.
+        Only bucket min/max change, so counts and means still describe the
+        recorded readings alone.
+        """
+        with self._lock:
+            for tier in self.tiers.values():
+                tier.ingest_extremes(timestamp, values)
+
+    def choose_tier(self, span_ms, max_points):
+        """Coarsest tier whose buckets still give ``max_points`` over the span, or None"""
+        wanted = span_ms / max(1, max_points)
+        candidates = [tier for tier in self.tiers.values() if tier.width_ms <= wanted]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda tier: tier.width_ms).name
+
+    def query(self, tier, start_ms=None, end_ms=None):
+        """Raw rollup arrays of one tier"""
+        with self._lock:
+            return self.tiers[tier].query(start_ms, end_ms)
+
+    def downsample(self, tier, start_ms, end_ms, max_points, peak_sensors=('rainfall', 'wind_speed')):
+        """Chart rows from a rollup tier, in the layout of TimeSeriesSlice.downsample('minmax')"""
+        buckets = self.query(tier, start_ms, end_ms)
+        n = len(buckets['timestamp'])
+        if n == 0:
+            return TimeSeriesSlice([], [], self.metadata)
+
+        # Merge neighbouring buckets down to max_points
+        starts = np.unique(np.linspace(0, n, min(n, max_points), endpoint=False).astype(np.int64))
+        count = np.add.reduceat(buckets['count'], starts)
+        total = np.add.reduceat(buckets['sum'], starts)
+        lows = np.minimum.reduceat(buckets['min'], starts)
+        highs = np.maximum.reduceat(buckets['max'], starts)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        # Buckets that only saw unrecorded samples have peaks but no count
+        lows = np.where(np.isfinite(lows), lows, np.nan)
+        highs = np.where(np.isfinite(highs), highs, np.nan)
+
+        values = {}
+        for i, sensor in enumerate(self.sensors):
+            values[sensor] = highs[:, i] if sensor in peak_sensors else mean[:, i]
+            values[f'{sensor}_min'] = lows[:, i]
+            values[f'{sensor}_max'] = highs[:, i]
+        return TimeSeriesSlice(list(values), [(buckets['timestamp'][starts], values)], self.metadata)
+
+    def summarize(self, tier, start_ms, end_ms):
+        """Per-sensor totals over whole buckets: (count, sum, min, max, sum_sq) arrays"""
+        buckets = self.query(tier, start_ms, end_ms)
+        return (
+            buckets['count'].sum(axis=0),
+            buckets['sum'].sum(axis=0),
+            buckets['min'].min(axis=0, initial=np.inf),
+            buckets['max'].max(axis=0, initial=-np.inf),
+            buckets['sum_sq'].sum(axis=0)
+        )
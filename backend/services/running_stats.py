@@ -0,0 +1,139 @@
+import threading
+import numpy as np
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class RunningStats:
+    """Constant-memory running statistics for every sensor of one station
+
+    Each reading updates, per sensor: count, Welford mean and sum of squared
+    deviations, min, max, an exponentially weighted moving average and a
+    fixed-bin histogram used as an approximate quantile sketch. Blocks of
+    readings are folded in with Chan's parallel merge, so ``update`` and
+    ``update_columns`` give the same result. Queries cost the same however
+    many readings have been seen.
+
+    The histogram spans each sensor's nominal ``(min, max)`` range widened
+    by one range width on both sides; values beyond that land in the
+    outermost bins. Quantiles are interpolated within a bin and clamped to
+    the exact min/max.
+    """
+
+    def __init__(self, sensors, bounds, ewma_alpha=0.1, bins=512):
+        self.sensors = list(sensors)
+        self.ewma_alpha = ewma_alpha
+        self.bins = bins
+        n = len(self.sensors)
+
+        low = np.array([bounds[sensor][0] for sensor in self.sensors], dtype=np.float64)
+        high = np.array([bounds[sensor][1] for sensor in self.sensors], dtype=np.float64)
+        span = np.maximum(high - low, 1e-9)
+        self._lower = low - span
+        self._width = 3 * span / bins
+
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.ewma = np.full(n, np.nan)
+        self.histogram = np.zeros((n, bins), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _bin(self, i, values):
+        return np.clip(((values - self._lower[i]) / self._width[i]).astype(np.int64), 0, self.bins - 1)
+
+    def update(self, reading):
+        """Add one reading dict (missing or None values are ignored)"""
+        values = np.array([reading.get(sensor) for sensor in self.sensors], dtype=np.float64)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return
+
+        with self._lock:
+            x = np.where(valid, values, 0.0)
+            self.count += valid
+            count = np.maximum(self.count, 1)
+            delta = x - self.mean
+            self.mean += np.where(valid, delta / count, 0.0)
+            self.m2 += np.where(valid, delta * (x - self.mean), 0.0)
+            self.min = np.where(valid, np.minimum(self.min, x), self.min)
+            self.max = np.where(valid, np.maximum(self.max, x), self.max)
+
+            blended = np.where(np.isnan(self.ewma), x, self.ewma + self.ewma_alpha * (x - self.ewma))
+            self.ewma = np.where(valid, blended, self.ewma)
+
+            rows = np.flatnonzero(valid)
+            bins = np.clip(((x[rows] - self._lower[rows]) / self._width[rows]).astype(np.int64), 0, self.bins - 1)
+            self.histogram[rows, bins] += 1
+
+    def update_columns(self, columns):
+        """Add a block of columnar readings, in time order ({sensor: array})"""
+        with self._lock:
+            for i, sensor in enumerate(self.sensors):
+                if sensor not in columns:
+                    continue
+                values = np.asarray(columns[sensor], dtype=np.float64)
+                values = values[~np.isnan(values)]
+                k = len(values)
+                if k == 0:
+                    continue
+
+                # Chan's merge of the block's (count, mean, M2) into the running totals
+                block_mean = values.mean()
+                block_m2 = float(((values - block_mean) ** 2).sum())
+                total = self.count[i] + k
+                delta = block_mean - self.mean[i]
+                self.mean[i] += delta * k / total
+                self.m2[i] += block_m2 + delta * delta * self.count[i] * k / total
+                self.count[i] = total
+                self.min[i] = min(self.min[i], values.min())
+                self.max[i] = max(self.max[i], values.max())
+
+                # EWMA after the block: decayed previous value plus weighted block values
+                start, block = self.ewma[i], values
+                if np.isnan(start):
+                    start, block = values[0], values[1:]
+                alpha = self.ewma_alpha
+                weights = alpha * (1 - alpha) ** np.arange(len(block) - 1, -1, -1, dtype=np.float64)
+                self.ewma[i] = start * (1 - alpha) ** len(block) + float(weights @ block)
+
+                self.histogram[i] += np.bincount(self._bin(i, values), minlength=self.bins)
+
+    def quantiles(self, i, quantiles=DEFAULT_QUANTILES):
+        """Approximate quantiles of sensor ``i`` from its histogram"""
+        counts = self.histogram[i]
+        total = counts.sum()
+        if total == 0:
+            return {}
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(quantiles) * total
+        index = np.minimum(np.searchsorted(cumulative, ranks, side='left'), self.bins - 1)
+        before = np.where(index > 0, cumulative[index - 1], 0)
+        fraction = (ranks - before) / np.maximum(counts[index], 1)
+        values = self._lower[i] + (index + fraction) * self._width[i]
+        values = np.clip(values, self.min[i], self.max[i])
+        return {f'p{round(q * 100):g}': round(float(v), 4) for q, v in zip(quantiles, values)}
+
+    def summary(self, sensors=None, quantiles=DEFAULT_QUANTILES):
+        """{sensor: statistics} for the requested sensors (all by default)"""
+        result = {}
+        with self._lock:
+            for i, sensor in enumerate(self.sensors):
+                if sensors is not None and sensor not in sensors:
+                    continue
+                n = int(self.count[i])
+                if n == 0:
+                    result[sensor] = {'count': 0}
+                    continue
+                result[sensor] = {
+                    'count': n,
+                    'mean': round(float(self.mean[i]), 4),
+                    'std': round(float(np.sqrt(self.m2[i] / (n - 1))), 4) if n > 1 else 0.0,
+                    'min': round(float(self.min[i]), 4),
+                    'max': round(float(self.max[i]), 4),
+                    'ewma': round(float(self.ewma[i]), 4),
+                    'quantiles': self.quantiles(i, quantiles)
+                }
+        return result
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fastest supported sampling rate (10 Hz)
+MIN_INTERVAL = 0.1
+
+_RATE_UNITS = {'hz': None, 'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_interval(text):
+    """Seconds between samples for '10hz', '250ms', '5s', '1m', '1h' or a bare number of seconds"""
+    match = re.fullmatch(r'\s*([0-9]*\.?[0-9]+)\s*(hz|ms|s|m|h)?\s*', text.lower())
+    if not match:
+        raise ValueError(f"Invalid sampling rate: {text!r}")
+    value, unit = float(match.group(1)), match.group(2) or 's'
+    if value <= 0:
+        raise ValueError(f"Invalid sampling rate: {text!r}")
+    return 1.0 / value if unit == 'hz' else value * _RATE_UNITS[unit]
+
+
+def parse_sampling_rates(spec, sensors, default_interval=60.0):
+    """{sensor: interval seconds} from a spec like 'wind_speed=10hz,rainfall=5m'"""
+    intervals = {sensor: float(default_interval) for sensor in sensors}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, rate = item.partition('=')
+        name = name.strip()
+        if name == 'default':
+            intervals = {sensor: parse_interval(rate) for sensor in sensors}
+            continue
+        if name not in intervals:
+            raise ValueError(f"Unknown sensor in sampling rates: {name}")
+        intervals[name] = parse_interval(rate)
+    return intervals
+
+
+class SamplingScheduler:
+    """Periodic ticks for named channels on the monotonic clock
+
+    Tick ``k`` of a channel is due at ``start + k * interval`` (in integer
+    microseconds), so the schedule does not drift with callback time.
+    Channels due at the same instant are dispatched together. When the
+    callback falls behind, ``policy`` decides what happens to missed ticks:
+
+    - ``skip``: jump to the next tick in the future and count the skipped ones
+    - ``catch_up``: run every missed tick (with its own scheduled time), but
+      skip anything beyond ``max_catch_up`` ticks behind
+    """
+
+    POLICIES = ('skip', 'catch_up')
+
+    def __init__(self, intervals, policy='skip', max_catch_up=100, min_interval=MIN_INTERVAL,
+                 clock=time.monotonic, sleep=time.sleep, max_sleep=1.0, observe_lag=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        too_fast = [name for name, interval in intervals.items() if interval < min_interval - 1e-9]
+        if too_fast:
+            raise ValueError(f"Sampling faster than {1 / min_interval:g} Hz: {', '.join(too_fast)}")
+
+        self.intervals = dict(intervals)
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.max_sleep = max_sleep
+        self.observe_lag = observe_lag
+        self._interval_us = {name: max(1, round(interval * 1e6)) for name, interval in intervals.items()}
+
+        self.ticks = 0
+        self.skipped = 0
+        self.errors = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_avg = 0.0
+
+    def run(self, callback, running=lambda: True):
+        """Call ``callback(scheduled_at, channels)`` for every due tick while ``running()``
+
+        ``scheduled_at`` is the wall-clock datetime of the tick. Exceptions
+        from the callback are counted and logged; the schedule continues.
+        """
+        start_us = self._now_us()
+        wall_start = datetime.now()
+        ticks = {name: 0 for name in self.intervals}
+
+        while running():
+            due = {name: start_us + ticks[name] * self._interval_us[name] for name in ticks}
+            due_us = min(due.values())
+            delay = (due_us - self._now_us()) / 1e6
+            if delay > 0:
+                self.sleep(min(delay, self.max_sleep))
+                continue
+
+            channels = [name for name, at in due.items() if at == due_us]
+            self._record_lag((self._now_us() - due_us) / 1e6)
+            try:
+                callback(wall_start + timedelta(microseconds=due_us - start_us), channels)
+            except Exception as e:
+                self.errors += 1
+                logger.exception(f"Error in scheduled tick: {e}")
+            self.ticks += 1
+
+            now_us = self._now_us()
+            for name in channels:
+                ticks[name] += 1
+                interval = self._interval_us[name]
+                behind = (now_us - (start_us + ticks[name] * interval)) // interval
+                allowed = 0 if self.policy == 'skip' else self.max_catch_up
+                if behind >= allowed:
+                    missed = behind - allowed + 1 if self.policy == 'skip' else behind - allowed
+                    ticks[name] += missed
+                    self.skipped += missed
+
+    def _now_us(self):
+        return int(self.clock() * 1e6)
+
+    def _record_lag(self, lag):
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_avg = lag if self.ticks == 0 else 0.9 * self.lag_avg + 0.1 * lag
+        if self.observe_lag:
+            self.observe_lag(lag)
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'intervals': self.intervals,
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'lag_ms': {
+                'last': round(self.lag_last * 1000, 3),
+                'avg': round(self.lag_avg * 1000, 3),
+                'max': round(self.lag_max * 1000, 3)
+            }
+        }
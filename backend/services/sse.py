@@ -0,0 +1,127 @@
+from collections import deque
+import itertools
+import json
+import threading
+import time
+
+
+def encode_event(event_id, payload, event=None):
+    """One Server-Sent Events message as bytes"""
+    lines = [] if event_id is None else [f'id: {event_id}']
+    if event:
+        lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(payload, separators=(',', ':'), default=str))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class SSESubscriber:
+    """Bounded queue of encoded events for one client"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, channel, max_queue):
+        self.id = next(self._ids)
+        self.channel = channel
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.evicted = False
+        self.connected_at = time.time()
+
+
+class SSEBroadcaster:
+    """Fan-out of Server-Sent Events to many streaming responses
+
+    ``publish`` encodes an event once and appends the same bytes to the
+    queue of every subscriber of the channel. A subscriber whose queue is
+    full is evicted instead of slowing down everyone else; its stream ends
+    and the client reconnects with ``Last-Event-ID`` to resume. Streams
+    poll their queue with the injected ``sleep`` so they cooperate with the
+    server's green threads, and send a heartbeat comment when idle.
+    """
+
+    def __init__(self, max_queue=256, heartbeat=15.0, poll_interval=0.25, sleep=time.sleep):
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+        self._subscribers = {}  # channel -> {subscriber id: subscriber}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.evictions = 0
+
+    def has_subscribers(self, channel):
+        return bool(self._subscribers.get(channel))
+
+    def subscribe(self, channel):
+        subscriber = SSESubscriber(channel, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, {})[subscriber.id] = subscriber
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            channel = self._subscribers.get(subscriber.channel, {})
+            channel.pop(subscriber.id, None)
+            if not channel:
+                self._subscribers.pop(subscriber.channel, None)
+
+    def publish(self, channel, event_id, payload, event=None):
+        """Encode an event once and queue it for every subscriber of the channel"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, {}).values())
+        if not subscribers:
+            return 0
+
+        message = (event_id, encode_event(event_id, payload, event))
+        self.published += 1
+        for subscriber in subscribers:
+            if len(subscriber.queue) >= subscriber.max_queue:
+                subscriber.evicted = True
+                self.evictions += 1
+                self.unsubscribe(subscriber)
+                continue
+            subscriber.queue.append(message)
+            self.delivered += 1
+        return len(subscribers)
+
+    def stream(self, subscriber, replay=(), retry_ms=5000):
+        """Generator of response chunks: replayed events, then live ones until evicted"""
+        try:
+            yield f'retry: {retry_ms}\n\n'.encode('utf-8')
+            last_id = None
+            for event_id, message in replay:
+                last_id = event_id
+                yield message
+
+            idle_since = time.monotonic()
+            while not subscriber.evicted:
+                if subscriber.queue:
+                    event_id, message = subscriber.queue.popleft()
+                    # Events already sent as part of the replay are skipped
+                    if last_id is None or event_id > last_id:
+                        last_id = event_id
+                        yield message
+                    idle_since = time.monotonic()
+                    continue
+                if time.monotonic() - idle_since >= self.heartbeat:
+                    yield b': heartbeat\n\n'
+                    idle_since = time.monotonic()
+                self.sleep(self.poll_interval)
+
+            yield encode_event(last_id, {'reason': 'slow consumer'}, event='evicted')
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            subscribers = [s for channel in self._subscribers.values() for s in channel.values()]
+        return {
+            'subscribers': len(subscribers),
+            'channels': len(self._subscribers),
+            'max_queue': self.max_queue,
+            'published': self.published,
+            'delivered': self.delivered,
+            'evictions': self.evictions,
+            'max_backlog': max((len(s.queue) for s in subscribers), default=0)
+        }
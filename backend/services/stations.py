@@ -0,0 +1,139 @@
+import threading
+import numpy as np
+from services.data_generator import DEFAULT_LOCATION
+from services.rollups import RollupStore
+from services.running_stats import RunningStats
+from services.timeseries_store import SensorRingBuffer
+
+
+class UnknownStationError(LookupError):
+    """Raised when a request names a station this backend does not serve"""
+
+
+class StationData:
+    """Recorded readings of one station: raw ring buffer, rollups and running statistics"""
+
+    def __init__(self, station_id, sensors, capacity, ranges, location=DEFAULT_LOCATION):
+        self.station_id = station_id
+        metadata = {'location': location, 'station_id': station_id}
+        self.buffer = SensorRingBuffer(sensors, capacity=capacity, metadata=metadata)
+        self.rollups = RollupStore(sensors, metadata=metadata)
+        self.stats = RunningStats(sensors, ranges)
+        self.current = {}
+        self.seeded = False
+        self.lock = threading.Lock()  # serialises backfill, sampled and ingested appends
+
+    def append(self, reading):
+        """Record one reading dict; returns False if it is not newer than the last one"""
+        if not self.buffer.append(reading):
+            return False
+        self.rollups.ingest(reading)
+        self.stats.update(reading)
+        self.current = reading
+        return True
+
+    def extend(self, columns):
+        """Record a block of columnar readings (backfill)"""
+        self.buffer.extend(columns)
+        self.rollups.ingest_columns(columns['timestamp'], columns)
+        self.stats.update_columns(columns)
+
+
+class StationRegistry:
+    """Per-station stores for a fixed set of stations, created on first use
+
+    Each station costs roughly ``capacity * (8 + 4 * n_sensors)`` bytes of raw
+    buffer plus its rollup tiers, so the capacity is usually lowered when
+    many stations are served from one process.
+    """
+
+    def __init__(self, station_ids, sensors, ranges, capacity=131072, location=DEFAULT_LOCATION):
+        self.station_ids = list(dict.fromkeys(station_ids))
+        self.sensors = list(sensors)
+        self.ranges = ranges
+        self.capacity = capacity
+        self.location = location
+        self._stations = {}
+        self._lock = threading.Lock()
+
+    @property
+    def default_station(self):
+        return self.station_ids[0]
+
+    def __contains__(self, station_id):
+        return station_id in self.station_ids
+
+    def resolve(self, station_id=None):
+        """Station id to use for a request; raises UnknownStationError for unknown stations"""
+        station_id = station_id or self.default_station
+        if station_id not in self.station_ids:
+            raise UnknownStationError(f"Unknown station: {station_id}")
+        return station_id
+
+    def get(self, station_id=None):
+        """StationData for a station (the default station when None)"""
+        station_id = self.resolve(station_id)
+        station = self._stations.get(station_id)
+        if station is None:
+            with self._lock:
+                station = self._stations.get(station_id)
+                if station is None:
+                    station = StationData(
+                        station_id, self.sensors, self.capacity, self.ranges, self.location
+                    )
+                    self._stations[station_id] = station
+        return station
+
+    def append_columns(self, columns):
+        """Record one tick of readings, one row per station (see generate_station_readings)"""
+        return self.update_columns(columns, record=True)
+
+    def update_columns(self, columns, record=False):
+        """Merge one tick of samples into each station's current reading
+
+        ``columns`` may hold only some sensors; the others keep their last
+        value. With ``record`` the merged readings are also appended to the
+        stations' stores; otherwise only the min/max of the sampled sensors
+        reach the rollups, so peaks between recorded readings still show in
+        the hourly and daily buckets. Returns the merged readings.
+        """
+        station_ids = columns['station_id'].tolist()
+        timestamps = np.datetime_as_string(columns['timestamp'], unit='us').tolist()
+        values = {sensor: columns[sensor].tolist() for sensor in self.sensors if sensor in columns}
+        if not record and values:
+            # Samples that are not recorded only widen the rollup min/max
+            epoch_ms = columns['timestamp'].astype('datetime64[ms]').astype(np.int64).tolist()
+            extremes = np.full((len(station_ids), len(self.sensors)), np.nan)
+            for i, sensor in enumerate(self.sensors):
+                if sensor in values:
+                    extremes[:, i] = columns[sensor]
+
+        readings = []
+        for i, station_id in enumerate(station_ids):
+            station = self.get(station_id)
+            # Held against readings pushed to /api/sensors/ingest at the same time
+            with station.lock:
+                reading = dict(station.current)
+                reading['timestamp'] = timestamps[i]
+                reading.update({sensor: column[i] for sensor, column in values.items()})
+                reading['location'] = self.location
+                reading['station_id'] = station_id
+                if not record:
+                    station.current = reading
+                    if values:
+                        station.rollups.ingest_extremes(epoch_ms[i], extremes[i])
+                elif not station.append(reading):
+                    station.current = reading
+            readings.append(reading)
+        return readings
+
+    def current(self, station_id=None):
+        """Latest reading of a station, or an empty dict"""
+        return self.get(station_id).current
+
+    def stats(self):
+        return {
+            'stations': len(self.station_ids),
+            'active': len(self._stations),
+            'capacity_per_station': self.capacity
+        }
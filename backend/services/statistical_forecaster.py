@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class StatisticalForecaster:
+    """Local forecasting engine that fits many series at once with NumPy
+
+    Every method takes a 2-D array of shape (n_series, n_observations) on a
+    regular time grid and returns an array of shape (n_series, horizon).
+    Missing values are carried forward before fitting.
+    """
+
+    methods = ('holt_winters', 'seasonal_naive', 'drift')
+
+    def __init__(self, alpha=0.3, beta=0.05, gamma=0.2, phi=0.98, max_seasons=8):
+        self.alpha = alpha  # level smoothing
+        self.beta = beta    # trend smoothing
+        self.gamma = gamma  # seasonal smoothing
+        self.phi = phi      # trend damping
+        self.max_seasons = max_seasons  # history used to fit Holt-Winters
+
+    def forecast(self, values, horizon, season_length=1, method='holt_winters'):
+        """Forecast every row of values ``horizon`` steps ahead"""
+        values = self._fill_missing(np.atleast_2d(np.asarray(values, dtype=np.float64)))
+        if values.shape[1] == 0:
+            raise ValueError("Cannot forecast an empty series")
+
+        if method == 'holt_winters':
+            return self.holt_winters(values, horizon, season_length)
+        if method == 'seasonal_naive':
+            return self.seasonal_naive(values, horizon, season_length)
+        if method == 'drift':
+            return self.drift(values, horizon)
+        raise ValueError(f"Unknown forecasting method: {method}")
+
+    def seasonal_naive(self, values, horizon, season_length):
+        """Repeat the last observed season"""
+        season_length = min(max(1, season_length), values.shape[1])
+        last_season = values[:, -season_length:]
+        return last_season[:, np.arange(horizon) % season_length]
+
+    def drift(self, values, horizon):
+        """Extend the line through the first and last observation"""
+        n = values.shape[1]
+        slope = (values[:, -1] - values[:, 0]) / max(1, n - 1)
+        return values[:, -1:] + slope[:, None] * np.arange(1, horizon + 1)
+
+    def holt_winters(self, values, horizon, season_length):
+        """Additive Holt-Winters with damped trend
+
+        Falls back to damped Holt (no seasonality) when fewer than two full
+        seasons are available.
+        """
+        m = max(1, season_length)
+        seasonal = m > 1 and values.shape[1] >= 2 * m
+        if not seasonal:
+            m = 1
+
+        # Fit on a bounded window so cost does not grow with retention
+        window = values[:, -self.max_seasons * m:] if seasonal else values[:, -256:]
+        n_series, n = window.shape
+
+        if seasonal:
+            first, second = window[:, :m], window[:, m:2 * m]
+            level = first.mean(axis=1)
+            trend = (second.mean(axis=1) - level) / m
+            season = first - level[:, None]
+            start = m
+        else:
+            level = window[:, 0].copy()
+            trend = (window[:, min(1, n - 1)] - window[:, 0]) if n > 1 else np.zeros(n_series)
+            season = np.zeros((n_series, 1))
+            start = 1
+
+        alpha, beta, gamma, phi = self.alpha, self.beta, self.gamma, self.phi
+        for t in range(start, n):
+            s = t % m
+            observed = window[:, t]
+            previous_level = level
+            level = alpha * (observed - season[:, s]) + (1 - alpha) * (previous_level + phi * trend)
+            trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+            if seasonal:
+                season[:, s] = gamma * (observed - level) + (1 - gamma) * season[:, s]
+
+        steps = np.arange(1, horizon + 1)
+        damping = np.cumsum(phi ** steps)
+        forecast = level[:, None] + trend[:, None] * damping
+        if seasonal:
+            forecast += season[:, (n + steps - 1) % m]
+        return forecast
+
+    @staticmethod
+    def _fill_missing(values):
+        """Carry the last valid value forward (and the first one backward)"""
+        mask = np.isnan(values)
+        if not mask.any():
+            return values
+        n = values.shape[1]
+        index = np.where(mask, 0, np.arange(n))
+        np.maximum.accumulate(index, axis=1, out=index)
+        filled = np.take_along_axis(values, index, axis=1)
+
+        # Leading gaps take the first valid value of the row
+        first_valid = np.argmax(~mask, axis=1)
+        leading = np.isnan(filled)
+        filled[leading] = np.take_along_axis(values, first_valid[:, None], axis=1).repeat(n, axis=1)[leading]
+        return np.nan_to_num(filled)
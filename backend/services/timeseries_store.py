@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import threading
+from utils.downsampling import minmax_buckets, lttb_indices
+from services.prepared_dataset import PreparedDataset
+
+
+def to_epoch_ms(timestamp):
+    """Convert an ISO string, datetime or datetime64 to integer milliseconds"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return int(np.datetime64(timestamp, 'ms').astype(np.int64))
+
+
+class TimeSeriesSlice:
+    """Read-only view over a time range of a SensorRingBuffer
+
+    A range that wraps around the end of the ring is held as two segments.
+    Nothing is copied until a contiguous array, frame or record list is
+    requested.
+    """
+
+    def __init__(self, sensors, segments, metadata=None):
+        self.sensors = sensors
+        self.segments = segments  # list of (timestamps, {sensor: values})
+        self.metadata = metadata or {}
+
+    def __len__(self):
+        return sum(len(timestamps) for timestamps, _ in self.segments)
+
+    def _join(self, arrays):
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.concatenate(arrays)
+
+    def timestamps(self):
+        """Epoch-millisecond timestamps of the slice"""
+        if not self.segments:
+            return np.empty(0, dtype=np.int64)
+        return self._join([timestamps for timestamps, _ in self.segments])
+
+    def column(self, sensor):
+        """Values of one sensor over the slice"""
+        if not self.segments:
+            return np.empty(0, dtype=np.float32)
+        return self._join([values[sensor] for _, values in self.segments])
+
+    def to_columns(self):
+        """Columnar dict with a datetime64 ``timestamp`` array and one array per sensor"""
+        columns = {'timestamp': self.timestamps().astype('datetime64[ms]')}
+        for sensor in self.sensors:
+            columns[sensor] = self.column(sensor)
+        return columns
+
+    def decimate(self, limit):
+        """Evenly spaced subset of at most ``limit`` readings"""
+        n = len(self)
+        if limit is None or n <= limit:
+            return self
+        indices = np.linspace(0, n - 1, max(1, limit)).astype(np.int64)
+        timestamps = self.timestamps()[indices]
+        values = {sensor: self.column(sensor)[indices] for sensor in self.sensors}
+        return TimeSeriesSlice(self.sensors, [(timestamps, values)], self.metadata)
+
+    def downsample(self, max_points, method='minmax', sensor='temperature'):
+        """Chart-sized subset of at most ``max_points`` rows
+
+        ``minmax`` reduces each time bucket to its mean with ``_min`` and
+        ``_max`` companions (spike sensors keep their bucket maximum);
+        ``lttb`` keeps the raw rows selected by LTTB on ``sensor``.
+        """
+        n = len(self)
+        if max_points is None or n <= max_points:
+            return self
+        timestamps = self.timestamps()
+
+        if method == 'lttb':
+            if sensor not in self.sensors:
+                raise ValueError(f"Unknown sensor: {sensor}")
+            indices = lttb_indices(timestamps, self.column(sensor), max_points)
+            values = {name: self.column(name)[indices] for name in self.sensors}
+            return TimeSeriesSlice(self.sensors, [(timestamps[indices], values)], self.metadata)
+
+        if method == 'minmax':
+            starts, values, _ = minmax_buckets(
+                timestamps, {name: self.column(name) for name in self.sensors}, max_points
+            )
+            return TimeSeriesSlice(list(values), [(starts, values)], self.metadata)
+
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    def to_frame(self):
+        """pandas DataFrame in the layout expected by the ML service"""
+        columns = self.to_columns()
+        for sensor in self.sensors:
+            columns[sensor] = columns[sensor].astype(np.float64)
+        frame = pd.DataFrame(columns)
+        frame.attrs.update(self.metadata)
+        return frame
+
+    def to_prepared(self):
+        """PreparedDataset for the ML service, built without an intermediate DataFrame"""
+        return PreparedDataset.from_columns(self.to_columns(), self.sensors, dict(self.metadata))
+
+    def to_records(self):
+        """List of reading dicts in the format returned by the API"""
+        timestamps = np.datetime_as_string(self.timestamps().astype('datetime64[ms]')).tolist()
+        values = [np.round(self.column(sensor).astype(np.float64), 2).tolist() for sensor in self.sensors]
+
+        records = []
+        for i, timestamp in enumerate(timestamps):
+            reading = {'timestamp': timestamp}
+            for sensor, column in zip(self.sensors, values):
+                reading[sensor] = column[i]
+            reading.update(self.metadata)
+            records.append(reading)
+        return records
+
+
+class SensorRingBuffer:
+    """Fixed-capacity, in-process store of recorded sensor readings
+
+    Each sensor is a float32 column and timestamps are an int64 column of
+    epoch milliseconds. Readings must arrive in timestamp order; appends are
+    O(1) and time-range reads return views into the ring.
+    """
+
+    def __init__(self, sensors, capacity=131072, metadata=None):
+        self.sensors = list(sensors)
+        self.capacity = int(capacity)
+        self.metadata = metadata or {}
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self.values = {
+            sensor: np.full(self.capacity, np.nan, dtype=np.float32)
+            for sensor in self.sensors
+        }
+        self._head = 0  # next write position
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def latest_timestamp(self):
+        """Epoch milliseconds of the newest reading, or None when empty"""
+        if self._size == 0:
+            return None
+        return int(self.timestamps[(self._head - 1) % self.capacity])
+
+    def append(self, reading):
+        """Append one reading dict; returns False if it is not newer than the latest"""
+        timestamp = to_epoch_ms(reading.get('timestamp', datetime.now()))
+
+        with self._lock:
+            latest = self.latest_timestamp
+            if latest is not None and timestamp <= latest:
+                return False
+
+            position = self._head
+            self.timestamps[position] = timestamp
+            for sensor in self.sensors:
+                value = reading.get(sensor)
+                self.values[sensor][position] = np.nan if value is None else value
+
+            self._head = (position + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+        return True
+
+    def extend(self, columns):
+        """Append columnar readings (sorted by timestamp) in one operation
+
+        Rows that are not newer than the latest stored reading are skipped.
+        Returns the number of rows written.
+        """
+        timestamps = np.asarray(columns['timestamp'])
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+
+        with self._lock:
+            latest = self.latest_timestamp
+            start = 0 if latest is None else int(np.searchsorted(timestamps, latest, side='right'))
+            # Only the newest ``capacity`` rows can be kept
+            start = max(start, len(timestamps) - self.capacity)
+            count = len(timestamps) - start
+            if count <= 0:
+                return 0
+
+            positions = (self._head + np.arange(count)) % self.capacity
+            self.timestamps[positions] = timestamps[start:]
+            for sensor in self.sensors:
+                if sensor in columns:
+                    self.values[sensor][positions] = np.asarray(columns[sensor])[start:]
+                else:
+                    self.values[sensor][positions] = np.nan
+
+            self._head = (self._head + count) % self.capacity
+            self._size = min(self._size + count, self.capacity)
+        return count
+
+    def latest(self):
+        """Newest reading as a dict, or None when empty"""
+        if self._size == 0:
+            return None
+        records = self.slice(start_ms=self.latest_timestamp).to_records()
+        return records[-1] if records else None
+
+    def _segments(self):
+        """Physical (start, stop) ranges of the ring in chronological order"""
+        with self._lock:
+            head, size = self._head, self._size
+        start = (head - size) % self.capacity
+        if start + size <= self.capacity:
+            return [(start, start + size)]
+        return [(start, self.capacity), (0, head)]
+
+    def slice(self, start_ms=None, end_ms=None):
+        """Readings with start_ms <= timestamp <= end_ms, as views into the ring"""
+        segments = []
+        for lo, hi in self._segments():
+            timestamps = self.timestamps[lo:hi]
+            first = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+            last = len(timestamps) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='right'))
+            if last > first:
+                segments.append((
+                    timestamps[first:last],
+                    {sensor: self.values[sensor][lo:hi][first:last] for sensor in self.sensors}
+                ))
+        return TimeSeriesSlice(self.sensors, segments, self.metadata)
+
+    def window(self, days=None, hours=None, end=None):
+        """Readings from the last ``days``/``hours`` up to ``end`` (default: now)"""
+        end = end or datetime.now()
+        span = (days or 0) * 86400000 + (hours or 0) * 3600000
+        end_ms = to_epoch_ms(end)
+        return self.slice(start_ms=end_ms - span if span else None, end_ms=end_ms)
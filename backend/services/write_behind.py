@@ -0,0 +1,170 @@
+import logging
+from collections import deque
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Collect items in memory and flush them in batches on a background thread
+
+    A batch is flushed once ``max_batch`` items are pending or the oldest
+    pending item is ``max_age`` seconds old. Failed flushes are retried with
+    exponential backoff; a batch that still fails after ``max_retries`` is
+    dropped and counted. At most ``max_pending`` items are held:
+
+    - ``drop_oldest``: discard the oldest pending item to make room
+    - ``drop_newest``: reject the new item
+    - ``block``: wait up to ``put_timeout`` seconds for room, then reject
+    """
+
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, flush_fn, max_batch=500, max_age=5.0, max_pending=10000,
+                 overflow='drop_oldest', put_timeout=1.0, max_retries=5,
+                 backoff=0.5, max_backoff=30.0):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._pending = deque()  # (enqueued_at, item)
+        self._condition = threading.Condition()
+        self._worker = None
+        self._closed = False
+        self._flush_requested = False
+        self._in_flight = 0
+
+        self.accepted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped_overflow = 0
+        self.dropped_failed = 0
+
+    def put(self, item):
+        """Queue an item for writing; returns False if it was rejected"""
+        with self._condition:
+            if self._closed:
+                return False
+
+            if len(self._pending) >= self.max_pending:
+                if self.overflow == 'drop_oldest':
+                    self._pending.popleft()
+                    self.dropped_overflow += 1
+                elif self.overflow == 'drop_newest':
+                    self.dropped_overflow += 1
+                    return False
+                else:
+                    has_room = self._condition.wait_for(
+                        lambda: len(self._pending) < self.max_pending or self._closed,
+                        timeout=self.put_timeout
+                    )
+                    if not has_room or self._closed:
+                        self.dropped_overflow += 1
+                        return False
+
+            self._pending.append((time.monotonic(), item))
+            self.accepted += 1
+            self._ensure_worker()
+            # Wake the worker to start the age timer or flush a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify_all()
+        return True
+
+    def flush(self, timeout=10.0):
+        """Ask the worker to write everything pending and wait for it"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_flight,
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+
+    def close(self, timeout=10.0):
+        """Flush pending items and stop the worker"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        """Wait until a batch is due and take it off the queue"""
+        with self._condition:
+            while True:
+                if self._pending:
+                    age = time.monotonic() - self._pending[0][0]
+                    if (self._closed or self._flush_requested
+                            or len(self._pending) >= self.max_batch or age >= self.max_age):
+                        break
+                    self._condition.wait(self.max_age - age)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+            count = min(self.max_batch, len(self._pending))
+            batch = [self._pending.popleft()[1] for _ in range(count)]
+            if not self._pending:
+                self._flush_requested = False
+            self._in_flight = count
+            self._condition.notify_all()  # wake producers blocked on a full buffer
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            delay = self.backoff
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.flush_fn(batch)
+                    self.flushed += len(batch)
+                    self.batches += 1
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"Dropping {len(batch)} buffered writes after {attempt + 1} attempts: {e}")
+                        self.dropped_failed += len(batch)
+                        break
+                    self.retries += 1
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'pending': len(self._pending),
+                'accepted': self.accepted,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'retries': self.retries,
+                'dropped_overflow': self.dropped_overflow,
+                'dropped_failed': self.dropped_failed,
+                'max_pending': self.max_pending,
+                'overflow': self.overflow
+            }
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds; override on slow CI machines
+BUDGET = float(os.environ.get('COLD_START_BUDGET', 5))
+IMPORT_BUDGET = float(os.environ.get('COLD_START_IMPORT_BUDGET', 3))
+
+
+def test_cold_start_within_budget():
+    # Offline: the app's warm-up would otherwise reach TimeGPT and Supabase
+    result = subprocess.run(
+        [sys.executable, os.path.join('benchmarks', 'cold_start.py'), '--runs', '1', '--offline',
+         '--budget', str(BUDGET), '--import-budget', str(IMPORT_BUDGET)],
+        cwd=BACKEND_DIR, env=dict(os.environ, PERSIST_READINGS='false'),
+        capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stderr
+
+    measured = json.loads(result.stdout)
+    assert measured['import_seconds'] <= IMPORT_BUDGET
+    assert measured['first_health_seconds'] <= BUDGET
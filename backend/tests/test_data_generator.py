@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from services.data_generator import WeatherDataGenerator, _clamped_recurrence
+
+MOMENTUM_SENSORS = ['humidity', 'temperature', 'light_intensity', 'wind_speed']
+
+
+def minutes(days, start='2024-01-01T00:00'):
+    return np.datetime64(start) + np.arange(days * 1440) * np.timedelta64(1, 'm')
+
+
+def stepwise(generator, timestamps):
+    """Reference series from one generate_realistic_value call per reading"""
+    previous = dict(generator.base_values)
+    columns = {sensor: np.empty(len(timestamps)) for sensor in MOMENTUM_SENSORS}
+    for i, timestamp in enumerate(timestamps.astype('datetime64[us]').tolist()):
+        for sensor in MOMENTUM_SENSORS:
+            previous[sensor] = columns[sensor][i] = generator.generate_realistic_value(sensor, timestamp, previous[sensor])
+    return columns
+
+
+@pytest.mark.parametrize('n', [1, 31, 32, 33, 1000, 5000])
+@pytest.mark.parametrize('start', [0.0, 12.5, 25.0])
+def test_clamped_recurrence_matches_per_reading_loop(n, start):
+    rng = np.random.default_rng(n)
+    gust = np.where(rng.random(n) > 0.9, rng.uniform(1.5, 2.5, n), 1.0)
+    innovation = rng.uniform(0, 6, n) + rng.normal(0, 3, n)
+    
+    slope, offset, low, high = _clamped_recurrence(0.8 * gust, innovation * gust, 0 * gust, 25 * gust)
+    
+    expected, value = [], start
+    for t in range(n):
+        value = gust[t] * min(25.0, max(0.0, 0.8 * value + innovation[t]))
+        expected.append(value)
+    np.testing.assert_allclose(np.clip(slope * start + offset, low, high), expected, rtol=0, atol=1e-9)
+
+
+def test_generated_distribution_matches_per_reading_generator():
+    timestamps = minutes(7)
+    reference = {sensor: [] for sensor in MOMENTUM_SENSORS}
+    generated = {sensor: [] for sensor in MOMENTUM_SENSORS}
+    for seed in range(4):
+        generator = WeatherDataGenerator(seed=seed)
+        for sensor, values in stepwise(generator, timestamps).items():
+            reference[sensor].append(values)
+        columns = generator.generate_columns(timestamps)
+        for sensor in MOMENTUM_SENSORS:
+            generated[sensor].append(columns[sensor])
+    
+    for sensor in MOMENTUM_SENSORS:
+        low, high, _ = WeatherDataGenerator().ranges[sensor]
+        span = high - low
+        expected, actual = np.concatenate(reference[sensor]), np.concatenate(generated[sensor])
+        assert abs(actual.mean() - expected.mean()) < 0.02 * span, sensor
+        assert abs(actual.std() / expected.std() - 1) < 0.08, sensor
+        quantiles = [5, 25, 50, 75, 95]
+        np.testing.assert_allclose(
+            np.percentile(actual, quantiles), np.percentile(expected, quantiles), rtol=0, atol=0.05 * span,
+            err_msg=sensor
+        )
+
+
+def test_generated_values_stay_in_range():
+    generator = WeatherDataGenerator(seed=0)
+    columns = generator.generate_columns(minutes(3))
+    for sensor, (low, high, _) in generator.ranges.items():
+        if sensor == 'wind_speed':
+            # Gusts are applied after the clamp
+            assert columns[sensor].min() >= 0
+        elif sensor in MOMENTUM_SENSORS:
+            assert low <= columns[sensor].min() and columns[sensor].max() <= high, sensor
+
+
+def assert_same_columns(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        assert a[name].dtype == b[name].dtype, name
+        np.testing.assert_array_equal(a[name], b[name], err_msg=name)
+
+
+def test_output_does_not_depend_on_worker_count():
+    timestamps = minutes(2)
+    stations = ['KLIMACEK_001', 'KLIMACEK_002']
+    single = WeatherDataGenerator(seed=3).generate_dataset(stations, timestamps, workers=1, chunk_rows=500)
+    pooled = WeatherDataGenerator(seed=3).generate_dataset(stations, timestamps, workers=3, chunk_rows=500)
+
+    assert list(single) == list(pooled) == stations
+    for station_id in stations:
+        assert_same_columns(single[station_id], pooled[station_id])
+
+
+def test_output_is_reproducible_per_seed():
+    timestamps = minutes(2)
+    generator = WeatherDataGenerator(seed=11)
+    first = generator.generate_columns(timestamps)
+    # Live readings draw from their own stream and don't disturb history
+    generator.generate_station_readings(['KLIMACEK_001', 'KLIMACEK_002'])
+
+    assert_same_columns(first, generator.generate_columns(timestamps))
+    assert_same_columns(first, WeatherDataGenerator(seed=11).generate_columns(timestamps))
+    other = WeatherDataGenerator(seed=12).generate_columns(timestamps)
+    assert not np.array_equal(first['temperature'], other['temperature'])
+
+
+def test_stations_get_independent_series():
+    dataset = WeatherDataGenerator(seed=5).generate_dataset(['A', 'B'], minutes(2), workers=1)
+    a, b = dataset['A'], dataset['B']
+
+    np.testing.assert_array_equal(a['timestamp'], b['timestamp'])
+    for sensor in MOMENTUM_SENSORS + ['rainfall', 'solar_voltage']:
+        assert not np.array_equal(a[sensor], b[sensor]), sensor
+    assert abs(np.corrcoef(a['wind_speed'], b['wind_speed'])[0, 1]) < 0.5
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from utils.downsampling import lttb_indices, minmax_buckets, time_buckets
+
+
+def reference_lttb(x, y, max_points):
+    """Textbook LTTB, one bucket at a time"""
+    n = len(x)
+    every = (n - 2) / (max_points - 2)
+    selected, anchor = [0], 0
+    for i in range(max_points - 2):
+        lo, hi = int(1 + i * every), int(1 + (i + 1) * every)
+        if i == max_points - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_hi = int(1 + (i + 2) * every)
+            next_x, next_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        areas = [abs((x[anchor] - next_x) * (y[j] - y[anchor]) - (x[anchor] - x[j]) * (next_y - y[anchor]))
+                 for j in range(lo, hi)]
+        anchor = lo + int(np.argmax(areas))
+        selected.append(anchor)
+    return selected + [n - 1]
+
+
+@pytest.mark.parametrize('n, max_points', [(100, 10), (1000, 37), (501, 3), (10, 9)])
+def test_lttb_matches_reference(n, max_points):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(1, 3, n))
+    y = np.cumsum(rng.normal(size=n))
+
+    indices = lttb_indices(x, y, max_points)
+
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+    assert indices.tolist() == reference_lttb(x - x[0], y, max_points)
+
+
+def test_lttb_keeps_the_spike():
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[613] = 50.0
+    assert 613 in lttb_indices(x, y, 20)
+
+
+@pytest.mark.parametrize('max_points', [5, 6, 100, 2])
+def test_lttb_returns_every_point_when_there_is_nothing_to_reduce(max_points):
+    indices = lttb_indices(np.arange(5.0), np.arange(5.0), max_points)
+    assert indices.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_minmax_buckets_reduce_each_bucket():
+    timestamps = np.arange(12) * 1000
+    temperature = np.arange(12.0)
+    rainfall = np.zeros(12)
+    rainfall[5] = 8.0
+    temperature[1] = np.nan
+
+    starts, reduced, counts = minmax_buckets(timestamps, {'temperature': temperature, 'rainfall': rainfall}, 4)
+
+    assert counts.tolist() == [3, 3, 3, 3] and counts.sum() == 12
+    assert starts.tolist() == [0, 3000, 6000, 9000]
+    np.testing.assert_allclose(reduced['temperature'], [1.0, 4.0, 7.0, 10.0])  # NaN left out of the mean
+    assert reduced['temperature_min'].tolist() == [0.0, 3.0, 6.0, 9.0]
+    assert reduced['temperature_max'].tolist() == [2.0, 5.0, 8.0, 11.0]
+    # Peak sensors keep the bucket maximum
+    assert reduced['rainfall'].tolist() == [0.0, 8.0, 0.0, 0.0]
+
+
+def test_minmax_buckets_skip_gaps_and_all_missing_buckets():
+    timestamps = np.array([0, 1, 2, 90, 99]) * 1000
+    values = np.array([1.0, 2.0, 3.0, np.nan, np.nan])
+
+    starts, reduced, counts = minmax_buckets(timestamps, {'temperature': values}, 10)
+
+    # Empty time buckets in the gap produce no rows
+    assert starts.tolist() == [0, 90000]
+    assert counts.tolist() == [3, 2]
+    assert reduced['temperature'][0] == 2.0
+    assert np.isnan(reduced['temperature'][1]) and np.isnan(reduced['temperature_max'][1])
+
+
+def test_time_buckets_edge_cases():
+    assert time_buckets(np.empty(0, dtype=np.int64), 10).size == 0
+    assert time_buckets(np.full(5, 7000), 3).tolist() == [0]
+    assert time_buckets(np.arange(4), 10).tolist() == [0, 1, 2, 3]
@@ -0,0 +1,132 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+
+from services.export import ChunkedExporter, page_chunks, records_chunks, slice_chunks
+from services.timeseries_store import SensorRingBuffer
+
+SENSORS = ['temperature', 'rainfall']
+START = np.datetime64('2024-03-01T00:00', 'ms')
+
+
+def ring_slice(rows, capacity=16):
+    """Slice of a ring that has wrapped, so it has two segments"""
+    buffer = SensorRingBuffer(SENSORS, capacity=capacity)
+    minutes = np.arange(rows + capacity // 2)
+    temperature = 20 + minutes / 3
+    rainfall = np.where(minutes % 4 == 0, np.nan, minutes * 0.25)
+    columns = {
+        'timestamp': START + minutes * np.timedelta64(1, 'm'),
+        'temperature': temperature,
+        'rainfall': rainfall
+    }
+    half = len(minutes) // 2
+    buffer.extend({name: values[:half] for name, values in columns.items()})
+    buffer.extend({name: values[half:] for name, values in columns.items()})
+    return buffer.slice()
+
+
+def expected_frame(window):
+    return pd.DataFrame({
+        'timestamp': window.timestamps().astype('datetime64[ms]'),
+        'station_id': 'KLIMACEK_001',
+        'temperature': np.round(window.column('temperature').astype(np.float64), 2),
+        'rainfall': np.round(window.column('rainfall').astype(np.float64), 2)
+    })
+
+
+def export(fmt, window, chunk_rows=5):
+    exporter = ChunkedExporter(fmt, SENSORS)
+    pieces = list(exporter.stream(slice_chunks(window, 'KLIMACEK_001', chunk_rows)))
+    return b''.join(pieces), pieces
+
+
+def read_csv(data):
+    frame = pd.read_csv(io.BytesIO(data), dtype={'station_id': str})
+    frame['timestamp'] = pd.to_datetime(frame['timestamp']).astype('datetime64[ms]')
+    return frame
+
+
+def test_ring_slice_has_two_segments():
+    assert len(ring_slice(12).segments) == 2
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz'])
+def test_csv_round_trip(fmt):
+    window = ring_slice(12)
+    data, pieces = export(fmt, window)
+    if fmt == 'csv.gz':
+        data = gzip.decompress(data)
+    else:
+        # Header, then one piece per chunk
+        assert len(pieces) == 1 + len(list(slice_chunks(window, 'KLIMACEK_001', 5)))
+
+    assert data.splitlines()[0] == b'timestamp,station_id,temperature,rainfall'
+    pd.testing.assert_frame_equal(read_csv(data), expected_frame(window))
+
+
+def test_parquet_round_trip_has_a_row_group_per_chunk():
+    window = ring_slice(12)
+    data, _ = export('parquet', window)
+
+    parquet = pyarrow.parquet.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == len(list(slice_chunks(window, 'KLIMACEK_001', 5)))
+    frame = parquet.read().to_pandas()
+    pd.testing.assert_frame_equal(frame, expected_frame(window), check_dtype=False)
+    assert frame['timestamp'].dtype == 'datetime64[ms]'
+
+
+def test_arrow_round_trip_has_a_batch_per_chunk():
+    window = ring_slice(12)
+    data, _ = export('arrow', window, chunk_rows=7)
+
+    reader = pyarrow.ipc.open_stream(io.BytesIO(data))
+    batches = list(reader)
+    assert [len(batch) for batch in batches] == [len(c['timestamp']) for c in slice_chunks(window, 'x', 7)]
+    frame = pyarrow.Table.from_batches(batches).to_pandas()
+    pd.testing.assert_frame_equal(frame, expected_frame(window), check_dtype=False)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz', 'parquet', 'arrow'])
+def test_zero_row_export_is_a_valid_empty_file(fmt):
+    empty = SensorRingBuffer(SENSORS, capacity=4).slice()
+    data, _ = export(fmt, empty)
+
+    if fmt == 'csv':
+        assert data == b'timestamp,station_id,temperature,rainfall\n'
+    elif fmt == 'csv.gz':
+        assert gzip.decompress(data) == b'timestamp,station_id,temperature,rainfall\n'
+    elif fmt == 'parquet':
+        table = pyarrow.parquet.read_table(io.BytesIO(data))
+        assert table.num_rows == 0 and table.column_names == ['timestamp', 'station_id'] + SENSORS
+    else:
+        table = pyarrow.ipc.open_stream(io.BytesIO(data)).read_all()
+        assert table.num_rows == 0 and table.column_names == ['timestamp', 'station_id'] + SENSORS
+
+
+def test_record_and_page_chunks_export_like_slices():
+    window = ring_slice(12)
+    records = window.to_records()
+    for record in records:
+        record['station_id'] = 'KLIMACEK_001'
+        record['location'] = 'Surakarta'
+    pages = [(window.timestamps()[:10], {s: window.column(s)[:10] for s in SENSORS}),
+             (window.timestamps()[10:], {s: window.column(s)[10:] for s in SENSORS})]
+
+    exporter = ChunkedExporter('csv', SENSORS)
+    from_records = b''.join(exporter.stream(records_chunks(records, chunk_rows=7)))
+    from_pages = b''.join(exporter.stream(page_chunks(pages, 'KLIMACEK_001')))
+
+    pd.testing.assert_frame_equal(read_csv(from_records), expected_frame(window))
+    pd.testing.assert_frame_equal(read_csv(from_pages), expected_frame(window))
+
+
+def test_unknown_format_is_rejected_up_front():
+    with pytest.raises(ValueError):
+        ChunkedExporter('xlsx', SENSORS)
+    assert ChunkedExporter('csv.gz', SENSORS).filename('sensors') == 'sensors.csv.gz'
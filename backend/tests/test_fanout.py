@@ -0,0 +1,84 @@
+from services.fanout import SensorFanout
+
+
+def reading(station_id='A', timestamp='2024-03-01T00:00:00', **values):
+    return {'station_id': station_id, 'timestamp': timestamp, **values}
+
+
+def test_clients_with_the_same_subscription_share_one_frame():
+    fanout = SensorFanout()
+    room, keyframe, left = fanout.subscribe('c1', 'A', ['wind_speed', 'temperature'])
+    assert (keyframe, left) == (None, [])
+    assert fanout.subscribe('c2', 'A', ['temperature', 'wind_speed'])[0] == room
+    fanout.subscribe('c3', 'B', ['temperature'])
+
+    frames = fanout.frames([reading(temperature=20.0, wind_speed=3.0, humidity=70.0)])
+
+    assert frames == [(room, {
+        'station_id': 'A', 'seq': 1, 'keyframe': True, 'timestamp': '2024-03-01T00:00:00',
+        'values': {'temperature': 20.0, 'wind_speed': 3.0}
+    })]
+    assert fanout.group_size(room) == 2
+    assert fanout.stats()['deliveries'] == 2
+
+
+def test_frames_carry_only_changed_values_between_keyframes():
+    fanout = SensorFanout(keyframe_interval=3)
+    room, _, _ = fanout.subscribe('c1', 'A', ['temperature', 'wind_speed'])
+    ticks = [
+        {'temperature': 20.0, 'wind_speed': 3.0},
+        {'temperature': 20.0, 'wind_speed': 4.0},
+        {'temperature': 20.0, 'wind_speed': 4.0},
+        {'temperature': 21.0, 'wind_speed': 4.0},
+    ]
+    sent = [fanout.frames([reading(timestamp=f't{i}', **values)]) for i, values in enumerate(ticks)]
+
+    assert [frame['values'] for frame in (frames[0][1] for frames in sent if frames)] == [
+        {'temperature': 20.0, 'wind_speed': 3.0},
+        {'wind_speed': 4.0},
+        {'temperature': 21.0, 'wind_speed': 4.0},
+    ]
+    # An unchanged tick sends nothing and does not use up a sequence number
+    assert sent[2] == []
+    assert [frames[0][1]['seq'] for frames in sent if frames] == [1, 2, 3]
+    assert [frames[0][1]['keyframe'] for frames in sent if frames] == [True, False, True]
+
+
+def test_applying_frames_reproduces_the_readings():
+    fanout = SensorFanout(keyframe_interval=4)
+    room, _, _ = fanout.subscribe('c1', 'A', ['temperature', 'rainfall'])
+    state = {}
+    for i in range(20):
+        current = {'temperature': float(i // 3), 'rainfall': float(i % 2 and i // 5)}
+        for _, frame in fanout.frames([reading(timestamp=f't{i}', **current)]):
+            state = dict(frame['values']) if frame['keyframe'] else {**state, **frame['values']}
+        assert state == current
+
+
+def test_new_member_gets_a_keyframe_of_the_group_state():
+    fanout = SensorFanout()
+    fanout.subscribe('c1', 'A', ['temperature'])
+    fanout.frames([reading(temperature=20.0)])
+    fanout.frames([reading(timestamp='t1', temperature=22.0)])
+
+    _, keyframe, _ = fanout.subscribe('c2', 'A', ['temperature'])
+    assert keyframe == {'station_id': 'A', 'seq': 2, 'keyframe': True, 'timestamp': 't1',
+                        'values': {'temperature': 22.0}}
+    assert fanout.keyframe('c2', 'A') == keyframe
+    assert fanout.keyframe('c2', 'B') is None
+
+
+def test_resubscribing_replaces_the_station_subscription():
+    fanout = SensorFanout()
+    old, _, _ = fanout.subscribe('c1', 'A', ['temperature'])
+    other, _, _ = fanout.subscribe('c1', 'B', ['temperature'])
+    new, _, left = fanout.subscribe('c1', 'A', ['humidity'])
+
+    assert left == [old]
+    assert fanout.group_size(old) == 0 and fanout.group_size(new) == 1
+    assert fanout.stats()['groups'] == 2
+
+    assert sorted(fanout.unsubscribe('c1')) == sorted([new, other])
+    assert fanout.stats()['groups'] == fanout.stats()['clients'] == 0
+    assert fanout.frames([reading(temperature=1.0)]) == []
+    assert fanout.unsubscribe('unknown') == []
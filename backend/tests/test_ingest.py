@@ -0,0 +1,117 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app import app
+from services.data_generator import WeatherDataGenerator
+from services.ingest import ReadingIngestor, parse_timestamps
+from services.stations import StationRegistry
+
+SENSORS = ['temperature', 'wind_speed']
+RANGES = WeatherDataGenerator().ranges
+
+
+def registry():
+    return StationRegistry(['A', 'B'], SENSORS, RANGES, capacity=64)
+
+
+def reading(timestamp, station_id='A', temperature=25.0, wind_speed=4.0):
+    return {'station_id': station_id, 'timestamp': timestamp,
+            'temperature': temperature, 'wind_speed': wind_speed}
+
+
+def backfilling(stations, end='2024-03-01T10:00'):
+    """ensure_station that seeds a station with ten minutes of history, like the app"""
+    seeded = []
+
+    def ensure_station(station_id):
+        station = stations.get(station_id)
+        if not station.seeded:
+            timestamps = np.datetime64(end, 'ms') - np.arange(10, 0, -1) * np.timedelta64(1, 'm')
+            station.extend({'timestamp': timestamps, 'temperature': np.full(10, 20.0),
+                            'wind_speed': np.full(10, 3.0)})
+            station.seeded = True
+            seeded.append(station_id)
+        return station
+    return ensure_station, seeded
+
+
+@pytest.fixture
+def jakarta_time(monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Jakarta')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('station_id', [5, ['A'], {'id': 'A'}])
+def test_non_string_station_ids_are_rejected(station_id):
+    ingestor = ReadingIngestor(registry(), RANGES)
+
+    with pytest.raises(ValueError, match='station_id must be a string'):
+        ingestor.ingest([reading('2024-03-01T10:00', station_id=station_id)])
+    assert ingestor.stats() == {'batches': 0, 'received': 0, 'accepted': 0}
+
+
+def test_stations_are_backfilled_before_live_readings():
+    stations = registry()
+    ensure_station, seeded = backfilling(stations)
+    ingestor = ReadingIngestor(stations, RANGES, ensure_station=ensure_station)
+
+    summary = ingestor.ingest([
+        reading('2024-03-01T09:55'),  # older than the backfilled history
+        reading('2024-03-01T10:01', temperature=30.0),
+    ])
+
+    assert seeded == ['A']
+    assert summary['accepted'] == 2
+    assert summary['recorded_live'] == 1
+    timestamps = stations.get('A').buffer.window().timestamps()
+    assert len(timestamps) == 11
+    assert np.all(np.diff(timestamps) > 0)
+    assert stations.current('A')['temperature'] == 30.0
+
+
+def test_ingest_waits_for_the_station_lock():
+    stations = registry()
+    ingestor = ReadingIngestor(stations, RANGES)
+    station = stations.get('A')
+
+    with station.lock:
+        worker = threading.Thread(target=ingestor.ingest, args=([reading('2024-03-01T10:00')],))
+        worker.start()
+        worker.join(0.05)
+        assert worker.is_alive()
+        assert len(station.buffer) == 0
+    worker.join(1)
+
+    assert not worker.is_alive()
+    assert len(station.buffer) == 1
+
+
+def test_naive_timestamps_are_server_local_time(jakarta_time):
+    local_noon = np.datetime64('2024-03-01T12:00', 'ms').astype(np.int64)
+    utc_epoch = np.datetime64('2024-03-01T05:00', 's').astype(np.int64)
+
+    parsed = parse_timestamps([
+        '2024-03-01T12:00:00',
+        '2024-03-01T05:00:00Z',
+        '2024-03-01T12:00:00+07:00',
+        '2024-03-01T06:00:00+0100',
+        'not a time',
+    ])
+    epochs = parse_timestamps([utc_epoch, utc_epoch * 1000, None])
+
+    assert parsed.tolist() == [local_noon] * 4 + [-1]
+    assert epochs.tolist() == [local_noon, local_noon, -1]
+
+
+@pytest.mark.parametrize('station_id', [7, ['KLIMACEK_001']])
+def test_endpoint_answers_400_for_non_string_station_ids(station_id):
+    response = app.test_client().post('/api/sensors/ingest', json=[reading('2024-03-01T10:00', station_id)])
+
+    assert response.status_code == 400
+    assert 'station_id must be a string' in response.get_json()['error']
@@ -0,0 +1,105 @@
+import json
+import logging
+from contextlib import nullcontext
+
+import pytest
+from prometheus_client import REGISTRY
+
+from benchmarks.fakes import StubNixtlaClient
+from services import logging_setup, metrics
+from services.ml_service import TimeGPTWeatherPredictor
+from test_ml_service import history
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def backend():
+    import app as backend
+    return backend
+
+
+def test_metrics_endpoint_exposes_request_latency_by_route(backend):
+    client = backend.app.test_client()
+    route = {'method': 'GET', 'route': '/api/model/status', 'status': '200'}
+    unmatched = {'method': 'GET', 'route': 'unmatched', 'status': '404'}
+    before = sample('klimacek_http_request_duration_seconds_count', **route)
+    before_unmatched = sample('klimacek_http_request_duration_seconds_count', **unmatched)
+
+    assert client.get('/api/model/status').status_code == 200
+    client.get('/api/no/such/route')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'klimacek_http_request_duration_seconds_bucket' in body
+    assert 'klimacek_sse_subscribers' in body and 'klimacek_fanout_groups' in body
+    assert sample('klimacek_http_request_duration_seconds_count', **route) == before + 1
+    assert sample('klimacek_http_request_duration_seconds_count', **unmatched) == before_unmatched + 1
+
+
+def test_socket_clients_gauge_follows_connections(backend):
+    before = sample('klimacek_socket_clients')
+    client = backend.socketio.test_client(backend.app)
+    assert sample('klimacek_socket_clients') == before + 1
+    client.disconnect()
+    assert sample('klimacek_socket_clients') == before
+
+
+@pytest.mark.parametrize('outcome', ['success', 'partial', 'error'])
+def test_forecast_timer_counts_outcomes(outcome):
+    before = sample('klimacek_forecast_calls_total', engine='test', outcome=outcome)
+    observed = sample('klimacek_forecast_duration_seconds_count', engine='test')
+
+    with pytest.raises(RuntimeError) if outcome == 'error' else nullcontext():
+        with metrics.ForecastTimer('test') as call:
+            if outcome == 'error':
+                raise RuntimeError('engine failed')
+            call.outcome = outcome
+
+    assert sample('klimacek_forecast_calls_total', engine='test', outcome=outcome) == before + 1
+    assert sample('klimacek_forecast_duration_seconds_count', engine='test') == observed + 1
+
+
+def test_forecast_cache_hits_are_counted():
+    predictor = TimeGPTWeatherPredictor()
+    predictor.nixtla_client = StubNixtlaClient()
+    data = history(7)
+    before_hits = sample('klimacek_forecast_cache_hits_total', engine='timegpt')
+    before_calls = sample('klimacek_forecast_calls_total', engine='timegpt', outcome='success')
+
+    predictor.predict_future(data, 3, engine='timegpt')
+    predictor.predict_future(data, 3, engine='timegpt')
+
+    assert sample('klimacek_forecast_calls_total', engine='timegpt', outcome='success') == before_calls + 1
+    assert sample('klimacek_forecast_cache_hits_total', engine='timegpt') == before_hits + len(predictor.sensors)
+
+
+def test_record_generation():
+    before = sample('klimacek_generator_rows_total', kind='test')
+    metrics.record_generation('test', 500, 0.25)
+    metrics.record_generation('test', 10, 0.0)
+
+    assert sample('klimacek_generator_rows_total', kind='test') == before + 510
+    assert sample('klimacek_generator_rows_per_second', kind='test') == 2000.0
+
+
+def test_json_logging_includes_extra_fields(capsys):
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    try:
+        logging_setup.configure_logging('INFO', 'json')
+        logging.getLogger('klimacek.test').info('Client connected', extra={'sid': 'abc'})
+        logging.getLogger('klimacek.test').debug('hidden')
+    finally:
+        root.handlers[:], root.level = handlers, level
+
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['level'] == 'INFO' and record['logger'] == 'klimacek.test'
+    assert record['message'] == 'Client connected' and record['sid'] == 'abc'
+    assert 'time' in record
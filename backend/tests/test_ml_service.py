@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fakes import StubNixtlaClient
+from services.data_generator import WeatherDataGenerator
+from services.ml_service import TimeGPTWeatherPredictor
+from services.prepared_dataset import PreparedDataset
+
+END = np.datetime64('2024-03-01T00:00')
+
+
+def history(days, step_minutes=30, station_id='KLIMACEK_001', seed=0, end=END):
+    """Generated readings over ``days`` days ending at ``end``, as a PreparedDataset"""
+    count = days * 1440 // step_minutes
+    timestamps = end - np.arange(count)[::-1] * np.timedelta64(step_minutes, 'm')
+    columns = WeatherDataGenerator(seed=seed).generate_columns(timestamps)
+    metadata = {'station_id': station_id} if station_id else {}
+    return PreparedDataset.from_columns(columns, metadata=metadata)
+
+
+@pytest.fixture
+def predictor():
+    predictor = TimeGPTWeatherPredictor()
+    predictor.nixtla_client = StubNixtlaClient()
+    return predictor
+
+
+def test_watermark_includes_span_size_and_step():
+    month, fortnight = history(30), history(14)
+    assert month.watermark[0] == fortnight.watermark[0] == 'KLIMACEK_001'
+    assert month.watermark[2] == fortnight.watermark[2]
+    assert month.watermark != fortnight.watermark
+    assert history(14, step_minutes=30).watermark != history(14, step_minutes=60).watermark
+
+
+def test_different_spans_of_one_station_do_not_share_forecasts(predictor):
+    month, fortnight = history(30), history(14)
+
+    first = predictor.predict_future(month, 7, engine='timegpt')
+    second = predictor.predict_future(fortnight, 7, engine='timegpt')
+
+    assert predictor.nixtla_client.calls == 2
+    assert first['temperature'] != second['temperature']
+
+
+def test_frames_without_station_id_are_keyed_by_span(predictor):
+    frame = pd.DataFrame(history(7, station_id=None).values.T, columns=predictor.sensors)
+    frame.insert(0, 'timestamp', history(7).timestamps)
+
+    predictor.predict_future(frame, 3, engine='timegpt')
+    predictor.predict_future(frame.copy(), 3, engine='timegpt')
+    assert predictor.nixtla_client.calls == 1
+
+    newer = frame.copy()
+    newer['timestamp'] += pd.Timedelta(minutes=30)
+    predictor.predict_future(newer, 3, engine='timegpt')
+    assert predictor.nixtla_client.calls == 2
+
+
+def test_readings_without_station_id_share_the_station_forecast(predictor):
+    data = history(14)
+    records = [
+        {'timestamp': pd.Timestamp(timestamp).isoformat(), **dict(zip(predictor.sensors, row))}
+        for timestamp, row in zip(data.timestamps, data.values.T.tolist())
+    ]
+
+    plot = predictor.generate_forecast_plot_data(records, 'temperature', 7, engine='timegpt',
+                                                 station_id='KLIMACEK_001')
+    predictions = predictor.predict_sensor(data, 'temperature', 7, engine='timegpt')
+
+    assert predictor.nixtla_client.calls == 1
+    assert [p['value'] for p in predictions] == [row['forecast'] for row in plot['forecast']]
+
+
+def test_one_forecast_call_per_dataset(predictor):
+    data = history(14)
+
+    predictions = predictor.predict_future(data, 7, engine='timegpt')
+    sensor = predictor.predict_sensor(data, 'temperature', 7, engine='timegpt')
+    plot = predictor.generate_forecast_plot_data(data, 'humidity', 7, engine='timegpt')
+
+    assert predictor.nixtla_client.calls == 1
+    assert set(predictions) == set(predictor.sensors)
+    assert [p['value'] for p in sensor] == [p['predicted_value'] for p in predictions['temperature']]
+    assert len(plot['forecast']) == 7
+
+    # A newer reading moves the watermark, so the next request forecasts again
+    predictor.predict_future(history(14, end=END + np.timedelta64(30, 'm')), 7, engine='timegpt')
+    assert predictor.nixtla_client.calls == 2
+
+
+def test_local_horizon_counts_steps_of_minute_data(predictor):
+    data = history(3, step_minutes=1)
+    seasons = []
+    forecast = predictor.statistical_forecaster.forecast
+
+    def recording_forecast(values, horizon, season_length=1, method='holt_winters'):
+        seasons.append(season_length)
+        return forecast(values, horizon, season_length, method)
+
+    predictor.statistical_forecaster.forecast = recording_forecast
+    frames = predictor._forecast_local('seasonal_naive', data, ['temperature'], 30)
+
+    future = frames['temperature']['timestamp'].to_numpy()
+    assert seasons == [1440]
+    assert len(future) == 30
+    assert future[0] == data.timestamps[-1] + np.timedelta64(1, 'm')
+    assert future[-1] == data.timestamps[-1] + np.timedelta64(30, 'm')
+
+
+def test_history_then_predictions_reuse_the_plotted_forecast():
+    import app as backend
+    predictor, client = backend.ml_predictor, backend.app.test_client()
+    stub, engine = StubNixtlaClient(), predictor.engine
+    previous, predictor.nixtla_client, predictor.engine = predictor.nixtla_client, stub, 'timegpt'
+    predictor.forecast_cache.clear()
+    hits = predictor.forecast_cache.stats()['hits']
+    try:
+        history_response = client.get('/api/sensors/history?days=60&limit=2000').get_json()
+        readings = [
+            {key: value for key, value in reading.items() if key not in ('station_id', 'location')}
+            for reading in history_response['data']
+        ]
+        predictor.generate_forecast_plot_data(readings, 'temperature', 7,
+                                              station_id=history_response['station_id'])
+        assert stub.calls == 1
+
+        predictions = client.get('/api/predictions?days=7').get_json()['predictions']
+        hits = predictor.forecast_cache.stats()['hits'] - hits
+    finally:
+        predictor.nixtla_client, predictor.engine = previous, engine
+        predictor.forecast_cache.clear()
+
+    # The plotted sensor comes from the cache; only the others are forecast again
+    assert hits == 1
+    assert stub.calls == 2
+    assert len(predictions['temperature']) == 7
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from services.resilience import CircuitBreaker, CircuitOpenError, ForecastDispatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowCall:
+    """fn(batch) that takes ``batch`` seconds (or raises an exception passed as batch)"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, batch):
+        self.calls.append(batch)
+        if isinstance(batch, Exception):
+            raise batch
+        self.release.wait(batch)
+        return batch
+
+
+@pytest.fixture
+def slow():
+    slow = SlowCall()
+    yield slow
+    slow.release.set()
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_reset():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow_request() and not breaker.allow_request()
+    assert breaker.stats()['rejected_calls'] == 2
+
+    clock.now = 59.9
+    assert breaker.state == 'open'
+    clock.now = 60.0
+    assert breaker.state == 'half_open'
+    # Only one probe at a time
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    clock.now = 19
+    assert not breaker.allow_request()
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.stats()['consecutive_failures'] == 0
+
+
+def test_run_all_returns_results_and_errors_in_order(slow):
+    dispatcher = ForecastDispatcher(max_workers=3, call_timeout=5, request_deadline=5)
+    error = ValueError('bad series')
+
+    results = dispatcher.run_all(slow, [0.02, error, 0.01])
+
+    assert results == [0.02, error, 0.01]
+    assert dispatcher.breaker.stats()['consecutive_failures'] == 0
+
+
+def test_open_breaker_rejects_without_calling(slow):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    dispatcher = ForecastDispatcher(call_timeout=5, request_deadline=5, breaker=breaker)
+
+    dispatcher.run_all(slow, [RuntimeError('down'), RuntimeError('down')])
+    assert breaker.state == 'open'
+
+    results = dispatcher.run_all(slow, [0.01, 0.01])
+    assert all(isinstance(result, CircuitOpenError) for result in results)
+    assert len(slow.calls) == 2
+
+
+def test_call_timeout_runs_from_submission(slow):
+    dispatcher = ForecastDispatcher(max_workers=2, call_timeout=0.2, request_deadline=5,
+                                    breaker=CircuitBreaker(failure_threshold=10))
+
+    # The second call is only waited on after the first returns, yet its
+    # limit still ends 0.2 s after it was submitted
+    started = time.monotonic()
+    results = dispatcher.run_all(slow, [0.15, 0.3])
+    elapsed = time.monotonic() - started
+
+    assert results[0] == 0.15
+    assert isinstance(results[1], TimeoutError) and 'call timeout' in str(results[1])
+    assert elapsed < 0.28
+    assert dispatcher.breaker.stats()['consecutive_failures'] == 1
+
+
+def test_request_deadline_caps_every_call(slow):
+    dispatcher = ForecastDispatcher(max_workers=3, call_timeout=5, request_deadline=0.2,
+                                    breaker=CircuitBreaker(failure_threshold=10))
+
+    started = time.monotonic()
+    results = dispatcher.run_all(slow, [0.05, 1.0, 1.0])
+    elapsed = time.monotonic() - started
+
+    assert results[0] == 0.05
+    assert all(isinstance(result, TimeoutError) and 'deadline' in str(result) for result in results[1:])
+    assert elapsed < 0.4
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from services.rollups import RollupStore, RollupTier
+
+SENSORS = ['temperature', 'wind_speed']
+HOUR_MS = 3600 * 1000
+START = np.datetime64('2024-03-01T00:00', 'ms').astype(np.int64)
+
+
+def store(**options):
+    return RollupStore(SENSORS, **options)
+
+
+def test_tiers_match_numpy_per_bucket():
+    rng = np.random.default_rng(0)
+    timestamps = START + np.arange(0, 3 * HOUR_MS, 60 * 1000)
+    values = rng.normal(20, 5, (len(timestamps), len(SENSORS)))
+    values[::7, 1] = np.nan
+    rollups = store()
+    rollups.ingest_columns(timestamps, values)
+
+    buckets = rollups.query('1h')
+    assert buckets['timestamp'].tolist() == [START, START + HOUR_MS, START + 2 * HOUR_MS]
+    for b in range(3):
+        hour = values[b * 60:(b + 1) * 60]
+        valid = ~np.isnan(hour)
+        assert buckets['count'][b].tolist() == valid.sum(axis=0).tolist()
+        np.testing.assert_allclose(buckets['sum'][b], np.nansum(hour, axis=0))
+        np.testing.assert_allclose(buckets['min'][b], np.nanmin(hour, axis=0))
+        np.testing.assert_allclose(buckets['max'][b], np.nanmax(hour, axis=0))
+
+    day = rollups.query('1d')
+    assert day['count'][0].tolist() == (~np.isnan(values)).sum(axis=0).tolist()
+
+
+def test_ring_reuses_slots_of_old_buckets():
+    tier = RollupTier('1h', 3600, 4, SENSORS)
+    for hour in range(6):
+        tier.ingest(np.array([START + hour * HOUR_MS]), np.array([[hour, hour]], dtype=float))
+
+    buckets = tier.query()
+    assert buckets['timestamp'].tolist() == [START + h * HOUR_MS for h in range(2, 6)]
+    assert buckets['count'][:, 0].tolist() == [1, 1, 1, 1]
+    assert buckets['sum'][:, 0].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+    # Readings older than the ring are ignored instead of overwriting newer buckets
+    tier.ingest(np.array([START]), np.array([[99.0, 99.0]]))
+    tier.ingest_extremes(START, np.array([99.0, 99.0]))
+    assert tier.query()['max'].max() == 5.0
+
+
+@pytest.mark.parametrize('span_hours, max_points, tier', [
+    (24, 1000, None),
+    (24 * 30, 100, '1h'),
+    (24 * 365, 100, '1d'),
+])
+def test_choose_tier_picks_the_coarsest_tier_that_gives_enough_points(span_hours, max_points, tier):
+    assert store().choose_tier(span_hours * HOUR_MS, max_points) == tier
+
+
+def test_downsample_merges_buckets_down_to_max_points():
+    rollups = store()
+    timestamps = START + np.arange(10) * HOUR_MS
+    rollups.ingest_columns(timestamps, np.column_stack([np.arange(10.0), np.arange(10.0) * 2]))
+
+    chart = rollups.downsample('1h', START, START + 10 * HOUR_MS, max_points=5).to_columns()
+    assert len(chart['timestamp']) == 5
+    np.testing.assert_allclose(chart['temperature'], [0.5, 2.5, 4.5, 6.5, 8.5])
+    np.testing.assert_allclose(chart['wind_speed'], [2, 6, 10, 14, 18])  # peak sensor: bucket max
+    np.testing.assert_allclose(chart['temperature_min'], [0, 2, 4, 6, 8])
+
+    assert len(rollups.downsample('1h', START, START + 10 * HOUR_MS, max_points=50).to_columns()['timestamp']) == 10
+    assert len(store().downsample('1h', START, START + HOUR_MS, max_points=5)) == 0
+
+
+def test_summarize_totals_whole_buckets():
+    rollups = store()
+    values = np.array([[10.0, 1.0], [20.0, np.nan], [30.0, 5.0]])
+    rollups.ingest_columns(START + np.arange(3) * HOUR_MS, values)
+
+    count, total, low, high, total_sq = rollups.summarize('1h', START, START + 2 * HOUR_MS)
+    assert count.tolist() == [3, 2]
+    assert total.tolist() == [60.0, 6.0]
+    assert (low.tolist(), high.tolist()) == ([10.0, 1.0], [30.0, 5.0])
+    assert total_sq.tolist() == [1400.0, 26.0]
+
+    count, total, low, high, _ = rollups.summarize('1h', START + 10 * HOUR_MS, START + 11 * HOUR_MS)
+    assert count.tolist() == [0, 0] and np.isinf(low).all() and np.isinf(high).all()
+
+
+def test_unrecorded_samples_do_not_overwrite_newer_buckets():
+    tier = RollupTier('1h', 3600, 4, SENSORS)
+    for hour in range(6):
+        tier.ingest(np.array([START + hour * HOUR_MS]), np.array([[hour, hour]], dtype=float))
+
+    tier.ingest_extremes(START, np.array([99.0, 99.0]))
+
+    buckets = tier.query()
+    assert buckets['timestamp'].tolist() == [START + h * HOUR_MS for h in range(2, 6)]
+    assert buckets['max'].max() == 5.0
+
+
+def test_downsample_keeps_peaks_of_buckets_with_only_unrecorded_samples():
+    rollups = store()
+    rollups.ingest_columns(np.array([START]), np.array([[20.0, 3.0]]))
+    # The current hour has only seen high-rate ticks so far
+    rollups.ingest_extremes(START + HOUR_MS + 500, np.array([np.nan, 12.0]))
+    rollups.ingest_extremes(START + HOUR_MS + 600, np.array([np.nan, 4.0]))
+
+    chart = rollups.downsample('1h', START, START + 2 * HOUR_MS, max_points=10).to_columns()
+    assert chart['wind_speed'].tolist() == [3.0, 12.0]
+    assert chart['wind_speed_min'].tolist() == [3.0, 4.0]
+    assert np.isnan(chart['temperature'][1]) and np.isnan(chart['temperature_max'][1])
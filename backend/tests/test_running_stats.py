@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from services.running_stats import RunningStats
+
+SENSORS = ['temperature', 'rainfall']
+BOUNDS = {'temperature': (20, 35), 'rainfall': (0, 15)}
+
+
+def random_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    temperature = rng.normal(27, 3, n)
+    rainfall = rng.gamma(0.5, 2, n)
+    rainfall[rng.random(n) < 0.2] = np.nan
+    return {'temperature': temperature, 'rainfall': rainfall}
+
+
+def summary_of(columns, blocks):
+    stats = RunningStats(SENSORS, BOUNDS)
+    n = len(columns['temperature'])
+    for block in np.array_split(np.arange(n), blocks):
+        stats.update_columns({sensor: values[block] for sensor, values in columns.items()})
+    return stats
+
+
+@pytest.mark.parametrize('blocks', [1, 7, 1000])
+def test_block_updates_match_numpy(blocks):
+    columns = random_columns(5000)
+    summary = summary_of(columns, blocks).summary()
+
+    for sensor, values in columns.items():
+        values = values[~np.isnan(values)]
+        assert summary[sensor]['count'] == len(values)
+        assert summary[sensor]['mean'] == pytest.approx(values.mean(), abs=1e-4)
+        assert summary[sensor]['std'] == pytest.approx(values.std(ddof=1), abs=1e-4)
+        assert (summary[sensor]['min'], summary[sensor]['max']) == (
+            round(values.min(), 4), round(values.max(), 4))
+
+
+def test_single_readings_match_block_updates():
+    columns = random_columns(500, seed=1)
+    one_by_one = RunningStats(SENSORS, BOUNDS)
+    for i in range(500):
+        one_by_one.update({sensor: None if np.isnan(values[i]) else values[i] for sensor, values in columns.items()})
+
+    blocks = summary_of(columns, 13)
+    for sensor in SENSORS:
+        expected = blocks.summary()[sensor]
+        actual = one_by_one.summary()[sensor]
+        for key in ('count', 'mean', 'std', 'min', 'max', 'ewma'):
+            assert actual[key] == pytest.approx(expected[key], abs=1e-4), (sensor, key)
+        assert actual['quantiles'] == expected['quantiles']
+
+
+def test_ewma_follows_the_recurrence():
+    values = np.array([10.0, 20.0, 20.0, 5.0])
+    stats = RunningStats(['temperature'], BOUNDS, ewma_alpha=0.5)
+    stats.update_columns({'temperature': values[:1]})
+    stats.update_columns({'temperature': values[1:]})
+
+    ewma = values[0]
+    for value in values[1:]:
+        ewma += 0.5 * (value - ewma)
+    assert stats.summary()['temperature']['ewma'] == pytest.approx(ewma)
+
+
+def test_histogram_quantiles_are_within_a_bin_of_numpy():
+    columns = random_columns(20000, seed=2)
+    stats = summary_of(columns, 4)
+    width = 3 * 15 / stats.bins
+
+    for sensor, values in columns.items():
+        values = values[~np.isnan(values)]
+        quantiles = stats.summary()[sensor]['quantiles']
+        for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+            assert quantiles[f'p{round(q * 100)}'] == pytest.approx(np.quantile(values, q), abs=width)
+
+
+def test_values_outside_the_histogram_range_are_clamped_to_min_max():
+    stats = RunningStats(['temperature'], BOUNDS)
+    stats.update_columns({'temperature': np.array([-100.0, 27.0, 500.0])})
+
+    summary = stats.summary()['temperature']
+    assert (summary['min'], summary['max']) == (-100.0, 500.0)
+    assert summary['quantiles']['p5'] >= -100.0 and summary['quantiles']['p95'] <= 500.0
+
+
+def test_empty_and_missing_data():
+    stats = RunningStats(SENSORS, BOUNDS)
+    assert stats.summary() == {'temperature': {'count': 0}, 'rainfall': {'count': 0}}
+
+    stats.update_columns({'temperature': np.array([]), 'rainfall': np.array([np.nan, np.nan])})
+    stats.update({'humidity': 70.0})
+    assert stats.summary() == {'temperature': {'count': 0}, 'rainfall': {'count': 0}}
+
+    stats.update({'temperature': 25.0})
+    summary = stats.summary(sensors=['temperature'])
+    assert list(summary) == ['temperature']
+    assert summary['temperature']['std'] == 0.0 and summary['temperature']['mean'] == 25.0
+    assert summary['temperature']['quantiles']['p50'] == 25.0
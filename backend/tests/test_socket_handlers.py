@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+from app import app, socketio
+
+EVENTS = ['subscribe', 'unsubscribe', 'subscribe_sensors', 'unsubscribe_sensors', 'request_keyframe']
+
+
+@pytest.fixture
+def client():
+    client = socketio.test_client(app)
+    client.get_received()
+    yield client
+    client.disconnect()
+
+
+@pytest.mark.parametrize('event', EVENTS)
+@pytest.mark.parametrize('payload', [(), (None,), ({},)], ids=['missing', 'null', 'empty'])
+def test_handlers_accept_an_empty_payload(client, event, payload):
+    client.emit(event, *payload)
+
+    assert client.is_connected()
+    received = {message['name'] for message in client.get_received()}
+    assert 'subscription_error' not in received
+
+
+
+def rooms(client):
+    manager = socketio.server.manager
+    return set(manager.get_rooms(manager.sid_from_eio_sid(client.eio_sid, '/'), '/'))
+
+
+def station_updates(client):
+    return [message for message in client.get_received() if message['name'] == 'sensor_update']
+
+
+def record_tick():
+    app_module.sampling_tick(datetime(2024, 3, 1, 12), ['record'])
+
+
+def test_empty_unsubscribe_leaves_the_default_station(client):
+    default_room = app_module.station_room(app_module.stations.default_station)
+    assert default_room in rooms(client)
+    record_tick()
+    assert station_updates(client)
+
+    client.emit('unsubscribe')
+
+    assert default_room not in rooms(client)
+    assert 'station:None' not in rooms(client)
+    unsubscribed = [m for m in client.get_received() if m['name'] == 'unsubscribed']
+    assert unsubscribed[0]['args'][0] == {'station_ids': [app_module.stations.default_station]}
+    record_tick()
+    assert station_updates(client) == []
+
+
+def test_unsubscribe_from_an_unknown_station_is_reported(client):
+    client.emit('unsubscribe', {'station_id': 'NOWHERE'})
+
+    assert [m['name'] for m in client.get_received()] == ['subscription_error']
@@ -0,0 +1,116 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.sse import SSEBroadcaster, encode_event
+
+
+def parse(message):
+    """Fields of one encoded event"""
+    fields = {}
+    for line in message.decode('utf-8').strip().split('\n'):
+        key, _, value = line.partition(': ')
+        fields[key] = value
+    return fields
+
+
+class Steps:
+    """sleep() replacement that runs one scripted action per poll"""
+
+    def __init__(self, *actions):
+        self.actions = list(actions)
+        self.calls = 0
+
+    def __call__(self, seconds):
+        self.calls += 1
+        if self.actions:
+            self.actions.pop(0)()
+
+
+def test_encode_event():
+    assert encode_event(7, {'a': 1}, event='evicted') == b'id: 7\nevent: evicted\ndata: {"a":1}\n\n'
+    assert encode_event(None, {'t': datetime(2024, 3, 1)}) == b'data: {"t":"2024-03-01 00:00:00"}\n\n'
+
+
+def test_publish_encodes_once_for_every_subscriber_of_the_channel():
+    sse = SSEBroadcaster()
+    first, second, other = sse.subscribe('A'), sse.subscribe('A'), sse.subscribe('B')
+
+    assert sse.publish('A', 1, {'value': 20.0}) == 2
+    assert sse.publish('C', 2, {'value': 21.0}) == 0
+
+    assert first.queue[0][1] is second.queue[0][1]
+    assert not other.queue
+    assert sse.stats()['published'] == 1 and sse.stats()['delivered'] == 2
+
+
+def test_stream_replays_then_skips_live_events_it_already_sent():
+    sse = SSEBroadcaster(heartbeat=60)
+    subscriber = sse.subscribe('A')
+    # Published while the replay was read: 2 is also in the replay
+    sse.publish('A', 2, {'n': 2})
+    sse.publish('A', 3, {'n': 3})
+    replay = [(1, encode_event(1, {'n': 1})), (2, encode_event(2, {'n': 2}))]
+
+    stream = sse.stream(subscriber, replay, retry_ms=1000)
+    assert next(stream) == b'retry: 1000\n\n'
+    assert [parse(next(stream))['id'] for _ in range(3)] == ['1', '2', '3']
+    stream.close()
+    assert not sse.has_subscribers('A')
+
+
+def test_slow_subscriber_is_evicted_and_told_why():
+    sse = SSEBroadcaster(max_queue=2)
+    slow, fast = sse.subscribe('A'), sse.subscribe('A')
+    for event_id in range(1, 4):
+        sse.publish('A', event_id, {'n': event_id})
+        fast.queue.clear()
+
+    assert slow.evicted and not fast.evicted
+    assert sse.stats()['evictions'] == 1 and sse.stats()['subscribers'] == 1
+
+    # The stream ends with only the eviction notice; the client resumes from
+    # its Last-Event-ID, so the queued events are replayed from the buffer
+    chunks = list(sse.stream(slow))
+    assert len(chunks) == 2 and parse(chunks[1])['event'] == 'evicted'
+    assert json.loads(parse(chunks[-1])['data']) == {'reason': 'slow consumer'}
+
+
+def test_idle_stream_sends_heartbeats():
+    sse = SSEBroadcaster(heartbeat=0, poll_interval=0)
+    subscriber = sse.subscribe('A')
+    sse.sleep = Steps(lambda: None, lambda: sse.publish('A', 5, {'n': 5}))
+
+    stream = sse.stream(subscriber)
+    next(stream)
+    assert next(stream) == b': heartbeat\n\n'
+    chunk = next(stream)
+    while chunk == b': heartbeat\n\n':
+        chunk = next(stream)
+    assert parse(chunk)['id'] == '5'
+    stream.close()
+
+
+def test_stream_endpoint_replays_readings_after_last_event_id():
+    import app as backend
+
+    station = backend.stations.get()
+    start = datetime.now() - timedelta(minutes=10)
+    timestamps = np.array([start + timedelta(minutes=i) for i in range(5)], dtype='datetime64[ms]')
+    columns = {'timestamp': timestamps, **{sensor: np.full(5, 1.0) for sensor in backend.stations.sensors}}
+    station.buffer.extend(columns)
+    event_ids = station.buffer.slice(int(timestamps[0].astype(np.int64))).timestamps().tolist()[-5:]
+
+    response = backend.app.test_client().get(
+        '/api/stream', headers={'Last-Event-ID': str(event_ids[1])}, buffered=False
+    )
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    replayed = [parse(next(chunks)) for _ in range(3)]
+    response.close()
+
+    assert [int(event['id']) for event in replayed] == event_ids[2:]
+    assert all(json.loads(event['data'])['replayed'] for event in replayed)
+    assert not backend.sse.has_subscribers(station.station_id)
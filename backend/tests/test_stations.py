@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+from services.data_generator import WeatherDataGenerator
+from services.stations import StationRegistry
+
+SENSORS = ['temperature', 'wind_speed']
+
+
+def tick(station_ids, timestamp, **values):
+    columns = {
+        'station_id': np.array(station_ids),
+        'timestamp': np.array([np.datetime64(timestamp)] * len(station_ids))
+    }
+    columns.update({sensor: np.full(len(station_ids), value, dtype=np.float64) for sensor, value in values.items()})
+    return columns
+
+
+def hour_bucket(registry, station_id='A'):
+    buckets = registry.get(station_id).rollups.query('1h')
+    assert len(buckets['timestamp']) == 1
+    return {name: array[0] for name, array in buckets.items()}
+
+
+def registry():
+    return StationRegistry(['A', 'B'], SENSORS, WeatherDataGenerator().ranges, capacity=64)
+
+
+def test_high_rate_samples_reach_rollup_extremes_but_not_counts():
+    stations = registry()
+    stations.update_columns(tick(['A'], '2024-03-01T10:00:00', temperature=25.0, wind_speed=4.0), record=True)
+    for second, gust in enumerate([9.0, 2.0, 14.0, 1.0]):
+        stations.update_columns(tick(['A'], f'2024-03-01T10:00:0{second + 1}', wind_speed=gust))
+    stations.update_columns(tick(['A'], '2024-03-01T10:01:00', temperature=26.0, wind_speed=5.0), record=True)
+
+    bucket = hour_bucket(stations)
+    wind = SENSORS.index('wind_speed')
+    temperature = SENSORS.index('temperature')
+    assert (bucket['min'][wind], bucket['max'][wind]) == (1.0, 14.0)
+    assert (bucket['min'][temperature], bucket['max'][temperature]) == (25.0, 26.0)
+    assert bucket['count'].tolist() == [2, 2]
+    assert bucket['sum'][wind] == 9.0
+
+    # The raw store keeps only the recorded readings
+    assert len(stations.get('A').buffer) == 2
+    assert stations.current('A')['wind_speed'] == 5.0
+
+
+def test_samples_before_the_first_recorded_reading_keep_counts_at_zero():
+    stations = registry()
+    stations.update_columns(tick(['A', 'B'], '2024-03-01T10:00:00.100', wind_speed=7.0))
+
+    bucket = hour_bucket(stations, 'B')
+    assert bucket['count'].tolist() == [0, 0]
+    assert bucket['max'][SENSORS.index('wind_speed')] == 7.0
+    assert np.isinf(bucket['max'][SENSORS.index('temperature')])
+
+
+def test_ticks_wait_for_the_station_lock():
+    stations = registry()
+    station = stations.get('A')
+
+    with station.lock:
+        worker = threading.Thread(target=stations.append_columns,
+                                  args=(tick(['A'], '2024-03-01T10:00:00', temperature=25.0, wind_speed=4.0),))
+        worker.start()
+        worker.join(0.05)
+        assert worker.is_alive()
+    worker.join(1)
+
+    assert not worker.is_alive()
+    assert len(station.buffer) == 1
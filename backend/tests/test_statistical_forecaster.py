@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from services.statistical_forecaster import StatisticalForecaster
+
+
+@pytest.fixture
+def forecaster():
+    return StatisticalForecaster()
+
+
+def daily_cycle(days, season_length=24, n_series=3):
+    """Rows of a sine wave with one period per season, offset per row"""
+    t = np.arange(days * season_length)
+    wave = np.sin(2 * np.pi * t / season_length)
+    return np.vstack([10 * (row + 1) + wave for row in range(n_series)])
+
+
+@pytest.mark.parametrize('method', StatisticalForecaster.methods)
+@pytest.mark.parametrize('n_series', [1, 4])
+def test_output_shape_is_series_by_horizon(forecaster, method, n_series):
+    values = daily_cycle(3, n_series=n_series)
+    assert forecaster.forecast(values, 17, 24, method).shape == (n_series, 17)
+
+
+def test_one_dimensional_input_is_a_single_series(forecaster):
+    assert forecaster.forecast(np.arange(10.0), 5).shape == (1, 5)
+
+
+def test_holt_winters_falls_back_to_damped_holt_below_two_seasons(forecaster):
+    values = daily_cycle(2, season_length=24)[:, :47]
+
+    fallback = forecaster.forecast(values, 12, season_length=24)
+    damped_holt = forecaster.forecast(values, 12, season_length=1)
+
+    np.testing.assert_array_equal(fallback, damped_holt)
+
+
+def test_holt_winters_follows_the_season_with_enough_history(forecaster):
+    values = daily_cycle(6, season_length=24)
+
+    forecast = forecaster.forecast(values, 24, season_length=24)
+
+    np.testing.assert_allclose(forecast, values[:, :24], atol=0.5)
+
+
+def test_seasonal_naive_wraps_around_the_last_season(forecaster):
+    values = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]])
+
+    forecast = forecaster.forecast(values, 7, season_length=3, method='seasonal_naive')
+
+    np.testing.assert_array_equal(forecast, [[3, 4, 5, 3, 4, 5, 3]])
+
+
+def test_seasonal_naive_season_longer_than_history_uses_it_all(forecaster):
+    values = np.array([[1.0, 2.0]])
+
+    forecast = forecaster.forecast(values, 5, season_length=24, method='seasonal_naive')
+
+    np.testing.assert_array_equal(forecast, [[1, 2, 1, 2, 1]])
+
+
+def test_drift_extends_a_straight_line(forecaster):
+    values = np.vstack([2.0 * np.arange(10) + 1, -0.5 * np.arange(10)])
+
+    forecast = forecaster.forecast(values, 4, method='drift')
+
+    steps = np.arange(10, 14)
+    np.testing.assert_allclose(forecast, np.vstack([2.0 * steps + 1, -0.5 * steps]))
+
+
+def test_drift_of_a_single_observation_is_flat(forecaster):
+    np.testing.assert_array_equal(forecaster.forecast([[7.0]], 3, method='drift'), [[7, 7, 7]])
+
+
+def test_missing_values_are_carried_forward_and_backward():
+    values = np.array([[np.nan, 1.0, np.nan, np.nan, 4.0, np.nan]])
+
+    filled = StatisticalForecaster._fill_missing(values)
+
+    np.testing.assert_array_equal(filled, [[1, 1, 1, 1, 4, 4]])
+
+
+def test_empty_series_and_unknown_method_are_rejected(forecaster):
+    with pytest.raises(ValueError, match='empty'):
+        forecaster.forecast(np.empty((2, 0)), 3)
+    with pytest.raises(ValueError, match='Unknown forecasting method'):
+        forecaster.forecast([[1.0, 2.0]], 3, method='arima')
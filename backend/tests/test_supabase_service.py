@@ -0,0 +1,232 @@
+import types
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import SENSORS, FakeQuery, FakeSupabase, sensor_rows
+from services.supabase_service import SupabaseService
+
+END = datetime(2024, 3, 1)
+START = END - timedelta(days=1)
+
+
+class AggregatingSupabase(FakeSupabase):
+    """FakeSupabase whose sensor_aggregates RPC answers like the SQL function"""
+
+    def __init__(self, sensor_data=(), with_std=True):
+        super().__init__(sensor_data)
+        self.with_std = with_std
+        self.rpc_calls = 0
+
+    def rpc(self, name, params=None):
+        self.round_trips += 1
+        self.rpc_calls += 1
+        rows = self.tables['sensor_data'].rows
+        data = []
+        for sensor in SENSORS:
+            values = np.array([row[sensor] for row in rows], dtype=np.float64)
+            row = {
+                'bucket_start': params['start_ts'], 'sensor': sensor, 'n': len(values),
+                'avg_value': values.mean(), 'min_value': values.min(), 'max_value': values.max(),
+                'percentiles': None
+            }
+            if self.with_std:
+                row['std_value'] = values.std()  # stddev_pop
+            data.append(row)
+        return types.SimpleNamespace(execute=lambda: types.SimpleNamespace(data=data))
+
+
+def service_with(client):
+    service = SupabaseService()
+    service.supabase = client
+    return service
+
+
+def test_rpc_and_python_aggregates_have_the_same_shape_and_values():
+    rows = sensor_rows(500, end=END)
+    in_python = service_with(FakeSupabase(rows)).aggregate_sensor_data(START, END)
+    client = AggregatingSupabase(rows)
+    in_database = service_with(client).aggregate_sensor_data(START, END)
+
+    assert client.rpc_calls == 1
+    assert in_database == in_python
+    assert all('std' in summary for summary in in_database.values())
+
+
+def test_outdated_rpc_without_std_falls_back_to_python():
+    rows = sensor_rows(500, end=END)
+    client = AggregatingSupabase(rows, with_std=False)
+
+    result = service_with(client).aggregate_sensor_data(START, END)
+
+    assert client.rpc_calls == 1
+    assert result == service_with(FakeSupabase(rows)).aggregate_sensor_data(START, END)
+
+
+@pytest.mark.parametrize('store', [
+    lambda service, reading: service.store_sensor_data(reading),
+    lambda service, reading: service.store_sensor_data_batch([reading]),
+])
+def test_writes_invalidate_cached_statistics(store):
+    service = service_with(FakeSupabase(sensor_rows(10)))
+    before = service.get_data_statistics(days=1)
+    assert service.get_data_statistics(days=1) is before
+
+    assert store(service, {'timestamp': datetime.now().isoformat(), 'temperature': 21.0})
+
+    after = service.get_data_statistics(days=1)
+    assert after['total_records'] == before['total_records'] + 1
+
+
+
+class APIError(Exception):
+    """Shape of postgrest.exceptions.APIError"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class FailingUpsertSupabase(FakeSupabase):
+    """FakeSupabase whose upserts fail with a Postgres error (plain inserts still work)"""
+
+    def __init__(self, code, message, sensor_data=()):
+        super().__init__(sensor_data)
+        self.error = APIError(code, message)
+        self.insert_error = None
+
+    def table(self, name):
+        query = super().table(name)
+        insert = query.insert
+
+        def upsert(rows, on_conflict=None, ignore_duplicates=False):
+            raise self.error
+
+        def failing_insert(rows):
+            if self.insert_error:
+                raise self.insert_error
+            return insert(rows)
+        query.upsert, query.insert = upsert, failing_insert
+        return query
+
+
+def unindexed():
+    """sensor_data without idx_sensor_data_reading"""
+    return FailingUpsertSupabase('42P10', 'there is no unique or exclusion constraint matching the ON CONFLICT specification')
+
+
+def readings(count, station_id='KLIMACEK_001'):
+    return [
+        {'timestamp': (START + timedelta(minutes=i)).isoformat(), 'temperature': 20.0 + i, 'station_id': station_id}
+        for i in range(count)
+    ]
+
+
+def test_missing_unique_index_falls_back_to_deduplicated_inserts():
+    service = service_with(unindexed())
+
+    assert service.store_sensor_data_batch(readings(3))
+    assert service.upsert_unsupported
+    # Retried and re-sent readings are skipped, new ones and other stations are not
+    assert service.store_sensor_data_batch(readings(5))
+    assert service.store_sensor_data_batch(readings(2, station_id='KLIMACEK_002') * 2)
+
+    keys = [(row['station_id'], row['timestamp']) for row in service.supabase.tables['sensor_data'].rows]
+    assert len(keys) == len(set(keys)) == 7
+
+
+def test_fallback_does_not_remember_failed_inserts():
+    service = service_with(unindexed())
+    service.upsert_unsupported = True
+
+    service.supabase.insert_error = ConnectionError('database unavailable')
+    with pytest.raises(ConnectionError):
+        service._insert_sensor_rows(readings(2))
+
+    # The retry writes the rows instead of skipping them as already written
+    service.supabase.insert_error = None
+    assert service._insert_sensor_rows(readings(2)) == 2
+
+
+def test_other_upsert_errors_are_raised_for_retry():
+    service = service_with(FailingUpsertSupabase('57014', 'canceling statement due to statement timeout'))
+
+    with pytest.raises(APIError):
+        service._insert_sensor_rows(readings(1))
+    assert not service.upsert_unsupported
+
+
+def rollup_rows(hours, stations=('KLIMACEK_001', 'KLIMACEK_002'), tier='1h', end=END):
+    """One sensor_rollups row per bucket, station and sensor"""
+    rows = []
+    for hour in range(hours):
+        bucket = (end - timedelta(hours=hours - hour)).isoformat()
+        for station in stations:
+            for i, sensor in enumerate(SENSORS):
+                rows.append({
+                    'tier': tier, 'bucket_start': bucket, 'station_id': station, 'sensor': sensor,
+                    'n': 60, 'sum': 60.0 * i, 'min': i - 1.0, 'max': i + 1.0, 'sum_sq': 60.0 * i * i
+                })
+    return rows
+
+
+def keyed(rows):
+    return [(row['bucket_start'], row['station_id'], row['sensor']) for row in rows]
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_rollups_are_paged_by_key_without_gaps_or_repeats(prefetch):
+    rows = rollup_rows(30)
+    client = FakeSupabase(sensor_rollups=rows + rollup_rows(30, tier='1d'))
+
+    # 7 rows per page cuts most pages in the middle of a bucket
+    read = service_with(client).get_rollups('1h', START - timedelta(hours=6), END, page_size=7,
+                                            prefetch=prefetch)
+
+    assert keyed(read) == sorted(keyed(rows))
+    assert client.round_trips == len(rows) // 7 + 1
+
+
+def test_rollups_of_one_station_span_pages():
+    client = FakeSupabase(sensor_rollups=rollup_rows(10))
+
+    read = service_with(client).get_rollups('1h', START, END, station_id='KLIMACEK_002', page_size=5)
+
+    assert len(read) == 10 * len(SENSORS)
+    assert {row['station_id'] for row in read} == {'KLIMACEK_002'}
+    assert keyed(read) == sorted(keyed(read))
+
+
+def test_rollup_aggregates_merge_stations_across_pages():
+    client = FakeSupabase(sensor_rollups=rollup_rows(4))
+    service = service_with(client)
+
+    whole = service._aggregates_from_rollups(END - timedelta(hours=4), END, 'hour')
+    service.get_rollups = lambda *args, **kwargs: SupabaseService.get_rollups(service, *args, page_size=3, **kwargs)
+    paged = service._aggregates_from_rollups(END - timedelta(hours=4), END, 'hour')
+
+    assert paged == whole
+    assert len(whole['temperature']) == 4
+    assert all(bucket['count'] == 120 for bucket in whole['temperature'])
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.mark.parametrize('prefetch, expected', [(True, 2), (False, 1)])
+def test_next_page_is_prefetched_while_the_caller_works(prefetch, expected):
+    client = FakeSupabase(sensor_rows(50, end=END))
+    rows = service_with(client).iter_sensor_data(START, END, page_size=10, prefetch=prefetch)
+
+    first = next(rows)
+
+    assert wait_for(lambda: client.round_trips == expected)
+    time.sleep(0.02)
+    assert client.round_trips == expected
+    assert [first['id']] + [row['id'] for row in rows] == list(range(1, 51))
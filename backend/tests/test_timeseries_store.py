@@ -0,0 +1,102 @@
+import numpy as np
+
+from services.timeseries_store import SensorRingBuffer, TimeSeriesSlice
+
+SENSORS = ['temperature', 'rainfall']
+START = np.datetime64('2024-03-01T00:00', 'ms')
+MINUTE_MS = 60 * 1000
+
+
+def columns(count, offset=0):
+    minutes = np.arange(offset, offset + count)
+    return {
+        'timestamp': START + minutes * np.timedelta64(1, 'm'),
+        'temperature': minutes.astype(np.float64),
+        'rainfall': minutes * 0.5
+    }
+
+
+def epoch_ms(minute):
+    return int((START + np.timedelta64(minute, 'm')).astype(np.int64))
+
+
+def test_ring_keeps_the_newest_readings_in_order_after_wrapping():
+    buffer = SensorRingBuffer(SENSORS, capacity=8)
+    assert buffer.extend(columns(5)) == 5
+    assert buffer.extend(columns(6, offset=5)) == 6
+
+    assert len(buffer) == 8
+    window = buffer.slice()
+    assert len(window.segments) == 2
+    assert window.column('temperature').tolist() == list(range(3, 11))
+    assert window.timestamps().tolist() == [epoch_ms(m) for m in range(3, 11)]
+    assert buffer.latest()['temperature'] == 10.0
+
+
+def test_slice_across_the_wrap_point():
+    buffer = SensorRingBuffer(SENSORS, capacity=8)
+    buffer.extend(columns(11))
+
+    both = buffer.slice(epoch_ms(4), epoch_ms(9))
+    assert both.column('temperature').tolist() == [4, 5, 6, 7, 8, 9]
+    assert both.column('rainfall').tolist() == [2.0, 2.5, 3.0, 3.5, 4.0, 4.5]
+
+    assert buffer.slice(epoch_ms(9)).column('temperature').tolist() == [9, 10]
+    assert buffer.slice(end_ms=epoch_ms(3)).column('temperature').tolist() == [3]
+    assert len(buffer.slice(epoch_ms(20))) == 0
+    assert len(buffer.slice(epoch_ms(5), epoch_ms(4))) == 0
+
+
+def test_extend_keeps_only_the_last_capacity_rows_of_a_long_block():
+    buffer = SensorRingBuffer(SENSORS, capacity=4)
+    assert buffer.extend(columns(10)) == 4
+    assert buffer.slice().column('temperature').tolist() == [6, 7, 8, 9]
+
+
+def test_readings_that_are_not_newer_are_skipped():
+    buffer = SensorRingBuffer(SENSORS, capacity=8)
+    buffer.extend(columns(3))
+
+    assert buffer.extend(columns(4)) == 1
+    assert not buffer.append({'timestamp': '2024-03-01T00:03:00', 'temperature': 99.0})
+    assert buffer.append({'timestamp': '2024-03-01T00:04:00', 'temperature': 4.0})
+    assert len(buffer) == 5
+    # Sensors missing from a reading are stored as NaN
+    assert np.isnan(buffer.slice(epoch_ms(4)).column('rainfall')[0])
+
+
+def test_empty_buffer():
+    buffer = SensorRingBuffer(SENSORS, capacity=4)
+    assert buffer.latest() is None and buffer.latest_timestamp is None
+
+    window = buffer.slice()
+    assert len(window) == 0
+    assert window.to_records() == []
+    assert window.column('temperature').size == 0
+    assert len(window.to_prepared()) == 0
+
+
+def test_decimate_and_conversions():
+    buffer = SensorRingBuffer(SENSORS, capacity=16, metadata={'station_id': 'KLIMACEK_001'})
+    buffer.extend(columns(20))
+    window = buffer.slice()
+
+    assert window.decimate(4).column('temperature').tolist() == [4, 9, 14, 19]
+    assert window.decimate(100) is window
+
+    records = window.to_records()
+    assert len(records) == 16
+    assert records[0] == {
+        'timestamp': '2024-03-01T00:04:00.000', 'temperature': 4.0, 'rainfall': 2.0, 'station_id': 'KLIMACEK_001'
+    }
+    frame = window.to_frame()
+    assert frame.attrs['station_id'] == 'KLIMACEK_001'
+    assert frame['temperature'].dtype == np.float64
+    prepared = window.to_prepared()
+    assert prepared.watermark[0] == 'KLIMACEK_001' and len(prepared) == 16
+
+
+def test_slice_of_an_explicit_empty_segment_list():
+    empty = TimeSeriesSlice(SENSORS, [])
+    assert empty.downsample(10) is empty
+    assert empty.to_columns()['timestamp'].size == 0
@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from services.data_generator import WEATHER_EVENTS, WeatherDataGenerator
+
+N = 20000
+
+
+@pytest.fixture
+def generator():
+    return WeatherDataGenerator(seed=4)
+
+
+def series(generator, n=N):
+    timestamps = np.datetime64('2024-03-01T00:00') + np.arange(n) * np.timedelta64(1, 'm')
+    columns = generator.generate_columns(timestamps)
+    columns['station_id'] = np.full(n, 'KLIMACEK_001', dtype=object)
+    return columns
+
+
+def test_event_rows_and_rate(generator):
+    columns = series(generator)
+    _, events = generator.add_weather_event_columns(columns, rng=np.random.default_rng(0))
+
+    rows = events['row']
+    assert (np.diff(rows) > 0).all()
+    assert abs(len(rows) / N - 0.05) < 0.006
+    assert set(events['type'].tolist()) == set(range(len(WEATHER_EVENTS)))
+    np.testing.assert_array_equal(events['timestamp'], columns['timestamp'][rows])
+    assert (events['station_id'] == 'KLIMACEK_001').all()
+
+
+def test_events_change_only_their_rows_within_bounds(generator):
+    original = series(generator)
+    columns, events = generator.add_weather_event_columns(
+        {name: values.copy() for name, values in original.items()}, rng=np.random.default_rng(1)
+    )
+
+    untouched = np.ones(N, dtype=bool)
+    untouched[events['row']] = False
+    for sensor in generator.base_values:
+        np.testing.assert_array_equal(columns[sensor][untouched], original[sensor][untouched])
+
+    def rows_of(event_type):
+        return events['row'][events['type'] == WEATHER_EVENTS.index(event_type)]
+
+    def assert_shifted(sensor, rows, low, high, limit):
+        bound = np.minimum if high > 0 else np.maximum
+        before, after = original[sensor][rows], columns[sensor][rows]
+        assert len(rows)
+        assert (after >= bound(limit, before + low) - 1e-9).all(), sensor
+        assert (after <= bound(limit, before + high) + 1e-9).all(), sensor
+
+    storm = rows_of('storm')
+    assert_shifted('rainfall', storm, 5, 12, 15)
+    assert_shifted('wind_speed', storm, 8, 15, 25)
+    assert_shifted('humidity', storm, 10, 20, 95)
+    np.testing.assert_allclose(columns['light_intensity'][storm], np.maximum(0, original['light_intensity'][storm] * 0.3))
+
+    heat = rows_of('heat_wave')
+    assert_shifted('temperature', heat, 5, 10, 40)
+    assert_shifted('humidity', heat, -20, -10, 20)
+
+    cold = rows_of('cold_snap')
+    assert_shifted('temperature', cold, -8, -5, 15)
+    assert_shifted('wind_speed', cold, 3, 8, 25)
+
+    clear = rows_of('clear_sky')
+    np.testing.assert_allclose(columns['solar_wattage'][clear], np.minimum(100, original['solar_wattage'][clear] * 1.2))
+    np.testing.assert_allclose(columns['light_intensity'][clear], np.minimum(1200, original['light_intensity'][clear] * 1.3))
+
+
+def test_same_stream_gives_the_same_events(generator):
+    first = generator.add_weather_event_columns(series(generator), rng=np.random.default_rng(7))
+    second = generator.add_weather_event_columns(series(generator), rng=np.random.default_rng(7))
+
+    np.testing.assert_array_equal(first[1]['row'], second[1]['row'])
+    for sensor in generator.base_values:
+        np.testing.assert_array_equal(first[0][sensor], second[0][sensor])
+
+
+def test_no_rows_and_no_events(generator):
+    columns, events = generator.add_weather_event_columns(series(generator, 0))
+    assert len(events['row']) == 0 and columns['temperature'].size == 0
+
+    before = series(generator, 100)
+    after, events = generator.add_weather_event_columns(
+        {name: values.copy() for name, values in before.items()}, probability=0.0
+    )
+    assert len(events['row']) == 0
+    np.testing.assert_array_equal(after['rainfall'], before['rainfall'])
+
+
+def test_columns_with_only_some_sensors(generator):
+    columns = {'temperature': np.full(1000, 25.0), 'rainfall': np.zeros(1000)}
+    columns, events = generator.add_weather_event_columns(columns, probability=1.0, rng=np.random.default_rng(2))
+
+    assert len(events['row']) == 1000
+    assert set(columns) == {'temperature', 'rainfall'}
+
+
+def test_record_events_are_applied_to_the_chosen_readings(generator):
+    data = generator.columns_to_records(series(generator, 2000))
+    original = [dict(reading) for reading in data]
+
+    data, events = generator.add_weather_events(data, rng=np.random.default_rng(3))
+
+    changed = [i for i, (a, b) in enumerate(zip(original, data)) if a != b]
+    assert 0 < len(changed) <= len(events)
+    event_times = {datetime.fromisoformat(event['timestamp']) for event in events}
+    assert all(datetime.fromisoformat(data[i]['timestamp']) in event_times for i in changed)
+    assert {event['type'] for event in events} <= set(WEATHER_EVENTS)
@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fakes import FakeSupabase
+from services.supabase_service import SupabaseService
+from services.write_behind import WriteBehindBuffer
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+def readings(count, start=datetime(2024, 1, 1)):
+    return [
+        {'timestamp': (start + timedelta(minutes=i)).isoformat(), 'temperature': 20.0 + i}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def service():
+    service = SupabaseService()
+    service.supabase = FakeSupabase()
+    yield service
+    if service.write_behind:
+        service.write_behind.close()
+
+
+def stored(service):
+    return service.supabase.tables['sensor_data'].rows
+
+
+class Gate:
+    """flush_fn that records batches and holds each one until released"""
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, batch):
+        self.entered.set()
+        self.release.wait(5)
+        self.batches.append(list(batch))
+
+
+def test_flushes_full_batches_in_one_round_trip_each(service):
+    buffer = service.enable_write_behind(max_batch=3, max_age=60)
+    for reading in readings(7):
+        assert service.store_sensor_data(reading)
+
+    assert wait_until(lambda: buffer.stats()['flushed'] == 6)
+    assert service.supabase.round_trips == 2
+    assert buffer.stats()['pending'] == 1
+    assert len(stored(service)) == 6
+
+
+def test_flushes_partial_batch_once_it_is_old_enough(service):
+    buffer = service.enable_write_behind(max_batch=100, max_age=0.05)
+    service.store_sensor_data_batch(readings(2))
+
+    assert wait_until(lambda: buffer.stats()['flushed'] == 2)
+    assert buffer.stats()['batches'] == 1
+    assert service.supabase.round_trips == 1
+
+
+def test_close_writes_pending_readings(service):
+    buffer = service.enable_write_behind(max_batch=100, max_age=60)
+    service.store_sensor_data_batch(readings(5))
+    assert service.supabase.round_trips == 0
+
+    buffer.close()
+
+    assert service.supabase.round_trips == 1
+    assert len(stored(service)) == 5
+    assert not service.store_sensor_data(readings(1)[0])
+
+
+def test_retries_failed_flushes_with_growing_backoff():
+    calls = []
+
+    def flaky(batch):
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise ConnectionError('database unavailable')
+
+    buffer = WriteBehindBuffer(flaky, max_batch=2, max_age=60, backoff=0.02, max_backoff=1)
+    buffer.put('a')
+    buffer.put('b')
+
+    assert wait_until(lambda: buffer.stats()['flushed'] == 2)
+    stats = buffer.stats()
+    assert (stats['retries'], stats['batches'], stats['dropped_failed']) == (2, 1, 0)
+    assert calls[1] - calls[0] >= 0.02
+    assert calls[2] - calls[1] >= 0.04
+    buffer.close()
+
+
+def test_drops_batch_after_max_retries():
+    calls = []
+
+    def broken(batch):
+        calls.append(batch)
+        raise ConnectionError('database unavailable')
+
+    buffer = WriteBehindBuffer(broken, max_batch=3, max_age=60, max_retries=2, backoff=0.001)
+    for item in range(3):
+        buffer.put(item)
+
+    assert wait_until(lambda: buffer.stats()['dropped_failed'] == 3)
+    assert len(calls) == 3
+    assert buffer.stats()['flushed'] == 0
+    buffer.close()
+
+
+def full_buffer(overflow, **options):
+    """Buffer with item 0 stuck in flight and items 1 and 2 pending (max_pending=2)"""
+    gate = Gate()
+    buffer = WriteBehindBuffer(gate, max_batch=1, max_age=60, max_pending=2, overflow=overflow, **options)
+    buffer.put(0)
+    assert gate.entered.wait(5)
+    assert buffer.put(1) and buffer.put(2)
+    return buffer, gate
+
+
+def test_drop_oldest_overflow_makes_room_for_new_items():
+    buffer, gate = full_buffer('drop_oldest')
+
+    assert buffer.put(3)
+    assert buffer.stats()['dropped_overflow'] == 1
+
+    gate.release.set()
+    buffer.close()
+    assert gate.batches == [[0], [2], [3]]
+
+
+def test_drop_newest_overflow_rejects_new_items():
+    buffer, gate = full_buffer('drop_newest')
+
+    assert not buffer.put(3)
+    assert buffer.stats()['dropped_overflow'] == 1
+
+    gate.release.set()
+    buffer.close()
+    assert gate.batches == [[0], [1], [2]]
+
+
+def test_block_overflow_waits_for_room():
+    buffer, gate = full_buffer('block', put_timeout=0.05)
+
+    # Nothing drains while the flush is stuck, so the wait times out
+    started = time.monotonic()
+    assert not buffer.put(3)
+    assert time.monotonic() - started >= 0.05
+    assert buffer.stats()['dropped_overflow'] == 1
+
+    # Once the flush completes the blocked producer gets its slot
+    buffer.put_timeout = 5
+    threading.Timer(0.05, gate.release.set).start()
+    assert buffer.put(4)
+
+    buffer.close()
+    assert gate.batches == [[0], [1], [2], [4]]
+
+
+def test_rejects_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        WriteBehindBuffer(lambda batch: None, overflow='spill')
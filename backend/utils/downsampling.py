@@ -0,0 +1,82 @@
+import numpy as np
+
+# Sensors whose short spikes matter more than their average (rain bursts, gusts)
+PEAK_SENSORS = ('rainfall', 'wind_speed')
+
+
+def time_buckets(timestamps, buckets):
+    """Start index of each non-empty, equally wide time bucket"""
+    n = len(timestamps)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    boundaries = np.linspace(timestamps[0], timestamps[-1], buckets + 1)[:-1]
+    starts = np.searchsorted(timestamps, boundaries, side='left')
+    return np.unique(starts)
+
+
+def minmax_buckets(timestamps, columns, max_points, peak_sensors=PEAK_SENSORS):
+    """Reduce each time bucket to one row of mean, min and max values
+
+    Returns the bucket start timestamps and a dict with ``<sensor>``,
+    ``<sensor>_min`` and ``<sensor>_max`` arrays. For sensors in
+    ``peak_sensors`` the main value is the bucket maximum instead of the mean,
+    so bursts and gusts survive the reduction.
+    """
+    starts = time_buckets(timestamps, max_points)
+    counts = np.diff(np.append(starts, len(timestamps)))
+    reduced = {}
+
+    for sensor, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        totals = np.add.reduceat(filled, starts)
+        present = np.add.reduceat(valid.astype(np.int64), starts)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = totals / present
+        lows = np.fmin.reduceat(values, starts)
+        highs = np.fmax.reduceat(values, starts)
+
+        reduced[sensor] = highs if sensor in peak_sensors else mean
+        reduced[f'{sensor}_min'] = lows
+        reduced[f'{sensor}_max'] = highs
+
+    return timestamps[starts], reduced, counts
+
+
+def lttb_indices(x, y, max_points):
+    """Indices selected by Largest-Triangle-Three-Buckets downsampling
+
+    The first and last points are always kept. Each interior bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket; areas are evaluated for a whole bucket at once.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64) - x[0]
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+    # Interior points split into max_points - 2 buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    next_x = np.append(np.add.reduceat(x[:-1], edges[:-1])[1:], x[-1] * 1.0)
+    next_y = np.append(np.add.reduceat(y[:-1], edges[:-1])[1:], y[-1] * 1.0)
+    sizes = np.diff(edges)
+    next_x[:-1] /= sizes[1:]
+    next_y[:-1] /= sizes[1:]
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs(
+            (ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay)
+        )
+        anchor = lo + int(np.argmax(area))
+        selected[i + 1] = anchor
+
+    return selected
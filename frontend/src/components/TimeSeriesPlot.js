@@ -40,7 +40,7 @@ const TimeSeriesPlot = ({ sensor, predictions }) => {
       };
       
       const days = daysMap[timeRange] || 1;
-      const response = await fetch(`http://localhost:5000/api/sensors/history?days=${days}&limit=500`);
+      const response = await fetch(`http://localhost:5000/api/sensors/history?days=${days}&max_points=500&resolution=lttb&sensor=${sensor}`);
       const data = await response.json();
       
       if (data.success) {